@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Audio Cache
+Content-addressed store of synthesized clips keyed on (normalized text, voice, speed,
+model version). Clips are hardlinked into each quiz's output folder, so the same question
+in several chunk files is synthesized once and stored once. Because an output file may share
+its inode with the cache, it must be unlinked (or replaced atomically) before it is rewritten,
+never written through.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tts_pool import TTSJob
+
+CACHE_DIR = Path(__file__).parent / ".audio_cache"
+CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Least recently used clips are evicted beyond this
+CLIP_SUFFIX = ".mp3"
+INFO_SUFFIX = ".json"  # Sidecar with the clip's manifest entry (duration, loudness)
+USED_SUFFIX = ".used"  # Empty stamp whose mtime is the clip's last use, for eviction
+
+
+def detect_model_version(tts_service=None) -> str:
+    """Best-effort TTS model version so a model upgrade invalidates every clip"""
+    version = getattr(tts_service, "model_version", None)
+    if version:
+        return str(version)
+    try:
+        from importlib.metadata import version as package_version
+        return f"kokoro-{package_version('kokoro')}"
+    except Exception:
+        return "kokoro-unknown"
+
+
+def normalize_text(text: str) -> str:
+    """NFC, single-spaced, trimmed - edits that can't change the spoken audio share a key"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class AudioCache:
+    """Clip store with bounded size and least-recently-used eviction"""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 model_version: str = "kokoro-unknown", variant: Optional[Callable[[str], str]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.model_version = model_version
+        self.variant = variant  # Extra key material per text, e.g. segment_variant for split questions
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str, voice: str, speed: float) -> str:
+        parts = [normalize_text(text), voice, f"{float(speed):.3f}", self.model_version]
+        variant = self.variant(text) if self.variant else ""
+        if variant:
+            parts.append(variant)  # Only when set, so other clips keep their existing keys
+        material = "\x1f".join(parts)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{CLIP_SUFFIX}"
+
+    def job_key(self, job: TTSJob) -> str:
+        return self.key(job.text, job.voice, job.speed)
+
+    @staticmethod
+    def _link(source: Path, target: Path):
+        """Hardlink `source` to `target`, replacing it; copy if linking isn't possible"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copy2(source, tmp)  # Different filesystem, or links unsupported
+        os.replace(tmp, target)
+
+    def materialize(self, job: TTSJob) -> bool:
+        """Place the cached clip for `job` at its output path; False on a cache miss"""
+        path = self._path(self.job_key(job))
+        if not path.exists():
+            self.misses += 1
+            return False
+        output = Path(job.output_path)
+        try:
+            if not (output.exists() and os.path.samefile(path, output)):
+                self._link(path, output)
+            # Not os.utime(path): the clip's inode is shared with every output linked to it
+            path.with_suffix(USED_SUFFIX).touch()
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, job: TTSJob, clip: Optional[Dict[str, Any]] = None):
+        """Adopt a freshly synthesized output file into the cache (as a hardlink, no copy)"""
+        output = Path(job.output_path)
+        if not output.exists():
+            return
+        path = self._path(self.job_key(job))
+        self._link(output, path)
+        if clip:
+            tmp = path.with_suffix(INFO_SUFFIX + ".tmp")
+            tmp.write_text(json.dumps(clip), encoding="utf-8")
+            os.replace(tmp, path.with_suffix(INFO_SUFFIX))
+
+    def clip_info(self, job: TTSJob) -> Optional[Dict[str, Any]]:
+        """Manifest entry stored alongside a cached clip, so hits need no decoding"""
+        try:
+            return json.loads(self._path(self.job_key(job)).with_suffix(INFO_SUFFIX).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def split(self, jobs: List[TTSJob]) -> Tuple[List[TTSJob], int]:
+        """Materialize every cache hit; returns (jobs still to synthesize, hit count)"""
+        remaining = [job for job in jobs if not self.materialize(job)]
+        return remaining, len(jobs) - len(remaining)
+
+    def evict(self) -> int:
+        """Drop least recently used clips until the cache is under max_bytes"""
+        if not self.cache_dir.exists():
+            return 0
+        entries = []
+        for path in self.cache_dir.glob(f"*/*{CLIP_SUFFIX}"):
+            stat = path.stat()
+            stamp = path.with_suffix(USED_SUFFIX)
+            used = stamp.stat().st_mtime if stamp.exists() else stat.st_mtime
+            entries.append((used, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)  # Output folders keep their own link to the data
+            path.with_suffix(INFO_SUFFIX).unlink(missing_ok=True)
+            path.with_suffix(USED_SUFFIX).unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} cached, {self.misses} synthesized ({rate:.0%} hit rate)"
+
+
+def open_cache(tts_service=None, enabled: bool = True,
+               variant: Optional[Callable[[str], str]] = None) -> Optional[AudioCache]:
+    """`variant` defaults to the service's cache_variant (set by SegmentingTTSService)"""
+    if not enabled:
+        return None
+    variant = variant or getattr(tts_service, "cache_variant", None)
+    return AudioCache(CACHE_DIR, CACHE_MAX_BYTES, detect_model_version(tts_service), variant)
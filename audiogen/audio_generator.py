@@ -2,24 +2,68 @@
 """
 Audio Generator for Quiz Questions
 Generates audio files from JSON quiz questions using Kokoro TTS service.
+
+Run without arguments for the interactive menu, or non-interactively:
+    python audio_generator.py --all --workers 4
+    python audio_generator.py --files history_1 science_3 --voice af_heart
+    python audio_generator.py --all --shard 0/4 --dry-run   # this machine's quarter of the files
 """
 
 import os
 import sys
 import json
+import time
 import random
+import hashlib
+import argparse
+from functools import partial
 from pathlib import Path
 
 # Add kokoro_tts directory to path
 kokoro_path = Path(__file__).parent.parent / "kokoro_tts"
 sys.path.insert(0, str(kokoro_path))
+# Shared instrumentation lives with the other pipeline modules in quizgen
+sys.path.append(str(Path(__file__).parent.parent / "quizgen"))
 
 from kokoro_tts_service import KokoroTTSService
+from tts_pool import TTSJob, TTSResult, TTSWorkerPool, ProgressReporter
+from tts_batch import BatchedSynthesizer, adaptive_batch_size
+from audio_cache import open_cache, detect_model_version
+from encode_pipeline import EncoderPipeline, pcm_per_question, supports_pcm
+from audio_manifest import describe_file, probe_clip, write_manifest, read_manifest, is_folder_complete
+from folder_lease import FolderLease
+from phoneme_cache import open_frontend, supports_phonemes, KokoroPhonemeService
+from segmenter import SegmentingTTSService, needs_split, segment_variant
+from instrumentation import counter, histogram, RATIO_BUCKETS, configure as configure_metrics, event as trace_event
 
 # Configuration
 JSONS_DIR = Path(__file__).parent / "jsons "
 OUTPUT_DIR = Path(__file__).parent / "output audios"
 SPEED = 1.0
+TTS_WORKERS = int(os.getenv("AUDIOGEN_WORKERS", "1"))  # >1 runs batch mode on a process pool
+TTS_THREADS_PER_WORKER = int(os.getenv("AUDIOGEN_THREADS_PER_WORKER", "1"))  # torch/BLAS threads per worker
+TTS_BATCH_SIZE = os.getenv("AUDIOGEN_BATCH_SIZE", "1")  # Questions per inference call: 1 (off), N or "auto" (RAM-based)
+USE_AUDIO_CACHE = os.getenv("AUDIOGEN_CACHE", "1") == "1"  # Reuse clips for unchanged (text, voice, speed, model)
+VOICE_SEED = os.getenv("AUDIOGEN_VOICE_SEED", "0")  # Voices are picked per file name, stable across runs
+VOICE_OVERRIDE = None  # Set by --voice: one voice for every file
+ENCODER_WORKERS = int(os.getenv("AUDIOGEN_ENCODERS", "2"))  # MP3 encoder threads overlapping synthesis (0 = inline)
+USE_PHONEME_CACHE = os.getenv("AUDIOGEN_PHONEME_CACHE", "1") == "1"  # Reuse G2P results across runs and voices
+ENCODE_QUEUE_DEPTH = int(os.getenv("AUDIOGEN_ENCODE_QUEUE", "8"))  # PCM buffers queued before synthesis blocks
+SEGMENT_MAX_CHARS = int(os.getenv("AUDIOGEN_SEGMENT_CHARS", "200"))  # Longer questions are split (0 = off; no current one is)
+SEGMENT_PAUSE_MS = float(os.getenv("AUDIOGEN_SEGMENT_PAUSE_MS", "220"))  # Pause after a sentence in a stitched clip
+SEGMENT_CLAUSE_PAUSE_MS = float(os.getenv("AUDIOGEN_SEGMENT_CLAUSE_PAUSE_MS", "90"))  # ...and after a clause
+SEGMENT_CROSSFADE_MS = float(os.getenv("AUDIOGEN_SEGMENT_CROSSFADE_MS", "15"))  # Fade at each seam
+
+# Metrics - written out only when a metrics directory is configured (see quizgen/instrumentation.py)
+CLIPS = counter("audiogen_clips", "Question clips by voice and result (cached = linked from the audio cache)")
+AUDIO_SECONDS = counter("audiogen_audio_seconds", "Seconds of speech synthesized, by voice")
+CLIP_SECONDS = histogram("audiogen_clip_seconds", "Synthesis + encode time per clip, by voice")
+REAL_TIME_FACTOR = histogram("audiogen_real_time_factor", "Synthesis seconds per second of speech, by voice",
+                             buckets=RATIO_BUCKETS)
+ENCODE_SECONDS = histogram("audiogen_encode_seconds", "MP3 encode time per clip")
+ENCODER_BACKPRESSURE = counter("audiogen_encoder_backpressure_seconds",
+                               "Synthesis time spent blocked on a full encode queue")
+FILE_SECONDS = histogram("audiogen_file_seconds", "Wall time per quiz JSON")
 
 # Best quality voices from Kokoro TTS
 BEST_VOICES = [
@@ -41,6 +85,76 @@ def get_all_json_files():
     return json_files
 
 
+def parse_shard(value):
+    """Parse an "I/N" shard spec (0-based I) into (index, count)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like I/N, got '{value}'")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}, got '{value}'")
+    return index, count
+
+
+def shard_of(json_name, count):
+    """Stable shard for a file name - the same on every machine and Python version."""
+    return int(hashlib.sha1(json_name.encode("utf-8")).hexdigest(), 16) % count
+
+
+def select_json_files(names=None, shard=None):
+    """
+    Pick the JSON files for this run.
+    
+    Args:
+        names: Optional file names or stems to restrict to (default: every file)
+        shard: Optional (index, count); keeps only files hashed into that shard
+    
+    Returns:
+        list: Paths of the selected JSON files
+    """
+    json_files = get_all_json_files()
+    if names:
+        wanted = {Path(name).stem for name in names}
+        missing = wanted - {path.stem for path in json_files}
+        for name in sorted(missing):
+            print(f"⚠️  No JSON file named {name} in {JSONS_DIR.name}")
+        json_files = [path for path in json_files if path.stem in wanted]
+    if shard:
+        index, count = shard
+        json_files = [path for path in json_files if shard_of(path.name, count) == index]
+    return json_files
+
+
+def source_hash(json_path):
+    """Content hash of a quiz JSON, recorded in its manifest to spot edits."""
+    return describe_file(json_path)['sha256']
+
+
+def folder_is_current(json_path, voice):
+    """True if the output folder's manifest is complete and matches this JSON and voice."""
+    folder = OUTPUT_DIR / json_path.stem
+    manifest = read_manifest(folder)
+    return bool(manifest and manifest.get('source') == source_hash(json_path)
+                and manifest.get('voice') == voice and is_folder_complete(folder))
+
+
+def claim_json(json_path, force=False):
+    """
+    Lease the output folder of a JSON file for this process.
+    
+    Returns:
+        FolderLease: Held lease, or None if the folder is up to date or another node holds it
+    """
+    if not force and folder_is_current(json_path, select_voice_for_json(json_path.stem)):
+        print(f"⏭️  {json_path.name}: audio already complete")
+        return None
+    lease = FolderLease(OUTPUT_DIR / json_path.stem)
+    if not lease.acquire():
+        print(f"⏭️  {json_path.name}: being generated by {lease.holder() or 'another node'}")
+        return None
+    return lease
+
+
 def load_json_file(json_path):
     """Load and parse a JSON file."""
     try:
@@ -52,9 +166,11 @@ def load_json_file(json_path):
         return None
 
 
-def select_voice_for_json():
-    """Randomly select a voice from the best voices list."""
-    return random.choice(BEST_VOICES)
+def select_voice_for_json(json_name=""):
+    """Pick a voice from the best voices list, seeded by the file name so reruns keep it."""
+    if VOICE_OVERRIDE:
+        return VOICE_OVERRIDE
+    return random.Random(f"{VOICE_SEED}:{json_name}").choice(BEST_VOICES)
 
 
 def generate_audio_for_question(tts_service, question_text, voice, output_path):
@@ -71,6 +187,8 @@ def generate_audio_for_question(tts_service, question_text, voice, output_path):
         bool: True if successful, False otherwise
     """
     try:
+        # The output may be a hardlink into the audio cache - never write through it
+        Path(output_path).unlink(missing_ok=True)
         success = tts_service.synthesize_speech_to_file(
             text=question_text,
             voice_name=voice,
@@ -83,17 +201,166 @@ def generate_audio_for_question(tts_service, question_text, voice, output_path):
         return False
 
 
-def process_single_json(json_path, tts_service):
+def segment_settings():
+    """SegmentingTTSService keyword arguments from the AUDIOGEN_SEGMENT_* settings"""
+    return {"max_chars": SEGMENT_MAX_CHARS, "pause_ms": SEGMENT_PAUSE_MS,
+            "clause_pause_ms": SEGMENT_CLAUSE_PAUSE_MS, "crossfade_ms": SEGMENT_CROSSFADE_MS}
+
+
+def build_tts_service(settings=None, phonemes=None):
+    """The TTS service every entry point synthesizes with: KokoroTTSService, given
+    synthesize_phonemes (KokoroPhonemeService) when the phoneme cache is on and wrapped in
+    SegmentingTTSService when segmenting is on, so a question gets the same clip (and audio
+    cache key) whichever path runs it. `settings` and `phonemes` default to segment_settings()
+    and USE_PHONEME_CACHE; worker processes get them bound in with functools.partial."""
+    settings = segment_settings() if settings is None else settings
+    phonemes = USE_PHONEME_CACHE if phonemes is None else phonemes
+    service = KokoroTTSService()
+    if phonemes and not supports_phonemes(service):
+        service = KokoroPhonemeService(service)
+    if settings["max_chars"]:
+        service = SegmentingTTSService(service, **settings)
+    return service
+
+
+def record_results(results):
+    """Per-clip metrics and trace spans for finished TTSResults (from any process)"""
+    for result in results:
+        job = result.job
+        CLIPS.inc(voice=job.voice, result="ok" if result.success else "failed")
+        CLIP_SECONDS.observe(result.seconds, voice=job.voice)
+        if result.encode_seconds:
+            ENCODE_SECONDS.observe(result.encode_seconds)
+        duration = (result.clip or {}).get("duration")
+        if result.success and duration:
+            AUDIO_SECONDS.inc(duration, voice=job.voice)
+            REAL_TIME_FACTOR.observe((result.seconds - result.encode_seconds) / duration, voice=job.voice)
+        trace_event("audio.clip", result.finished - result.seconds, result.seconds, file=job.json_name,
+                    question=job.question_id, voice=job.voice, success=result.success)
+
+
+def resolve_batch_size(setting=TTS_BATCH_SIZE):
+    """Turn the AUDIOGEN_BATCH_SIZE setting into a batch size (1 = one call per question)."""
+    if str(setting).lower() == "auto":
+        return adaptive_batch_size()
+    return max(1, int(setting))
+
+
+def build_jobs(data, json_name, voice, output_folder):
+    """
+    Build one TTSJob per non-empty question of a loaded JSON.
+    
+    Returns:
+        tuple: (jobs, number of empty questions skipped)
+    """
+    jobs = []
+    skipped = 0
+    for item in data['quiz']:
+        question_id = item.get('question_id', 0)
+        question_text = item.get('question', '')
+        if not question_text:
+            print(f"⚠️  Skipping empty question {question_id} in {json_name}")
+            skipped += 1
+            continue
+        # Output filename: question_1.mp3, question_2.mp3, etc.
+        output_path = output_folder / f"question_{question_id}.mp3"
+        jobs.append(TTSJob(json_name, question_id, question_text, voice, str(output_path), SPEED))
+    return jobs, skipped
+
+
+def expected_clip_names(data):
+    """Clip file names a complete output folder holds, one per question (empty ones included)."""
+    return [f"question_{item.get('question_id', 0)}.mp3" for item in data['quiz']]
+
+
+def write_folder_manifest(output_folder, expected, done, voice, model_version, source=None):
+    """
+    Write manifest.json for an output folder.
+    
+    Args:
+        output_folder: Folder holding the question clips
+        expected: Clip names the folder should contain
+        done: Dict of question_id -> clip description (None if no PCM was in memory) for
+              every question whose clip is in place after this run
+        voice: Voice used for the folder
+        model_version: TTS model version the clips were synthesized with
+        source: Content hash of the quiz JSON the clips were generated from
+    """
+    clips = {}
+    for question_id, clip in done.items():
+        path = Path(output_folder) / f"question_{question_id}.mp3"
+        if not path.exists():
+            continue
+        entry = {"question_id": question_id, **(clip or probe_clip(path))}
+        entry.update(describe_file(path))
+        clips[path.name] = entry
+    manifest = write_manifest(output_folder, clips, expected,
+                              voice=voice, speed=SPEED, model_version=model_version, source=source)
+    status = "complete" if manifest['complete'] else f"{len(clips)}/{len(expected)} clips"
+    print(f"🧾 Manifest: {status}, {manifest['total_duration']:.1f}s of audio")
+    return manifest
+
+
+def process_questions_pipelined(jobs, tts_service, batch_size, cache=None, lease=None):
+    """
+    Synthesize jobs of one JSON, batched and/or with encoding overlapped on encoder threads.
+    Stops starting new questions (or batches) once `lease` is lost.
+    
+    Returns:
+        list: TTSResult per job, or None if the service supports neither
+    """
+    batched = batch_size > 1 and BatchedSynthesizer.supports(tts_service)
+    pipelined = ENCODER_WORKERS > 0 and (batched or supports_pcm(tts_service))
+    if not batched and not pipelined:
+        return None
+    
+    how = f"in batches of {batch_size}" if batched else "one call per question"
+    if pipelined:
+        how += f", {ENCODER_WORKERS} encoder threads"
+    print(f"🔄 Generating audio for {len(jobs)} questions ({how})... ", end='', flush=True)
+    
+    keep_going = (lambda: lease.held) if lease else None
+    if pipelined:
+        if batched:
+            producer = BatchedSynthesizer(tts_service, batch_size).iter_pcm(jobs, keep_going)
+        else:
+            producer = pcm_per_question(tts_service, (job for job in jobs if not lease or lease.held))
+        pipeline = EncoderPipeline(ENCODER_WORKERS, ENCODE_QUEUE_DEPTH)
+        results = pipeline.run(producer)
+    else:
+        results = BatchedSynthesizer(tts_service, batch_size).synthesize(jobs, keep_going)
+    record_results(results)
+    successful = sum(r.success for r in results)
+    if cache:
+        for result in results:
+            if result.success:
+                cache.add(result.job, result.clip)
+    if successful == len(jobs):
+        print(f"✅ Done")
+    else:
+        print(f"❌ {len(jobs) - successful} failed" + (" or not started" if len(results) < len(jobs) else ""))
+    if pipelined:
+        ENCODER_BACKPRESSURE.inc(pipeline.timings.backpressure)
+        print(pipeline.timings.summary())
+    return results
+
+
+def process_single_json(json_path, tts_service, cache=None, frontend=None, lease=None):
     """
     Process a single JSON file and generate audio for all questions.
     
     Args:
         json_path: Path to the JSON file
         tts_service: Kokoro TTS service instance
+        cache: Optional AudioCache; unchanged questions are linked from it, not synthesized
+        frontend: Optional PhonemeFrontend; cached phonemes skip the service's own G2P
+        lease: Optional FolderLease on the output folder; checked between questions, and the
+               file is abandoned (no manifest written) once another node has taken it over
     
     Returns:
         bool: True if successful, False otherwise
     """
+    file_start = time.time()
     # Load JSON data
     data = load_json_file(json_path)
     if not data or 'quiz' not in data:
@@ -106,7 +373,7 @@ def process_single_json(json_path, tts_service):
     output_folder.mkdir(parents=True, exist_ok=True)
     
     # Select a voice for this entire JSON
-    voice = select_voice_for_json()
+    voice = select_voice_for_json(json_name)
     
     print(f"\n{'='*80}")
     print(f"📁 Processing: {json_path.name}")
@@ -115,48 +382,90 @@ def process_single_json(json_path, tts_service):
     print(f"💾 Output folder: {output_folder.name}")
     print(f"{'='*80}")
     
-    # Process each question
+    jobs, failed = build_jobs(data, json_path.name, voice, output_folder)
     successful = 0
-    failed = 0
+    done = {}  # question_id -> clip description, for the folder manifest
     
-    for item in data['quiz']:
-        question_id = item.get('question_id', 0)
-        question_text = item.get('question', '')
-        
-        if not question_text:
-            print(f"⚠️  Skipping empty question {question_id}")
-            failed += 1
-            continue
-        
-        # Create output filename: question_1.mp3, question_2.mp3, etc.
-        output_filename = f"question_{question_id}.mp3"
-        output_path = output_folder / output_filename
-        
-        print(f"🔄 Generating audio for question {question_id}... ", end='', flush=True)
+    # Questions whose text, voice and speed are unchanged are linked from the cache
+    if cache:
+        remaining, cached = cache.split(jobs)
+        successful += cached
+        if cached:
+            print(f"♻️  {cached} questions reused from the audio cache")
+            CLIPS.inc(cached, voice=voice, result="cached")
+            pending = {id(job) for job in remaining}
+            done.update((job.question_id, cache.clip_info(job)) for job in jobs if id(job) not in pending)
+        jobs = remaining
+    
+    if frontend and jobs and supports_phonemes(tts_service):
+        frontend.prepare(jobs, skip=getattr(tts_service, "splits", None))
+    
+    # All questions share a voice and speed, so they can be batched into shared inference calls,
+    # and MP3 encoding can overlap the next inference
+    batch_size = resolve_batch_size()
+    results = process_questions_pipelined(jobs, tts_service, batch_size, cache, lease) if jobs else None
+    if results is not None:
+        for result in results:
+            if result.success:
+                successful += 1
+                done[result.job.question_id] = result.clip
+            else:
+                failed += 1
+        jobs = []
+    elif jobs and batch_size > 1:
+        print("ℹ️  TTS service has no synthesize_batch - using one call per question")
+    
+    # Process each remaining question
+    for job in jobs:
+        if lease and not lease.held:
+            break
+        print(f"🔄 Generating audio for question {job.question_id}... ", end='', flush=True)
         
-        success = generate_audio_for_question(tts_service, question_text, voice, output_path)
+        start = time.time()
+        success = generate_audio_for_question(tts_service, job.text, voice, job.output_path)
+        record_results([TTSResult(job, success, time.time() - start)])
         
         if success:
             print(f"✅ Done")
             successful += 1
+            done[job.question_id] = None
+            if cache:
+                cache.add(job)
         else:
             print(f"❌ Failed")
             failed += 1
     
+    if lease and not lease.held:
+        print(f"⚠️  Lost the lease on {output_folder.name} to {lease.holder() or 'another node'} - abandoning it")
+        return False
+    
+    model_version = cache.model_version if cache else detect_model_version(tts_service)
+    write_folder_manifest(output_folder, expected_clip_names(data), done, voice, model_version,
+                          source_hash(json_path))
+    
+    elapsed = time.time() - file_start
+    FILE_SECONDS.observe(elapsed)
+    trace_event("audio.file", file_start, elapsed, file=json_path.name, voice=voice,
+                successful=successful, failed=failed)
     print(f"\n📈 Results: {successful} successful, {failed} failed")
     print(f"✅ Completed: {json_path.name}\n")
     
     return True
 
 
-def process_all_jsons(tts_service):
+def process_all_jsons(tts_service, cache=None, json_files=None, force=False, frontend=None):
     """
     Process all JSON files in batch mode.
     
     Args:
         tts_service: Kokoro TTS service instance
+        cache: Optional AudioCache shared by every file
+        json_files: Files to process (default: every JSON file)
+        force: Regenerate folders whose audio is already complete
+        frontend: Optional PhonemeFrontend shared by every file
     """
-    json_files = get_all_json_files()
+    if json_files is None:
+        json_files = get_all_json_files()
     
     if not json_files:
         print("❌ No JSON files found in the jsons directory!")
@@ -173,11 +482,18 @@ def process_all_jsons(tts_service):
     # Process each JSON file
     total_processed = 0
     total_failed = 0
+    total_skipped = 0
     
     for i, json_path in enumerate(json_files, 1):
         print(f"\n[{i}/{len(json_files)}] Processing: {json_path.name}")
         
-        success = process_single_json(json_path, tts_service)
+        # Skip folders that are complete or being generated by another node
+        lease = claim_json(json_path, force)
+        if lease is None:
+            total_skipped += 1
+            continue
+        with lease:
+            success = process_single_json(json_path, tts_service, cache, frontend, lease)
         
         if success:
             total_processed += 1
@@ -188,16 +504,162 @@ def process_all_jsons(tts_service):
     print(f"🎉 BATCH PROCESSING COMPLETE!")
     print(f"{'='*80}")
     print(f"✅ Successfully processed: {total_processed}/{len(json_files)}")
+    print(f"⏭️  Skipped: {total_skipped}/{len(json_files)}")
     print(f"❌ Failed: {total_failed}/{len(json_files)}")
+    if cache:
+        print(f"♻️  Audio cache: {cache.stats()}")
+    if frontend:
+        print(f"🔤 Phoneme cache: {frontend.cache.stats()}")
     print(f"{'='*80}\n")
 
 
-def process_random_json(tts_service):
+def collect_jobs_for_json(json_path):
+    """
+    Build the synthesis jobs for one JSON file, all sharing the file's voice.
+    
+    Args:
+        json_path: Path to the JSON file
+    
+    Returns:
+        tuple: (TTSJob per non-empty question, expected clip names), or None if the JSON is invalid
+    """
+    data = load_json_file(json_path)
+    if not data or 'quiz' not in data:
+        print(f"❌ Invalid JSON structure in {json_path.name}")
+        return None
+    
+    output_folder = OUTPUT_DIR / json_path.stem
+    output_folder.mkdir(parents=True, exist_ok=True)
+    jobs, _ = build_jobs(data, json_path.name, select_voice_for_json(json_path.stem), output_folder)
+    return jobs, expected_clip_names(data)
+
+
+def process_all_jsons_parallel(workers=TTS_WORKERS, threads_per_worker=TTS_THREADS_PER_WORKER, cache=None,
+                               json_files=None, force=False, frontend=None):
+    """
+    Process all JSON files on a pool of worker processes, each with its own Kokoro model.
+    
+    Args:
+        workers: Number of worker processes
+        threads_per_worker: Intra-op thread cap for each worker
+        cache: Optional AudioCache; hits are linked before any job reaches the pool
+        json_files: Files to process (default: every JSON file)
+        force: Regenerate folders whose audio is already complete
+        frontend: Optional PhonemeFrontend; phonemes are looked up (and missing ones computed
+                  in parallel) before the pool starts, so workers skip G2P
+    """
+    if json_files is None:
+        json_files = get_all_json_files()
+    
+    if not json_files:
+        print("❌ No JSON files found in the jsons directory!")
+        return
+    
+    # Lease every folder up front; the heartbeats keep them while the pool runs
+    leases = []
+    for json_path in json_files:
+        lease = claim_json(json_path, force)
+        if lease is not None:
+            leases.append((json_path, lease))
+    try:
+        _run_parallel(dict(leases), len(json_files) - len(leases), workers, threads_per_worker, cache, frontend)
+    finally:
+        for _, lease in leases:
+            lease.release()
+
+
+def _run_parallel(leases, skipped, workers, threads_per_worker, cache, frontend):
+    """Synthesize the leased files (json_path -> FolderLease) on the worker pool"""
+    json_files = list(leases)
+    held = {json_path.name: lease for json_path, lease in leases.items()}
+    if not json_files:
+        print(f"✅ Nothing to do ({skipped} files skipped)")
+        return
+    
+    jobs = []
+    expected = {}  # JSON name -> clip names its folder should hold
+    sources = {}  # JSON name -> content hash
+    invalid = 0
+    for json_path in json_files:
+        sources[json_path.name] = source_hash(json_path)
+        collected = collect_jobs_for_json(json_path)
+        if collected is None:
+            invalid += 1
+        else:
+            jobs.extend(collected[0])
+            expected[json_path.name] = collected[1]
+    all_jobs = jobs
+    done = {}  # JSON name -> {question_id: clip description}
+    cached = 0
+    if cache:
+        jobs, cached = cache.split(jobs)
+        pending = {id(job) for job in jobs}
+        for job in all_jobs:
+            if id(job) not in pending:
+                done.setdefault(job.json_name, {})[job.question_id] = cache.clip_info(job)
+                CLIPS.inc(voice=job.voice, result="cached")
+    if frontend and jobs:  # Workers' services take phonemes whenever the frontend is on (build_tts_service)
+        frontend.prepare(jobs, skip=partial(needs_split, max_chars=SEGMENT_MAX_CHARS) if SEGMENT_MAX_CHARS else None)
+    
+    print(f"\n{'='*80}")
+    print(f"🚀 PARALLEL BATCH PROCESSING MODE")
+    print(f"{'='*80}")
+    print(f"📊 Total JSON files: {len(json_files)} ({len(jobs)} questions to synthesize, {cached} cached, "
+          f"{skipped} files skipped)")
+    print(f"👷 Workers: {workers} × {threads_per_worker} thread(s)")
+    print(f"⚡ Speed: {SPEED}")
+    print(f"{'='*80}\n")
+    
+    factory = partial(build_tts_service, segment_settings(), frontend is not None)
+    pool = TTSWorkerPool(factory, workers, threads_per_worker)
+    progress = ProgressReporter(len(jobs))
+    # A folder whose lease is lost gets no further questions, and no manifest
+    results = pool.run(jobs, progress, keep=lambda job: held[job.json_name].held)
+    record_results(results)
+    for result in results:
+        if result.success:
+            done.setdefault(result.job.json_name, {})[result.job.question_id] = result.clip
+            if cache:
+                cache.add(result.job, result.clip)
+    
+    model_version = cache.model_version if cache else detect_model_version()
+    lost = {json_name for json_name, lease in held.items() if not lease.held}
+    for json_name in sorted(lost):
+        print(f"⚠️  Lost the lease on {Path(json_name).stem} to {held[json_name].holder() or 'another node'} "
+              f"- abandoning it")
+    for json_name, names in expected.items():
+        if json_name in lost:
+            continue
+        stem = Path(json_name).stem
+        write_folder_manifest(OUTPUT_DIR / stem, names, done.get(json_name, {}),
+                              select_voice_for_json(stem), model_version, sources[json_name])
+    
+    failed_files = {r.job.json_name for r in results if not r.success} | lost
+    succeeded = len(json_files) - invalid - len(failed_files)
+    busy = sum(r.seconds for r in results)
+    elapsed = time.time() - progress.start
+    
+    print(f"\n{'='*80}")
+    print(f"🎉 BATCH PROCESSING COMPLETE!")
+    print(f"{'='*80}")
+    print(f"✅ Files fully processed: {succeeded}/{len(json_files)}")
+    print(f"❌ Files with failures: {len(failed_files) + invalid}/{len(json_files)}")
+    print(f"⏱️  {elapsed:.1f}s wall clock, {busy:.1f}s of synthesis ({busy / elapsed if elapsed else 0:.1f}x parallel)")
+    if cache:
+        print(f"♻️  Audio cache: {cache.stats()}")
+    if frontend:
+        print(f"🔤 Phoneme cache: {frontend.cache.stats()}")
+    print(f"{'='*80}\n")
+
+
+def process_random_json(tts_service, cache=None, frontend=None):
     """
     Process a randomly selected JSON file.
     
     Args:
         tts_service: Kokoro TTS service instance
+        cache: Optional AudioCache
+        frontend: Optional PhonemeFrontend
     """
     json_files = get_all_json_files()
     
@@ -216,11 +678,92 @@ def process_random_json(tts_service):
     print(f"{'='*80}")
     
     # Process the selected JSON
-    process_single_json(selected_json, tts_service)
+    lease = claim_json(selected_json, force=True)
+    if lease is not None:
+        with lease:
+            process_single_json(selected_json, tts_service, cache, frontend, lease)
+
+
+def print_plan(json_files, force=False):
+    """Dry run: show what each selected file would do, without loading the TTS model."""
+    print(f"\n📋 {len(json_files)} JSON files selected")
+    pending = 0
+    for json_path in json_files:
+        voice = select_voice_for_json(json_path.stem)
+        holder = FolderLease(OUTPUT_DIR / json_path.stem).holder()
+        if not force and folder_is_current(json_path, voice):
+            status = "complete"
+        elif holder:
+            status = f"leased by {holder}"
+        else:
+            data = load_json_file(json_path)
+            count = len(data['quiz']) if data and 'quiz' in data else 0
+            status = f"would generate {count} questions"
+            pending += 1
+        print(f"  {json_path.name:<50} {voice:<12} {status}")
+    print(f"\n{pending} files would be generated")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate question audio for the quiz JSON files')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--all', action='store_true', help='Process every JSON file (batch mode)')
+    target.add_argument('--files', nargs='+', metavar='NAME', help='Process these JSON files (name or stem)')
+    target.add_argument('--random', action='store_true', help='Process one randomly selected JSON file')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help='Only files hashed into shard I of N (0-based), for splitting work across machines')
+    parser.add_argument('--workers', type=int, default=TTS_WORKERS,
+                        help='TTS worker processes, each with its own model (default: AUDIOGEN_WORKERS)')
+    parser.add_argument('--voice', choices=BEST_VOICES, help='Use this voice for every file')
+    parser.add_argument('--seed', default=VOICE_SEED, help='Seed for the per-file voice choice')
+    parser.add_argument('--force', action='store_true', help='Regenerate folders whose audio is already complete')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be generated and exit')
+    parser.add_argument('--segment-chars', type=int, default=SEGMENT_MAX_CHARS,
+                        help='Split questions longer than this at sentence/clause boundaries and stitch (0 = off; '
+                             'the default is above every current question - use ~80 to split multi-clue ones)')
+    parser.add_argument('--segment-pause-ms', type=float, default=SEGMENT_PAUSE_MS,
+                        help='Pause after each sentence in a stitched clip')
+    parser.add_argument('--crossfade-ms', type=float, default=SEGMENT_CROSSFADE_MS,
+                        help='Crossfade at each seam of a stitched clip')
+    parser.add_argument('--metrics-dir', default=None,
+                        help='Write audiogen.prom and audiogen.trace.jsonl here (default: $METRICS_DIR, off if unset)')
+    args = parser.parse_args(argv)
+    if args.shard and not (args.files or args.random):
+        args.all = True
+    return args
+
+
+def prompt_choice():
+    """Interactive menu used when no target is given on the command line."""
+    print("Select an option:")
+    print("  1. Process a randomly selected JSON file")
+    print("  2. Process all JSON files (batch mode)")
+    print()
+    
+    # Get user input
+    try:
+        choice = input("Enter your choice (1 or 2): ").strip()
+    except KeyboardInterrupt:
+        print("\n\n👋 Exiting...")
+        return None
+    
+    if choice not in ['1', '2']:
+        print("❌ Invalid choice! Please enter 1 or 2.")
+        return None
+    return choice
 
 
-def main():
+def main(argv=None):
     """Main function to run the audio generator."""
+    global VOICE_SEED, VOICE_OVERRIDE, SEGMENT_MAX_CHARS, SEGMENT_PAUSE_MS, SEGMENT_CROSSFADE_MS
+    args = parse_args(argv)
+    VOICE_SEED = str(args.seed)
+    VOICE_OVERRIDE = args.voice
+    SEGMENT_MAX_CHARS = args.segment_chars
+    SEGMENT_PAUSE_MS = args.segment_pause_ms
+    SEGMENT_CROSSFADE_MS = args.crossfade_ms
+    configure_metrics("audiogen", args.metrics_dir)
+    
     print("\n" + "="*80)
     print(" 🎙️  QUIZ AUDIO GENERATOR ")
     print("="*80)
@@ -236,41 +779,62 @@ def main():
     # Create output directory if it doesn't exist
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Display options
-    print("Select an option:")
-    print("  1. Process a randomly selected JSON file")
-    print("  2. Process all JSON files (batch mode)")
-    print()
+    # Without a target on the command line, ask
+    if args.files or args.all:
+        choice = '2'
+    elif args.random:
+        choice = '1'
+    else:
+        choice = prompt_choice()
+        if choice is None:
+            return
+    json_files = select_json_files(args.files, args.shard) if choice == '2' else None
     
-    # Get user input
-    try:
-        choice = input("Enter your choice (1 or 2): ").strip()
-    except KeyboardInterrupt:
-        print("\n\n👋 Exiting...")
+    if args.dry_run:
+        print_plan(json_files if json_files is not None else get_all_json_files(), args.force)
         return
     
-    if choice not in ['1', '2']:
-        print("❌ Invalid choice! Please enter 1 or 2.")
+    # Parallel batch mode loads one model per worker process instead
+    if choice == '2' and args.workers > 1:
+        variant = partial(segment_variant, **segment_settings()) if SEGMENT_MAX_CHARS else None
+        cache = open_cache(enabled=USE_AUDIO_CACHE, variant=variant)
+        frontend = open_frontend(enabled=USE_PHONEME_CACHE)
+        process_all_jsons_parallel(args.workers, cache=cache, json_files=json_files, force=args.force,
+                                   frontend=frontend)
+        if cache:
+            cache.evict()
+        if frontend:
+            frontend.cache.close()
+        print("\n✨ All done! Have a great day! ✨\n")
         return
     
     # Initialize Kokoro TTS service
     print("\n🔧 Initializing Kokoro TTS service...")
     try:
-        tts_service = KokoroTTSService()
+        tts_service = build_tts_service()
         print("✅ Kokoro TTS service initialized successfully!\n")
     except Exception as e:
         print(f"❌ Failed to initialize Kokoro TTS service: {e}")
         return
     
+    cache = open_cache(tts_service, enabled=USE_AUDIO_CACHE)
+    frontend = open_frontend(enabled=USE_PHONEME_CACHE and supports_phonemes(tts_service))
+    
     # Process based on choice
     if choice == '1':
-        process_random_json(tts_service)
+        process_random_json(tts_service, cache, frontend)
     else:
-        process_all_jsons(tts_service)
+        process_all_jsons(tts_service, cache, json_files, args.force, frontend)
+    
+    if getattr(tts_service, "segmented", 0):
+        print(f"✂️  {tts_service.segmented} long questions synthesized as {tts_service.segments} stitched segments")
+    if cache:
+        cache.evict()
+    if frontend:
+        frontend.cache.close()
     
     print("\n✨ All done! Have a great day! ✨\n")
 
 
 if __name__ == "__main__":
     main()
-
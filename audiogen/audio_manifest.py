@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Audio Manifest
+Writes manifest.json into every output audio folder: per-clip duration, loudness,
+sample rate, byte size and content hash, computed from the PCM already in memory.
+The renderer reads it instead of probing or decoding clips, and uses it as the
+"is this folder complete" check.
+"""
+
+import os
+import json
+import time
+import wave
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+SILENCE_DBFS = -120.0  # Floor reported for digital silence
+WAV_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}  # Sample width in bytes -> PCM type
+
+
+def _dbfs(value: float) -> float:
+    return round(20 * np.log10(value), 2) if value > 0 else SILENCE_DBFS
+
+
+def describe_pcm(samples: np.ndarray, sample_rate: int) -> Dict[str, Any]:
+    """Sample-accurate duration plus peak / RMS loudness of a float waveform in [-1, 1]"""
+    samples = np.asarray(samples, dtype=np.float32)
+    count = int(samples.shape[0])
+    peak = float(np.max(np.abs(samples))) if count else 0.0
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if count else 0.0
+    return {
+        "duration": round(count / sample_rate, 6) if sample_rate else 0.0,
+        "samples": count,
+        "sample_rate": int(sample_rate),
+        "peak_dbfs": _dbfs(peak),
+        "rms_dbfs": _dbfs(rms),
+    }
+
+
+def describe_file(path) -> Dict[str, Any]:
+    """Byte size and SHA-256 of an encoded clip"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return {"bytes": os.path.getsize(path), "sha256": digest.hexdigest()}
+
+
+def _probe_wav(path) -> Dict[str, Any]:
+    """Describe a PCM WAV clip with the standard library; {} if it isn't one"""
+    try:
+        with wave.open(str(path), "rb") as f:
+            width, channels, rate = f.getsampwidth(), f.getnchannels(), f.getframerate()
+            frames = f.readframes(f.getnframes())
+    except (OSError, EOFError, wave.Error):
+        return {}
+    if width not in WAV_DTYPES:
+        return {}
+    samples = np.frombuffer(frames, dtype=WAV_DTYPES[width]).astype(np.float32)
+    if width == 1:
+        samples -= 128.0  # 8-bit WAV is unsigned
+    samples = samples.reshape(-1, channels).mean(axis=1) / float(1 << (8 * width - 1))
+    return describe_pcm(samples, rate)
+
+
+def probe_clip(path) -> Dict[str, Any]:
+    """Decode a clip to describe it - only for clips written without PCM in memory. Without
+    pydub only WAV clips can be read; for anything else the entry has no duration, and the
+    renderer reports its duration check as skipped rather than trusting 0 seconds."""
+    try:
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(path).set_channels(1)
+    except Exception:
+        return _probe_wav(path)
+    full_scale = float(1 << (8 * segment.sample_width - 1))
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / full_scale
+    return describe_pcm(samples, segment.frame_rate)
+
+
+def read_manifest(folder) -> Optional[Dict[str, Any]]:
+    try:
+        with open(Path(folder) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(folder, clips: Dict[str, Dict[str, Any]], expected: List[str],
+                   **info: Any) -> Dict[str, Any]:
+    """Write the folder's manifest; `complete` is true only if every expected clip is present"""
+    folder = Path(folder)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        **info,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "complete": all(name in clips for name in expected),
+        "expected": list(expected),
+        "total_duration": round(sum(clip.get("duration") or 0.0 for clip in clips.values()), 3),
+        # Clips whose duration couldn't be measured (not counted in total_duration)
+        "unmeasured": [name for name in sorted(clips, key=_clip_order) if clips[name].get("duration") is None],
+        "clips": {name: clips[name] for name in sorted(clips, key=_clip_order)},
+    }
+    tmp_path = folder / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, folder / MANIFEST_NAME)
+    return manifest
+
+
+def is_folder_complete(folder, expected: Optional[List[str]] = None) -> bool:
+    """
+    Fast validity check without decoding: every expected clip (default: the manifest's own
+    list, which must be complete) is in the manifest and its size on disk still matches.
+    """
+    folder = Path(folder)
+    manifest = read_manifest(folder)
+    if not manifest or (expected is None and not manifest.get("complete")):
+        return False
+    clips = manifest.get("clips", {})
+    for name in manifest.get("expected", []) if expected is None else expected:
+        clip = clips.get(name)
+        try:
+            if clip is None or os.path.getsize(folder / name) != clip.get("bytes"):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _clip_order(name: str):
+    stem = Path(name).stem
+    suffix = stem.rsplit("_", 1)[-1]
+    return (0, int(suffix)) if suffix.isdigit() else (1, name)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Phoneme Cache Benchmark
+Synthesis of the same questions in several voices on FakeKokoroTTSService with a per-text G2P
+cost: without the phoneme cache (the service phonemizes every question for every voice), then
+with it on a cold and a warm cache. With the cache, jobs carry phonemes and the service's
+synthesize_phonemes skips G2P; on a warm cache nothing is phonemized at all.
+"""
+
+import time
+import random
+import argparse
+import tempfile
+from functools import partial
+from pathlib import Path
+
+from encode_pipeline import pcm_per_question
+from fake_tts_service import FakeKokoroTTSService
+from phoneme_cache import PhonemeCache, PhonemeFrontend
+from tts_pool import TTSJob
+
+VOICES = ["af_heart", "af_bella", "bm_george"]
+
+
+def fake_g2p(text, lang, seconds):
+    """Stands in for Kokoro's front end: `seconds` per text, a phoneme-like string back"""
+    time.sleep(seconds)
+    return f"{lang}ˈ{text.lower()}"
+
+
+def questions(count, seed=0):
+    rng = random.Random(seed)
+    words = ["which", "country", "capital", "famous", "invented", "year", "known", "first", "river"]
+    return [" ".join(rng.choices(words, k=rng.randint(6, 16))).capitalize() + "?" for _ in range(count)]
+
+
+def run_mode(texts, voices, frontend, args):
+    service = FakeKokoroTTSService(real_time_factor=args.real_time_factor, g2p_seconds=args.g2p_seconds)
+    jobs = [TTSJob("bench.json", i, text, voice, f"question_{i}.mp3")
+            for voice in voices for i, text in enumerate(texts, 1)]
+    start = time.time()
+    if frontend:
+        frontend.prepare(jobs)
+    prepared = time.time() - start
+    failed = sum(item.error is not None for item in pcm_per_question(service, jobs))
+    return {
+        "clips": len(jobs) - failed,
+        "failed": failed,
+        "phonemized": frontend.cache.misses if frontend else 0,
+        "cache_hits": frontend.cache.hits if frontend else 0,
+        "service_g2p": service.g2p_calls,
+        "prepare": prepared,
+        "total": time.time() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synthesis with and without the phoneme cache")
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--voices", type=int, default=len(VOICES), help=f"Voices per question (max {len(VOICES)})")
+    parser.add_argument("--g2p-seconds", type=float, default=0.01, help="Fake front-end cost per text")
+    parser.add_argument("--real-time-factor", type=float, default=0.002)
+    args = parser.parse_args()
+
+    texts = questions(args.questions)
+    voices = VOICES[:max(1, args.voices)]
+    print(f"{len(texts)} questions x {len(voices)} voices ({', '.join(voices)}), G2P {args.g2p_seconds * 1000:.0f} ms/text")
+    print(f"{'mode':<16} {'clips':>6} {'failed':>7} {'phonemized':>11} {'cache hits':>11} "
+          f"{'service G2P':>12} {'prepare s':>10} {'total s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        g2p = partial(fake_g2p, seconds=args.g2p_seconds)
+        modes = [("no cache", None)]
+        for label in ("cold cache", "warm cache"):
+            modes.append((label, PhonemeFrontend(PhonemeCache(Path(tmp) / "phonemes.sqlite"), g2p=g2p, workers=1)))
+        for name, frontend in modes:
+            r = run_mode(texts, voices, frontend, args)
+            print(f"{name:<16} {r['clips']:>6} {r['failed']:>7} {r['phonemized']:>11} {r['cache_hits']:>11} "
+                  f"{r['service_g2p']:>12} {r['prepare']:>10.2f} {r['total']:>8.2f}")
+            if frontend:
+                frontend.cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Segmenter Benchmark
+Per-clip latency of long multi-clue questions synthesized whole versus split by
+SegmentingTTSService, on FakeKokoroTTSService with an input-length-dependent cost and a
+context limit. Segmented runs call a per-call service serially and on a thread pool of
+per-thread services, and a batching service in batch calls; short questions are timed too,
+to show they pass straight through.
+"""
+
+import time
+import random
+import argparse
+
+from fake_tts_service import FakeKokoroTTSService
+from segmenter import SegmentingTTSService, MAX_CHARS
+
+CLUES = [
+    "This country is home to one of the largest coral reef systems in the world, stretching along its north-eastern coast",
+    "Its capital was purpose-built as a compromise between two rival cities and opened its parliament in 1927",
+    "Its national animals, the kangaroo and the emu, appear on its coat of arms",
+    "It hosted the Summer Olympics twice, most recently at the turn of the millennium",
+    "Most of its population lives along the coast, while the interior is largely desert known as the outback",
+    "Its most famous landmark is an opera house whose roof looks like a row of white sails",
+    "It is both a country and a continent, and it drives on the left",
+]
+
+
+class PerCallService:
+    """Hides synthesize_batch so the wrapper falls back to concurrent per-segment calls"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def synthesize_speech(self, text, voice_name, speaking_rate=1.0):
+        return self.service.synthesize_speech(text=text, voice_name=voice_name, speaking_rate=speaking_rate)
+
+
+def long_questions(count, seed=0):
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        clues = rng.sample(CLUES, rng.randint(3, 5))
+        questions.append(" ".join(f"Clue {i}: {clue}." for i, clue in enumerate(clues, 1))
+                         + " Which country is it?")
+    return questions
+
+
+def short_questions(count, seed=0):
+    rng = random.Random(seed)
+    words = ["which", "country", "capital", "famous", "invented", "year", "known", "first", "river"]
+    return [" ".join(rng.choices(words, k=rng.randint(6, 16))).capitalize() + "?" for _ in range(count)]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))] if ordered else 0.0
+
+
+def time_clips(service, texts):
+    latencies, failed = [], 0
+    for text in texts:
+        start = time.time()
+        try:
+            service.synthesize_speech(text=text, voice_name="af_heart", speaking_rate=1.0)
+            latencies.append(time.time() - start)
+        except ValueError:
+            failed += 1
+    return latencies, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-clip latency of long questions with segmentation")
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS, help="Segment length limit")
+    parser.add_argument("--real-time-factor", type=float, default=0.05)
+    parser.add_argument("--attention-chars", type=float, default=300, help="Fake cost grows 1x per this many input chars")
+    parser.add_argument("--context-chars", type=int, default=500, help="Fake model input limit")
+    parser.add_argument("--workers", type=int, default=4, help="Threads (one service each) for the per-call service")
+    args = parser.parse_args()
+
+    def fake():
+        return FakeKokoroTTSService(real_time_factor=args.real_time_factor, attention_chars=args.attention_chars,
+                                    context_chars=args.context_chars)
+
+    long_texts = long_questions(args.questions)
+    lengths = sorted(len(text) for text in long_texts)
+    print(f"{len(long_texts)} long questions, {lengths[0]}-{lengths[-1]} characters "
+          f"(median {lengths[len(lengths) // 2]}), context limit {args.context_chars}")
+    modes = [
+        ("whole", lambda: fake()),
+        ("split, serial", lambda: SegmentingTTSService(PerCallService(fake()), args.max_chars)),
+        (f"split, {args.workers} threads", lambda: SegmentingTTSService(
+            PerCallService(fake()), args.max_chars, workers=args.workers,
+            service_factory=lambda: PerCallService(fake()))),
+        ("split, batched", lambda: SegmentingTTSService(fake(), args.max_chars)),
+    ]
+    print(f"{'mode':<20} {'texts':<6} {'clips':>6} {'failed':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+    for name, build in modes:
+        for label, texts in (("long", long_texts), ("short", short_questions(args.questions))):
+            latencies, failed = time_clips(build(), texts)
+            print(f"{name:<20} {label:<6} {len(latencies):>6} {failed:>7} {percentile(latencies, 50):>7.3f} "
+                  f"{percentile(latencies, 95):>7.3f} {max(latencies, default=0.0):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
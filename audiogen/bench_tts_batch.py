@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Batched TTS Benchmark
+Clips per second at several batch sizes using a deterministic stub model whose cost is a
+fixed per-call overhead plus work proportional to the padded batch length.
+"""
+
+import time
+import random
+import argparse
+
+import numpy as np
+
+from tts_pool import TTSJob
+from tts_batch import BatchedSynthesizer, adaptive_batch_size
+
+SAMPLE_RATE = 24000
+
+
+class StubBatchModel:
+    """Deterministic stand-in for a batched Kokoro model"""
+
+    def __init__(self, call_overhead=0.04, seconds_per_char=0.0004, batch_marginal_cost=0.2,
+                 samples_per_char=1200):
+        self.call_overhead = call_overhead
+        self.seconds_per_char = seconds_per_char
+        self.batch_marginal_cost = batch_marginal_cost  # Extra cost of each additional batch row
+        self.samples_per_char = samples_per_char
+        self.calls = 0
+
+    def synthesize_batch(self, texts, voice_name, speaking_rate):
+        self.calls += 1
+        padded = max(len(t) for t in texts)
+        cost = self.seconds_per_char * padded * (1 + (len(texts) - 1) * self.batch_marginal_cost)
+        time.sleep(self.call_overhead + cost / speaking_rate)
+
+        segments, boundaries, offset = [], [], 0
+        for text in texts:
+            n = int(len(text) * self.samples_per_char / speaking_rate)
+            t = np.arange(n, dtype=np.float32) / SAMPLE_RATE
+            segments.append(0.1 * np.sin(2 * np.pi * (200 + len(text)) * t))
+            boundaries.append((offset, offset + n))
+            offset += n
+        return np.concatenate(segments), SAMPLE_RATE, boundaries
+
+    def synthesize_speech_to_file(self, text, voice_name, speaking_rate, output_file):
+        self.synthesize_batch([text], voice_name, speaking_rate)
+        return True
+
+
+def make_jobs(count, seed=0):
+    rng = random.Random(seed)
+    words = ["what", "which", "capital", "country", "invented", "famous", "year", "known", "element"]
+    return [TTSJob("bench.json", i + 1, " ".join(rng.choices(words, k=rng.randint(6, 20))) + "?",
+                   "af_heart", f"question_{i + 1}.mp3") for i in range(count)]
+
+
+def discard(samples, sample_rate, output_path, *args):
+    """Benchmark writer - measures inference only"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched TTS clips/s against batch size")
+    parser.add_argument("--questions", type=int, default=90)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.questions)
+    print(f"adaptive batch size on this machine: {adaptive_batch_size()}")
+    print(f"{'batch':>6} {'calls':>6} {'seconds':>8} {'clips/s':>8} {'speedup':>8}")
+    baseline = None
+    for size in args.batch_sizes:
+        model = StubBatchModel()
+        start = time.time()
+        results = BatchedSynthesizer(model, size, writer=discard).synthesize(jobs)
+        seconds = time.time() - start
+        assert all(r.success for r in results)
+        baseline = baseline or seconds
+        print(f"{size:>6} {model.calls:>6} {seconds:>8.2f} {len(jobs) / seconds:>8.1f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
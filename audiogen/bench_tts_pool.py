@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+TTS Pool Benchmark
+Compares the serial batch path (one service, one question at a time) with TTSWorkerPool
+at several worker counts, using a fake TTS backend that sleeps or burns CPU.
+"""
+
+import time
+import random
+import argparse
+import tempfile
+from functools import partial
+from pathlib import Path
+
+from tts_pool import TTSJob, TTSWorkerPool, synthesize_job
+
+
+class FakeTTSService:
+    """Stands in for KokoroTTSService: slow to load, cost proportional to text length"""
+
+    def __init__(self, mode="cpu", seconds_per_char=0.0005, load_seconds=0.5):
+        self.mode = mode
+        self.seconds_per_char = seconds_per_char
+        time.sleep(load_seconds)  # Model load
+
+    def synthesize_speech_to_file(self, text, voice_name, speaking_rate, output_file):
+        duration = len(text) * self.seconds_per_char / speaking_rate
+        if self.mode == "sleep":
+            time.sleep(duration)
+        else:
+            deadline = time.process_time() + duration
+            x = 0
+            while time.process_time() < deadline:
+                x += 1
+        with open(output_file, "wb") as f:
+            f.write(b"\0" * len(text))
+        return True
+
+
+def make_jobs(count, output_dir, seed=0):
+    rng = random.Random(seed)
+    words = ["what", "which", "capital", "country", "invented", "famous", "year", "known", "element"]
+    jobs = []
+    for i in range(count):
+        text = " ".join(rng.choices(words, k=rng.randint(6, 20))) + "?"
+        jobs.append(TTSJob(f"bench.{i // 15 + 1}.json", i % 15 + 1, text, "af_heart",
+                           str(Path(output_dir) / f"question_{i}.mp3")))
+    return jobs
+
+
+def run_serial(factory, jobs):
+    start = time.time()
+    service = factory()
+    results = [synthesize_job(service, job) for job in jobs]
+    return time.time() - start, sum(r.success for r in results)
+
+
+def run_pool(factory, jobs, workers, threads):
+    start = time.time()
+    results = TTSWorkerPool(factory, workers, threads).run(jobs)
+    return time.time() - start, sum(r.success for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs pooled TTS with a fake backend")
+    parser.add_argument("--questions", type=int, default=120)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--mode", choices=["cpu", "sleep"], default="cpu",
+                        help="cpu = burn CPU like real inference, sleep = pure latency")
+    parser.add_argument("--seconds-per-char", type=float, default=0.0005)
+    parser.add_argument("--load-seconds", type=float, default=0.5, help="Fake model load time per instance")
+    args = parser.parse_args()
+
+    factory = partial(FakeTTSService, args.mode, args.seconds_per_char, args.load_seconds)
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_jobs(args.questions, tmp)
+        print(f"{'mode':>10} {'workers':>8} {'ok':>5} {'seconds':>8} {'q/s':>7} {'speedup':>8}")
+        serial, ok = run_serial(factory, jobs)
+        print(f"{'serial':>10} {1:>8} {ok:>5} {serial:>8.2f} {len(jobs) / serial:>7.1f} {1.0:>7.1f}x")
+        for workers in args.workers:
+            seconds, ok = run_pool(factory, jobs, workers, args.threads_per_worker)
+            print(f"{'pool':>10} {workers:>8} {ok:>5} {seconds:>8.2f} {len(jobs) / seconds:>7.1f} "
+                  f"{serial / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Synthesis -> Encoder Pipeline
+Model inference produces raw PCM buffers; a pool of encoder threads turns them into
+MP3/Opus files while the next inference runs. Buffers are handed over by reference
+through a bounded queue, so a slow encoder applies backpressure to synthesis instead of
+letting PCM pile up in memory.
+
+For per-question PCM the service must provide:
+    synthesize_speech(text, voice_name, speaking_rate) -> (samples, sample_rate)
+and may provide synthesize_phonemes(phonemes, voice_name, speaking_rate) with the same
+return value, used for jobs whose phonemes came from the phoneme cache.
+"""
+
+import os
+import time
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from tts_pool import TTSJob, TTSResult
+from audio_manifest import describe_pcm
+
+ENCODER_WORKERS = 2
+QUEUE_DEPTH = 8  # PCM buffers waiting for an encoder before synthesis blocks
+AUDIO_FORMATS = {"mp3": {"format": "mp3"}, "opus": {"format": "opus", "codec": "libopus"}}
+
+_DONE = object()
+
+
+@dataclass
+class PCMItem:
+    """One synthesized question (or the error that prevented it)"""
+    job: TTSJob
+    samples: Optional[np.ndarray]
+    sample_rate: int
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class StageTimings:
+    wall: float = 0.0
+    synthesis: float = 0.0  # Producer time spent in the model
+    backpressure: float = 0.0  # Producer time blocked on a full queue
+    encoding: float = 0.0  # Encoder busy time, summed over workers
+    encoder_idle: float = 0.0  # Encoder time waiting for PCM, summed over workers
+    encoder_workers: int = 0
+    clips: int = 0
+
+    def summary(self) -> str:
+        def share(seconds):
+            return f"{seconds / self.wall:.0%}" if self.wall else "-"
+        per_worker = self.encoding / self.encoder_workers if self.encoder_workers else 0.0
+        return (f"⏱️  {self.clips} clips in {self.wall:.1f}s | synthesis {self.synthesis:.1f}s ({share(self.synthesis)}) "
+                f"| blocked on encoders {self.backpressure:.1f}s ({share(self.backpressure)}) "
+                f"| encoding {self.encoding:.1f}s over {self.encoder_workers} workers "
+                f"({share(per_worker)} busy each)")
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int, output_path: str, audio_format: str = "mp3"):
+    """Encode a mono float waveform and atomically move it into place (pydub + ffmpeg)"""
+    from pydub import AudioSegment
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    segment = AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+    tmp_path = f"{output_path}.tmp"
+    segment.export(tmp_path, **AUDIO_FORMATS[audio_format])
+    os.replace(tmp_path, output_path)
+
+
+def supports_pcm(service) -> bool:
+    return callable(getattr(service, "synthesize_speech", None))
+
+
+def pcm_per_question(service, jobs: Iterable[TTSJob]) -> Iterator[PCMItem]:
+    """One synthesis call per question (from cached phonemes when the service takes them)"""
+    phonemes_ok = callable(getattr(service, "synthesize_phonemes", None))
+    for job in jobs:
+        start = time.time()
+        try:
+            if job.phonemes and phonemes_ok:
+                samples, sample_rate = service.synthesize_phonemes(
+                    phonemes=job.phonemes, voice_name=job.voice, speaking_rate=job.speed)
+            else:
+                samples, sample_rate = service.synthesize_speech(
+                    text=job.text, voice_name=job.voice, speaking_rate=job.speed)
+            yield PCMItem(job, samples, sample_rate, time.time() - start)
+        except Exception as e:
+            yield PCMItem(job, None, 0, time.time() - start, str(e))
+
+
+class EncoderPipeline:
+    """Runs a PCM producer in the calling thread and encodes on `encoder_workers` threads"""
+
+    def __init__(self, encoder_workers: int = ENCODER_WORKERS, queue_depth: int = QUEUE_DEPTH,
+                 audio_format: str = "mp3", encoder=encode_audio):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unknown audio format '{audio_format}' (expected {', '.join(AUDIO_FORMATS)})")
+        self.encoder_workers = max(1, encoder_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.audio_format = audio_format
+        self.encoder = encoder
+        self.timings = StageTimings(encoder_workers=self.encoder_workers)
+        self._lock = threading.Lock()
+
+    def _encode_loop(self, pending: queue.Queue, results: List[TTSResult]):
+        busy = idle = 0.0
+        while True:
+            wait_start = time.time()
+            item = pending.get()
+            idle += time.time() - wait_start
+            if item is _DONE:
+                break
+            start = time.time()
+            try:
+                self.encoder(item.samples, item.sample_rate, item.job.output_path, self.audio_format)
+                result = TTSResult(item.job, True, item.seconds + time.time() - start,
+                                   clip=describe_pcm(item.samples, item.sample_rate),
+                                   encode_seconds=time.time() - start)
+            except Exception as e:
+                result = TTSResult(item.job, False, item.seconds + time.time() - start, str(e))
+            busy += time.time() - start
+            item.samples = None  # Drop the buffer as soon as it's encoded
+            with self._lock:
+                results.append(result)
+        with self._lock:
+            self.timings.encoding += busy
+            self.timings.encoder_idle += idle
+
+    def run(self, items: Iterable[PCMItem]) -> List[TTSResult]:
+        """Consume the producer, encoding as it goes; results come back in completion order"""
+        pending: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        results: List[TTSResult] = []
+        workers = [threading.Thread(target=self._encode_loop, args=(pending, results), daemon=True)
+                   for _ in range(self.encoder_workers)]
+        start = time.time()
+        for worker in workers:
+            worker.start()
+        try:
+            for item in items:  # Synthesis happens inside the producer's next()
+                self.timings.synthesis += item.seconds
+                if item.error is not None:
+                    with self._lock:
+                        results.append(TTSResult(item.job, False, item.seconds, item.error))
+                    continue
+                put_start = time.time()
+                pending.put(item)  # Blocks while the queue is full - backpressure on synthesis
+                self.timings.backpressure += time.time() - put_start
+                self.timings.clips += 1
+        finally:
+            for _ in workers:
+                pending.put(_DONE)
+            for worker in workers:
+                worker.join()
+        self.timings.wall += time.time() - start
+        return results
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Fake Kokoro TTS Service
+Drop-in stand-in for KokoroTTSService for offline benchmarks: no model, no GPU. Each call
+costs `real_time_factor` seconds per second of speech it returns (slept, or burned on the
+CPU like real inference), speech length follows the text at `chars_per_second`, and the
+audio is a quiet tone so manifests, caches and encoders see realistic buffers.
+
+`attention_chars` makes a call's cost grow with its input length on top of the speech it
+returns (another 1x per that many characters, like attention over a longer context), and a
+text longer than `context_chars` fails the way the model's input limit does.
+
+`g2p_seconds` is the text front end's (G2P) cost per text; synthesize_phonemes takes phoneme
+strings (from the phoneme cache) and skips it, like Kokoro's generate_from_tokens.
+"""
+
+import os
+import time
+import wave
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+
+
+class FakeKokoroTTSService:
+    """Deterministic-cost fake with the KokoroTTSService interface"""
+
+    model_version = "fake-kokoro"
+
+    def __init__(self, real_time_factor: float = 0.05, chars_per_second: float = 15.0, mode: str = "sleep",
+                 load_seconds: float = 0.0, batch_marginal_cost: float = 0.2, failure_rate: float = 0.0,
+                 seed: Optional[int] = None, attention_chars: Optional[float] = None,
+                 context_chars: Optional[int] = None, g2p_seconds: float = 0.0):
+        if mode not in ("sleep", "cpu"):
+            raise ValueError(f"Unknown mode '{mode}' (expected sleep or cpu)")
+        self.real_time_factor = real_time_factor
+        self.chars_per_second = chars_per_second
+        self.mode = mode
+        self.batch_marginal_cost = batch_marginal_cost  # Extra cost of each additional batch row
+        self.failure_rate = failure_rate
+        self.attention_chars = attention_chars
+        self.context_chars = context_chars
+        self.g2p_seconds = g2p_seconds
+        self.g2p_calls = 0  # Texts run through the front end
+        self.rng = random.Random(seed)
+        self.calls = 0
+        time.sleep(load_seconds)  # Model load
+
+    def speech_seconds(self, text: str, speaking_rate: float = 1.0) -> float:
+        return max(0.2, len(text) / self.chars_per_second / speaking_rate)
+
+    def _cost(self, seconds: float, longest: int) -> float:
+        """Inference seconds for `seconds` of speech whose longest input is `longest` characters"""
+        if self.context_chars and longest > self.context_chars:
+            raise ValueError(f"Input of {longest} characters exceeds the {self.context_chars}-character context")
+        if self.attention_chars:
+            seconds *= 1 + longest / self.attention_chars
+        return seconds * self.real_time_factor
+
+    def _g2p(self, texts: int) -> float:
+        self.g2p_calls += texts
+        return self.g2p_seconds * texts
+
+    def _work(self, seconds: float):
+        self.calls += 1
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            raise RuntimeError("Injected synthesis failure")
+        if self.mode == "sleep":
+            time.sleep(seconds)
+            return
+        deadline = time.process_time() + seconds
+        while time.process_time() < deadline:
+            pass
+
+    @staticmethod
+    def _tone(seconds: float, pitch: float) -> np.ndarray:
+        t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+        return (0.1 * np.sin(2 * np.pi * pitch * t)).astype(np.float32)
+
+    def synthesize_speech(self, text: str, voice_name: str, speaking_rate: float = 1.0) -> Tuple[np.ndarray, int]:
+        seconds = self.speech_seconds(text, speaking_rate)
+        self._work(self._g2p(1) + self._cost(seconds, len(text)))
+        return self._tone(seconds, 180 + len(text) % 60), SAMPLE_RATE
+
+    def synthesize_phonemes(self, phonemes: str, voice_name: str, speaking_rate: float = 1.0) -> Tuple[np.ndarray, int]:
+        seconds = self.speech_seconds(phonemes, speaking_rate)
+        self._work(self._cost(seconds, len(phonemes)))
+        return self._tone(seconds, 180 + len(phonemes) % 60), SAMPLE_RATE
+
+    def synthesize_batch(self, texts: List[str], voice_name: str,
+                         speaking_rate: float = 1.0) -> Tuple[np.ndarray, int, List[Tuple[int, int]]]:
+        durations = [self.speech_seconds(text, speaking_rate) for text in texts]
+        # Padded batch: every row costs as much as the longest, discounted by batch_marginal_cost
+        self._work(self._g2p(len(texts))
+                   + self._cost(max(durations), max(map(len, texts))) * (1 + (len(texts) - 1) * self.batch_marginal_cost))
+        segments, boundaries, offset = [], [], 0
+        for text, seconds in zip(texts, durations):
+            segment = self._tone(seconds, 180 + len(text) % 60)
+            segments.append(segment)
+            boundaries.append((offset, offset + len(segment)))
+            offset += len(segment)
+        return np.concatenate(segments), SAMPLE_RATE, boundaries
+
+    def synthesize_speech_to_file(self, text: str, voice_name: str, speaking_rate: float = 1.0,
+                                  output_file: str = "output.wav") -> bool:
+        samples, sample_rate = self.synthesize_speech(text, voice_name, speaking_rate)
+        write_wav(samples, sample_rate, output_file)
+        return True
+
+
+def write_wav(samples: np.ndarray, sample_rate: int, output_path: str, audio_format: str = "wav"):
+    """16-bit mono WAV via the standard library - an EncoderPipeline encoder that needs no ffmpeg"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    tmp_path = f"{output_path}.tmp"
+    with wave.open(tmp_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    os.replace(tmp_path, output_path)
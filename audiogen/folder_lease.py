@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Output Folder Leases
+A lease file in each output folder marks the quiz as being synthesized by one node. Nodes
+sharing the output directory (NFS, SMB, a synced volume) skip folders leased by someone
+else. A heartbeat thread keeps the lease fresh; a node that dies stops renewing and its
+lease expires after LEASE_TTL, so another node can take the folder over.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+LEASE_NAME = ".lease"
+LEASE_TTL = 600.0  # Seconds without a heartbeat before a lease counts as abandoned
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def read_lease(folder) -> Optional[Dict[str, Any]]:
+    try:
+        with open(Path(folder) / LEASE_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FolderLease:
+    """Exclusive, expiring claim on one output folder"""
+
+    def __init__(self, folder, ttl: float = LEASE_TTL, owner: Optional[str] = None):
+        self.folder = Path(folder)
+        self.path = self.folder / LEASE_NAME
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.held = False
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _record(self) -> str:
+        now = time.time()
+        return json.dumps({"owner": self.owner, "acquired": now, "expires": now + self.ttl})
+
+    def _create(self) -> bool:
+        """Atomically create the lease file; False if it already exists"""
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self._record())
+        return True
+
+    def holder(self) -> Optional[str]:
+        """Owner of a live lease on the folder, or None if it's free or expired"""
+        lease = read_lease(self.folder)
+        if lease and lease.get("expires", 0) > time.time():
+            return lease.get("owner")
+        return None
+
+    def _break(self, lease: Optional[Dict[str, Any]]) -> bool:
+        """Remove the expired lease `lease`, compare-and-swap style; False if it changed first.
+
+        The lease is renamed to a name unique to this node before it is judged, so two nodes
+        can't both break it, and a lease renewed or retaken between our read and the rename
+        is put back instead of deleted."""
+        stale = self.path.with_name(f"{LEASE_NAME}.stale.{uuid.uuid4().hex}")
+        try:
+            os.rename(self.path, stale)
+        except FileNotFoundError:
+            return True  # Already broken by another node - race for it with O_EXCL
+        except OSError:
+            return False
+        try:
+            with open(stale, "r", encoding="utf-8") as f:
+                seen = json.load(f)
+        except (OSError, ValueError):
+            seen = None
+        if seen is not None and seen == lease and (seen.get("expires", 0) <= time.time()
+                                                   or seen.get("owner") == self.owner):
+            stale.unlink(missing_ok=True)
+            return True
+        # Not the record we judged: restore it unless someone has created a new lease meanwhile
+        try:
+            os.link(stale, self.path)
+        except OSError:
+            pass
+        stale.unlink(missing_ok=True)
+        return False
+
+    def acquire(self) -> bool:
+        """Take the lease unless another owner holds a live one, then start heartbeats"""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        if not self._create():
+            lease = read_lease(self.folder)
+            if lease is None and self.path.exists():
+                return False  # Being written right now by another node
+            if lease and lease.get("expires", 0) > time.time() and lease.get("owner") != self.owner:
+                return False
+            # Expired (or our own stale lease): break it, then race for it like a fresh one
+            if not self._break(lease) or not self._create():
+                return False
+        self.held = True
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def renew(self):
+        if not self.held:
+            return
+        lease = read_lease(self.folder)
+        if not lease or lease.get("owner") != self.owner:
+            self.held = False  # Taken over after we missed heartbeats
+            return
+        tmp = self.path.with_name(f"{LEASE_NAME}.{os.getpid()}.tmp")
+        tmp.write_text(self._record(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except OSError:
+                pass
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self.held:
+            lease = read_lease(self.folder)
+            if lease and lease.get("owner") == self.owner:
+                self.path.unlink(missing_ok=True)
+            self.held = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
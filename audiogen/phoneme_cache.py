@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Phoneme Cache
+Persistent grapheme-to-phoneme results keyed on (normalized text, language, G2P version).
+G2P depends only on the text and the language ('a' American, 'b' British - the first letter
+of a Kokoro voice), so one entry serves every voice of that language and every rerun.
+
+Jobs get their phonemes filled in before synthesis; a service that provides
+    synthesize_phonemes(phonemes, voice_name, speaking_rate) -> (samples, sample_rate)
+then skips its own text front end. KokoroPhonemeService adds it to the Kokoro service, feeding
+cached phonemes to the model through KPipeline.generate_from_tokens.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from audio_cache import normalize_text
+from tts_pool import TTSJob
+
+PHONEME_DB = Path(__file__).parent / ".phoneme_cache.sqlite"
+MAX_PHONEMES = 510  # Kokoro's per-call phoneme limit; longer texts go through the normal front end
+KOKORO_REPO = "hexgrad/Kokoro-82M"
+KOKORO_SAMPLE_RATE = 24000
+PARALLEL_MIN_TEXTS = 32  # Below this many misses, a process pool costs more than it saves
+
+_pipelines = {}  # Per-process G2P-only Kokoro pipelines, one per language
+
+
+def detect_g2p_version() -> str:
+    """G2P package version, so a misaki upgrade invalidates every entry"""
+    try:
+        from importlib.metadata import version as package_version
+        return f"misaki-{package_version('misaki')}"
+    except Exception:
+        return "misaki-unknown"
+
+
+def lang_for_voice(voice: str) -> str:
+    """Kokoro language code of a voice ('af_heart' -> 'a', 'bm_george' -> 'b')"""
+    return voice[0]
+
+
+def kokoro_g2p(text: str, lang: str) -> str:
+    """Phonemize with Kokoro's own front end (a pipeline without a model loads no weights)"""
+    pipeline = _pipelines.get(lang)
+    if pipeline is None:
+        from kokoro import KPipeline
+        pipeline = _pipelines[lang] = KPipeline(lang_code=lang, repo_id=KOKORO_REPO, model=False)
+    return " ".join(result.phonemes for result in pipeline(text) if result.phonemes)
+
+
+def _g2p_worker(g2p: Callable[[str, str], str], items: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    return [(text, lang, g2p(text, lang)) for text, lang in items]
+
+
+class PhonemeCache:
+    """SQLite store of G2P results with hit-rate counters (per run and cumulative)"""
+
+    def __init__(self, db_path: Path = PHONEME_DB, g2p_version: str = "misaki-unknown"):
+        self.db_path = Path(db_path)
+        self.g2p_version = g2p_version
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")  # Several audio_generator runs may share it
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS phonemes (
+                key TEXT PRIMARY KEY,
+                lang TEXT NOT NULL,
+                text TEXT NOT NULL,
+                phonemes TEXT NOT NULL,
+                created REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def key(self, text: str, lang: str) -> str:
+        material = "\x1f".join([normalize_text(text), lang, self.g2p_version])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_many(self, items: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Cached phonemes for each (text, lang) found; counts hits and misses"""
+        keyed = {self.key(text, lang): (text, lang) for text, lang in items}
+        found = {}
+        keys = list(keyed)
+        for i in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+            chunk = keys[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, phonemes FROM phonemes WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, phonemes in rows:
+                found[keyed[key]] = phonemes
+        if found:
+            self.conn.executemany("UPDATE phonemes SET hits = hits + 1 WHERE key = ?",
+                                  [(self.key(text, lang),) for text, lang in found])
+        self.hits += len(found)
+        self.misses += len(keyed) - len(found)
+        self._bump(hits=len(found), misses=len(keyed) - len(found))
+        self.conn.commit()
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, str, str]]):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO phonemes (key, lang, text, phonemes, created) VALUES (?, ?, ?, ?, ?)",
+            [(self.key(text, lang), lang, normalize_text(text), phonemes, now)
+             for text, lang, phonemes in entries])
+        self.conn.commit()
+
+    def _bump(self, **counts: int):
+        self.conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(counts.items()))
+
+    def totals(self) -> Dict[str, int]:
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        entries = self.conn.execute("SELECT COUNT(*) FROM phonemes").fetchone()[0]
+        return {"entries": entries, "hits": counters.get("hits", 0), "misses": counters.get("misses", 0)}
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} cached, {self.misses} phonemized ({rate:.0%} hit rate)"
+
+    def close(self):
+        self.conn.close()
+
+
+class PhonemeFrontend:
+    """Cache-first G2P; misses are phonemized on a process pool when there are enough of them"""
+
+    def __init__(self, cache: PhonemeCache, g2p: Callable[[str, str], str] = kokoro_g2p,
+                 workers: Optional[int] = None):
+        self.cache = cache
+        self.g2p = g2p
+        self.workers = workers or os.cpu_count() or 1
+
+    def phonemize(self, items: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Phonemes for every distinct (text, lang); failures are left out"""
+        items = list(dict.fromkeys(items))
+        found = self.cache.get_many(items)
+        missing = [item for item in items if item not in found]
+        if not missing:
+            return found
+
+        computed = []
+        if self.workers > 1 and len(missing) >= PARALLEL_MIN_TEXTS:
+            size = -(-len(missing) // (self.workers * 4))
+            chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [(chunk, pool.submit(_g2p_worker, self.g2p, chunk)) for chunk in chunks]
+                for chunk, future in futures:
+                    try:
+                        computed.extend(future.result())
+                    except Exception as e:
+                        print(f"⚠️  G2P failed for a chunk of {len(chunk)} texts: {e}")
+        else:
+            for text, lang in missing:
+                try:
+                    computed.append((text, lang, self.g2p(text, lang)))
+                except Exception as e:
+                    print(f"⚠️  G2P failed for '{text[:40]}': {e}")
+        computed = [entry for entry in computed if entry[2]]
+        self.cache.put_many(computed)
+        found.update(((text, lang), phonemes) for text, lang, phonemes in computed)
+        return found
+
+    def prepare(self, jobs: List[TTSJob], skip: Optional[Callable[[str], bool]] = None) -> int:
+        """Fill in job.phonemes (within Kokoro's length limit); returns how many got them.
+        Jobs whose text `skip` is true for (questions the segmenter will split) are left to the
+        service's front end, which phonemizes each segment on its own."""
+        if skip:
+            jobs = [job for job in jobs if not skip(job.text)]
+        phonemes = self.phonemize((job.text, lang_for_voice(job.voice)) for job in jobs)
+        filled = 0
+        for job in jobs:
+            value = phonemes.get((job.text, lang_for_voice(job.voice)))
+            if value and len(value) <= MAX_PHONEMES:
+                job.phonemes = value
+                filled += 1
+        return filled
+
+
+def supports_phonemes(service) -> bool:
+    return callable(getattr(service, "synthesize_phonemes", None))
+
+
+def _loaded_model(service):
+    """The KModel a Kokoro service already holds (as `model`, or its pipeline's), if any"""
+    from kokoro import KModel
+    for owner in (service, getattr(service, "pipeline", None), *getattr(service, "pipelines", {}).values()):
+        model = getattr(owner, "model", None)
+        if isinstance(model, KModel):
+            return model
+    return None
+
+
+class KokoroPhonemeService:
+    """Adds synthesize_phonemes to a Kokoro-backed TTS service: phoneme strings go straight to
+    the model via KPipeline.generate_from_tokens, skipping G2P. The model the service already
+    loaded is reused when it exposes one; otherwise one is loaded on the first phoneme call.
+    Everything else is the wrapped service's."""
+
+    def __init__(self, service, model=None):
+        self.service = service
+        self._model = model
+        self._pipelines = {}  # One per language, all sharing the model
+        self.phoneme_calls = 0
+
+    def __getattr__(self, name):
+        if name == "service":
+            raise AttributeError(name)
+        return getattr(self.service, name)
+
+    def _pipeline(self, lang: str):
+        pipeline = self._pipelines.get(lang)
+        if pipeline is None:
+            from kokoro import KModel, KPipeline
+            if self._model is None:
+                self._model = _loaded_model(self.service)
+            if self._model is None:
+                import torch
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self._model = KModel(repo_id=KOKORO_REPO).to(device).eval()
+            pipeline = self._pipelines[lang] = KPipeline(lang_code=lang, repo_id=KOKORO_REPO, model=self._model)
+        return pipeline
+
+    def synthesize_phonemes(self, phonemes: str, voice_name: str, speaking_rate: float = 1.0):
+        import numpy as np
+        self.phoneme_calls += 1
+        pipeline = self._pipeline(lang_for_voice(voice_name))
+        audio = [result.audio.cpu().numpy() for result in
+                 pipeline.generate_from_tokens(phonemes, voice=voice_name, speed=speaking_rate)
+                 if result.audio is not None]
+        if not audio:
+            raise ValueError(f"No audio for phonemes '{phonemes[:40]}'")
+        return np.concatenate(audio).astype(np.float32), KOKORO_SAMPLE_RATE
+
+
+def open_frontend(enabled: bool = True, workers: Optional[int] = None) -> Optional[PhonemeFrontend]:
+    if not enabled:
+        return None
+    return PhonemeFrontend(PhonemeCache(PHONEME_DB, detect_g2p_version()), workers=workers)
+
+
+def texts_in_directory(directory: Path, langs: Iterable[str]) -> List[Tuple[str, str]]:
+    """(question text, lang) for every question of every quiz JSON in a directory"""
+    items = []
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {path.name}: {e}")
+            continue
+        for item in data.get("quiz", []):
+            if item.get("question"):
+                items.extend((item["question"], lang) for lang in langs)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-phonemize quiz questions into the G2P cache')
+    parser.add_argument('directories', nargs='*', type=Path,
+                        default=[Path(__file__).parent / "jsons "], help='Directories of quiz JSONs')
+    parser.add_argument('--langs', default="ab", help="Kokoro language codes to phonemize for (default: ab)")
+    parser.add_argument('--workers', type=int, default=None, help='G2P worker processes (default: CPU count)')
+    parser.add_argument('--stats', action='store_true', help='Print cache totals and exit')
+    args = parser.parse_args()
+
+    frontend = open_frontend(workers=args.workers)
+    if not args.stats:
+        items = [item for directory in args.directories for item in texts_in_directory(directory, args.langs)]
+        start = time.time()
+        done = frontend.phonemize(items)
+        print(f"🔤 {len(done)} distinct texts ready in {time.time() - start:.1f}s | {frontend.cache.stats()}")
+    totals = frontend.cache.totals()
+    lifetime = totals["hits"] + totals["misses"]
+    print(f"📚 {totals['entries']} cached entries, lifetime hit rate "
+          f"{totals['hits'] / lifetime if lifetime else 0.0:.0%} ({totals['hits']}/{lifetime})")
+    frontend.cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -18,9 +18,9 @@ else
     echo "   Using system Python..."
 fi
 
-# Run the audio generator
+# Run the audio generator (arguments are passed through, e.g. --all --shard 0/4)
 cd "$SCRIPT_DIR"
-python audio_generator.py
+python audio_generator.py "$@"
 
 # Deactivate virtual environment
 deactivate 2>/dev/null
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Sentence-Level Segmentation for Long Questions
+Long multi-clue questions are the slowest clips and can run past the model's context limit.
+SegmentingTTSService wraps a TTS service: a text longer than `max_chars` is split at sentence
+boundaries (then clauses, then words), the segments are synthesized side by side - in
+synthesize_batch calls of at most `batch_size` rows when the service has it, otherwise one
+call per segment (on a thread pool of per-thread services when a factory is given, since one
+model instance isn't safe to call from several threads) - and the PCM is stitched back into
+one clip with a pause after each sentence or clause and a short crossfade at every seam.
+Shorter texts go straight to the wrapped service, so their audio is unchanged.
+
+Splitting always happens on the source text; each segment goes through the service's own
+front end. Phoneme strings are never split - a caller holding phonemes for a long text (see
+PhonemeFrontend.prepare's `skip`) should send the text instead. Clips of split texts sound
+different from whole ones, so they get their own audio cache key (segment_variant).
+
+The wrapper exposes only the entry points the wrapped service has (synthesize_speech,
+synthesize_phonemes, synthesize_batch), so the pipeline's feature checks see through it.
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from encode_pipeline import encode_audio
+from tts_batch import adaptive_batch_size
+
+MAX_CHARS = 200  # Longer texts are segmented; every question in the current corpus (at most 146) is shorter
+PAUSE_MS = 220  # Silence after a sentence
+CLAUSE_PAUSE_MS = 90  # Silence after a clause (comma, semicolon, colon, dash)
+CROSSFADE_MS = 15  # Fade at each seam; segments split mid-clause are overlapped by this much
+SEGMENT_WORKERS = 4  # Threads (each with its own service) for services without synthesize_batch
+SILENCE_THRESHOLD = 0.003  # Leading/trailing samples below this are trimmed at inner seams
+
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "jr", "sr", "no", "mt", "ft", "approx", "e.g", "i.e"}
+_SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*\s+')
+_CLAUSE_BREAK = re.compile(r'[,;:]\s+|\s+[—–-]+\s+')
+
+
+@dataclass
+class Segment:
+    text: str
+    boundary: Optional[str] = None  # What ends it: 'sentence', 'clause', 'word' or None (last)
+
+
+def _cut(text: str, pattern: re.Pattern, kind: str, keep=lambda text, match: True) -> List[Segment]:
+    pieces, start = [], 0
+    for match in pattern.finditer(text):
+        if not keep(text, match):
+            continue
+        pieces.append(Segment(text[start:match.end()].strip(), kind))
+        start = match.end()
+    pieces.append(Segment(text[start:].strip(), kind))
+    return [piece for piece in pieces if piece.text]
+
+
+def _is_sentence_end(text: str, match: re.Match) -> bool:
+    """Not after an abbreviation or an initial ('Dr.', 'J. R. R.', 'U.S.')"""
+    word = text[:match.start() + 1].rsplit(None, 1)[-1].rstrip('.').lower()
+    return not (word in ABBREVIATIONS or len(word) == 1 or '.' in word)
+
+
+def _split_words(text: str, max_chars: int) -> List[Segment]:
+    pieces, current = [], ''
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(Segment(current, 'word'))
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    pieces.append(Segment(current, 'word'))
+    return pieces
+
+
+def split_text(text: str, max_chars: int = MAX_CHARS) -> List[Segment]:
+    """Segments of at most `max_chars` (a single segment when the text is short enough or
+    max_chars is 0). Neighbouring pieces are merged back together up to the limit, so a text
+    is split into as few segments as possible."""
+    text = ' '.join(text.split())
+    if not max_chars or len(text) <= max_chars:
+        return [Segment(text)]
+
+    pieces: List[Segment] = []
+    for sentence in _cut(text, _SENTENCE_END, 'sentence', _is_sentence_end):
+        if len(sentence.text) <= max_chars:
+            pieces.append(sentence)
+            continue
+        clauses = _cut(sentence.text, _CLAUSE_BREAK, 'clause')
+        clauses[-1].boundary = 'sentence'
+        for clause in clauses:
+            if len(clause.text) <= max_chars:
+                pieces.append(clause)
+                continue
+            words = _split_words(clause.text, max_chars)
+            words[-1].boundary = clause.boundary
+            pieces.extend(words)
+
+    merged = [pieces[0]]
+    for piece in pieces[1:]:
+        if len(merged[-1].text) + 1 + len(piece.text) <= max_chars:
+            merged[-1] = Segment(f"{merged[-1].text} {piece.text}", piece.boundary)
+        else:
+            merged.append(piece)
+    merged[-1].boundary = None
+    return merged
+
+
+def needs_split(text: str, max_chars: int = MAX_CHARS) -> bool:
+    """Whether SegmentingTTSService with this limit would split `text`"""
+    return len(split_text(text, max_chars)) > 1
+
+
+def segment_variant(text: str, max_chars: int = MAX_CHARS, pause_ms: float = PAUSE_MS,
+                    clause_pause_ms: float = CLAUSE_PAUSE_MS, crossfade_ms: float = CROSSFADE_MS) -> str:
+    """Audio cache key material for `text`: the stitching settings if it is split, else ''"""
+    if not needs_split(text, max_chars):
+        return ""
+    return f"segmented:{max_chars}:{float(pause_ms):g}:{float(clause_pause_ms):g}:{float(crossfade_ms):g}"
+
+
+def _trim(samples: np.ndarray, leading: bool, threshold: float = SILENCE_THRESHOLD) -> np.ndarray:
+    loud = np.flatnonzero(np.abs(samples) >= threshold)
+    if not len(loud):
+        return samples
+    return samples[loud[0]:] if leading else samples[:loud[-1] + 1]
+
+
+def _join(head: np.ndarray, tail: np.ndarray, gap: int, fade: int) -> np.ndarray:
+    n = min(fade, len(head), len(tail))
+    if n == 0:
+        return np.concatenate([head, np.zeros(gap, dtype=head.dtype), tail])
+    ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    if gap:
+        # Fade out into the pause and back in after it
+        head, tail = head.copy(), tail.copy()
+        head[-n:] *= ramp[::-1]
+        tail[:n] *= ramp
+        return np.concatenate([head, np.zeros(gap, dtype=head.dtype), tail])
+    # No pause (split mid-clause): overlap the seam
+    return np.concatenate([head[:-n], head[-n:] * ramp[::-1] + tail[:n] * ramp, tail[n:]])
+
+
+def stitch(pieces: Sequence[np.ndarray], boundaries: Sequence[Optional[str]], sample_rate: int,
+           pause_ms: float = PAUSE_MS, clause_pause_ms: float = CLAUSE_PAUSE_MS,
+           crossfade_ms: float = CROSSFADE_MS) -> np.ndarray:
+    """One waveform from per-segment PCM; boundaries[i] is what ends pieces[i]"""
+    gaps = {'sentence': pause_ms, 'clause': clause_pause_ms}
+    fade = int(sample_rate * crossfade_ms / 1000)
+    out = np.asarray(pieces[0], dtype=np.float32)
+    for piece, boundary in zip(pieces[1:], boundaries):
+        gap = int(sample_rate * gaps.get(boundary, 0) / 1000)
+        out = _join(_trim(out, leading=False), _trim(np.asarray(piece, dtype=np.float32), leading=True), gap, fade)
+    return out
+
+
+class SegmentingTTSService:
+    """TTS service wrapper that splits long texts, synthesizes the parts concurrently and stitches them"""
+
+    def __init__(self, service, max_chars: int = MAX_CHARS, pause_ms: float = PAUSE_MS,
+                 clause_pause_ms: float = CLAUSE_PAUSE_MS, crossfade_ms: float = CROSSFADE_MS,
+                 workers: int = SEGMENT_WORKERS, writer: Callable[[np.ndarray, int, str], None] = encode_audio,
+                 batch_size: Optional[int] = None, service_factory: Optional[Callable] = None):
+        self.service = service
+        self.max_chars = max_chars
+        self.pause_ms = pause_ms
+        self.clause_pause_ms = clause_pause_ms
+        self.crossfade_ms = crossfade_ms
+        self.workers = max(1, workers)
+        self.writer = writer
+        self.batch_size = batch_size or adaptive_batch_size()  # Rows per synthesize_batch call, after splitting
+        # Per-segment calls run on `workers` threads only with a factory for per-thread services;
+        # otherwise they are serialized on the one shared service
+        self.service_factory = service_factory
+        self.segmented = 0  # Texts that were split
+        self.segments = 0  # Segments synthesized for them
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._batched = callable(getattr(service, "synthesize_batch", None))
+        if callable(getattr(service, "synthesize_speech", None)):
+            self.synthesize_speech = self._synthesize_speech
+        if callable(getattr(service, "synthesize_phonemes", None)):
+            self.synthesize_phonemes = self._synthesize_phonemes
+        if self._batched:
+            self.synthesize_batch = self._synthesize_batch
+
+    def __getattr__(self, name):
+        # Anything not overridden here (model_version, settings, ...) is the wrapped service's
+        if name == "service":
+            raise AttributeError(name)
+        return getattr(self.service, name)
+
+    def _stitch(self, pieces: List[np.ndarray], plan: List[Segment], sample_rate: int) -> np.ndarray:
+        return stitch(pieces, [segment.boundary for segment in plan[:-1]], sample_rate,
+                      self.pause_ms, self.clause_pause_ms, self.crossfade_ms)
+
+    def splits(self, text: str) -> bool:
+        return needs_split(text, self.max_chars)
+
+    def cache_variant(self, text: str) -> str:
+        return segment_variant(text, self.max_chars, self.pause_ms, self.clause_pause_ms, self.crossfade_ms)
+
+    def _thread_service(self):
+        if not hasattr(self._local, "service"):
+            self._local.service = self.service_factory()
+        return self._local.service
+
+    def _speak(self, text: str, voice_name: str, speaking_rate: float) -> Tuple[np.ndarray, int]:
+        service = self._thread_service()
+        return service.synthesize_speech(text=text, voice_name=voice_name, speaking_rate=speaking_rate)
+
+    def _per_segment(self, texts: List[str], voice_name: str, speaking_rate: float):
+        """One synthesize_speech call per segment; returns (pieces, sample_rate)"""
+        if self.service_factory is None or self.workers == 1:
+            with self._lock:
+                results = [self.service.synthesize_speech(text=text, voice_name=voice_name,
+                                                          speaking_rate=speaking_rate) for text in texts]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="tts-segment")
+            results = list(self._pool.map(lambda text: self._speak(text, voice_name, speaking_rate), texts))
+        return [samples for samples, _ in results], results[0][1]
+
+    def _batched_rows(self, texts: List[str], voice_name: str, speaking_rate: float):
+        """synthesize_batch over `texts` in calls of at most batch_size rows; returns (pieces, sample_rate)"""
+        pieces, sample_rate = [], 0
+        for start in range(0, len(texts), self.batch_size):
+            waveform, sample_rate, boundaries = self.service.synthesize_batch(
+                texts[start:start + self.batch_size], voice_name=voice_name, speaking_rate=speaking_rate)
+            pieces.extend(waveform[begin:end] for begin, end in boundaries)
+        return pieces, sample_rate
+
+    def _segmented(self, text: str, voice_name: str, speaking_rate: float):
+        plan = split_text(text, self.max_chars)
+        if len(plan) == 1:
+            return None
+        self.segmented += 1
+        self.segments += len(plan)
+        texts = [segment.text for segment in plan]
+        if self._batched:
+            pieces, sample_rate = self._batched_rows(texts, voice_name, speaking_rate)
+        else:
+            pieces, sample_rate = self._per_segment(texts, voice_name, speaking_rate)
+        return self._stitch(pieces, plan, sample_rate), sample_rate
+
+    def _synthesize_speech(self, text: str, voice_name: str, speaking_rate: float = 1.0) -> Tuple[np.ndarray, int]:
+        return (self._segmented(text, voice_name, speaking_rate)
+                or self.service.synthesize_speech(text=text, voice_name=voice_name, speaking_rate=speaking_rate))
+
+    def _synthesize_phonemes(self, phonemes: str, voice_name: str,
+                             speaking_rate: float = 1.0) -> Tuple[np.ndarray, int]:
+        # Passed through whole: text rules can't find sentence boundaries in IPA
+        return self.service.synthesize_phonemes(phonemes=phonemes, voice_name=voice_name,
+                                                speaking_rate=speaking_rate)
+
+    def _synthesize_batch(self, texts: List[str], voice_name: str,
+                          speaking_rate: float = 1.0) -> Tuple[np.ndarray, int, List[Tuple[int, int]]]:
+        """Every segment of every text in batch calls of at most batch_size rows, stitched back to
+        one utterance per text"""
+        plans = [split_text(text, self.max_chars) for text in texts]
+        if all(len(plan) == 1 for plan in plans) and len(texts) <= self.batch_size:
+            return self.service.synthesize_batch(texts, voice_name=voice_name, speaking_rate=speaking_rate)
+        rows, sample_rate = self._batched_rows([segment.text for plan in plans for segment in plan],
+                                               voice_name, speaking_rate)
+        clips, index = [], 0
+        for plan in plans:
+            pieces = rows[index:index + len(plan)]
+            index += len(plan)
+            if len(plan) > 1:
+                self.segmented += 1
+                self.segments += len(plan)
+            clips.append(self._stitch(pieces, plan, sample_rate) if len(plan) > 1 else pieces[0])
+        offsets = np.cumsum([0] + [len(clip) for clip in clips])
+        return np.concatenate(clips), sample_rate, list(zip(offsets[:-1].tolist(), offsets[1:].tolist()))
+
+    def synthesize_speech_to_file(self, text: str, voice_name: str, speaking_rate: float = 1.0,
+                                  output_file: str = "output.mp3") -> bool:
+        if len(split_text(text, self.max_chars)) == 1 or not callable(getattr(self.service, "synthesize_speech", None)):
+            return self.service.synthesize_speech_to_file(text=text, voice_name=voice_name,
+                                                          speaking_rate=speaking_rate, output_file=output_file)
+        samples, sample_rate = self._synthesize_speech(text, voice_name, speaking_rate)
+        self.writer(samples, sample_rate, output_file)
+        return True
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def _build(service_factory: Callable, settings: dict) -> SegmentingTTSService:
+    return SegmentingTTSService(service_factory(), **settings)
+
+
+def segmenting_factory(service_factory: Callable, **settings) -> Callable[[], SegmentingTTSService]:
+    """Picklable factory for worker processes: service_factory() wrapped with these settings"""
+    return partial(_build, service_factory, settings)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Batched TTS Synthesis
+Groups the questions of one JSON file (same voice, same speed) into batches, runs each
+batch as a single inference call and splits the returned waveform back into one
+question_<id>.mp3 per question. Batch size adapts to available RAM.
+
+The service must provide:
+    synthesize_batch(texts, voice_name, speaking_rate) -> (waveform, sample_rate, boundaries)
+where `waveform` is a 1-D float array holding every utterance back to back and
+`boundaries` lists one (start, end) sample range per input text.
+"""
+
+import os
+import time
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+from tts_pool import TTSJob, TTSResult
+from encode_pipeline import PCMItem, encode_audio
+from audio_manifest import describe_pcm
+
+MAX_BATCH_SIZE = 16
+MEMORY_PER_ITEM_MB = 300  # Rough peak inference memory for one padded ~150-character question
+RAM_FRACTION = 0.5  # Share of currently available RAM a batch may use
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Currently available physical memory, or None if the platform doesn't say"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def adaptive_batch_size(max_batch: int = MAX_BATCH_SIZE, per_item_mb: float = MEMORY_PER_ITEM_MB,
+                        fraction: float = RAM_FRACTION) -> int:
+    """Largest batch that fits in `fraction` of available RAM, between 1 and max_batch"""
+    available = available_memory_bytes()
+    if available is None:
+        return max(1, max_batch // 4)
+    fits = int(available * fraction / (per_item_mb * 1024 * 1024))
+    return max(1, min(max_batch, fits))
+
+
+def plan_batches(jobs: List[TTSJob], batch_size: int) -> List[List[TTSJob]]:
+    """Sort by text length before cutting batches so each batch pads to a similar length"""
+    ordered = sorted(jobs, key=lambda job: len(job.text))
+    return [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+class BatchedSynthesizer:
+    """Runs same-voice jobs through service.synthesize_batch, shrinking batches on memory errors"""
+
+    def __init__(self, service, batch_size: Optional[int] = None,
+                 writer: Callable[[np.ndarray, int, str], None] = encode_audio):
+        self.service = service
+        self.batch_size = batch_size or adaptive_batch_size()
+        self.writer = writer
+
+    @staticmethod
+    def supports(service) -> bool:
+        return callable(getattr(service, "synthesize_batch", None))
+
+    def _run_batch(self, batch: List[TTSJob]) -> List[PCMItem]:
+        start = time.time()
+        waveform, sample_rate, boundaries = self.service.synthesize_batch(
+            [job.text for job in batch], voice_name=batch[0].voice, speaking_rate=batch[0].speed)
+        if len(boundaries) != len(batch):
+            raise ValueError(f"synthesize_batch returned {len(boundaries)} segments for {len(batch)} texts")
+        # Inference time is shared evenly; segments are views into the batch waveform, not copies
+        share = (time.time() - start) / len(batch)
+        return [PCMItem(job, waveform[begin:end], sample_rate, share)
+                for job, (begin, end) in zip(batch, boundaries)]
+
+    def iter_pcm(self, jobs: List[TTSJob], keep_going: Optional[Callable[[], bool]] = None) -> Iterator[PCMItem]:
+        """Yield each question's PCM as its batch finishes (feeds EncoderPipeline); stops
+        before the next batch once `keep_going()` is False"""
+        pending = plan_batches(jobs, self.batch_size)
+        while pending and (keep_going is None or keep_going()):
+            batch = pending.pop(0)
+            try:
+                items = self._run_batch(batch)
+            except MemoryError:
+                if len(batch) == 1:
+                    yield PCMItem(batch[0], None, 0, 0.0, "Out of memory synthesizing a single question")
+                    continue
+                # Out of memory: halve the batch size and re-plan everything still pending
+                self.batch_size = max(1, len(batch) // 2)
+                print(f"⚠️  Out of memory at batch size {len(batch)}, retrying at {self.batch_size}")
+                pending = plan_batches(batch + [job for rest in pending for job in rest], self.batch_size)
+                continue
+            except Exception as e:
+                if len(batch) == 1:
+                    yield PCMItem(batch[0], None, 0, 0.0, str(e))
+                    continue
+                print(f"⚠️  Batch synthesis failed ({e}), retrying one question per call")
+                pending[:0] = [[job] for job in batch]
+                continue
+            yield from items
+
+    def synthesize(self, jobs: List[TTSJob], keep_going: Optional[Callable[[], bool]] = None) -> List[TTSResult]:
+        """Synthesize and write every job inline (all sharing one voice and speed)"""
+        results = []
+        for item in self.iter_pcm(jobs, keep_going):
+            if item.error is not None:
+                results.append(TTSResult(item.job, False, item.seconds, item.error))
+                continue
+            start = time.time()
+            try:
+                self.writer(item.samples, item.sample_rate, item.job.output_path)
+                results.append(TTSResult(item.job, True, item.seconds + time.time() - start,
+                                         clip=describe_pcm(item.samples, item.sample_rate),
+                                         encode_seconds=time.time() - start))
+            except Exception as e:
+                results.append(TTSResult(item.job, False, item.seconds + time.time() - start, str(e)))
+        return results
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+TTS Worker Pool
+Runs speech synthesis across several processes. Each worker loads the TTS model once
+(via the service factory) and then pulls question jobs from a shared queue.
+"""
+
+import os
+import sys
+import time
+import queue
+import multiprocessing
+from collections import deque
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Environment variables that cap the math-library thread pools inside each worker
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+PROGRESS_INTERVAL = 2.0  # Seconds between aggregate progress lines
+
+_service = None  # Per-worker TTS service, created by _init_worker
+
+
+@dataclass
+class TTSJob:
+    """One question to synthesize"""
+    json_name: str
+    question_id: int
+    text: str
+    voice: str
+    output_path: str
+    speed: float = 1.0
+    phonemes: Optional[str] = None  # Filled in from the phoneme cache, if one is in use
+
+
+@dataclass
+class TTSResult:
+    job: TTSJob
+    success: bool
+    seconds: float
+    error: Optional[str] = None
+    clip: Optional[Dict[str, Any]] = None  # audio_manifest.describe_pcm() when PCM was in memory
+    encode_seconds: float = 0.0  # Part of `seconds` spent encoding, when it was measured separately
+    finished: float = field(default_factory=time.time)  # Wall clock (in whichever process made it)
+
+
+def _init_worker(service_factory: Callable, threads_per_worker: int):
+    """Cap intra-op threads, then load the model once for this worker's lifetime"""
+    global _service
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _service = service_factory()
+
+
+def synthesize_job(service, job: TTSJob) -> TTSResult:
+    """Synthesize one job on `service` (used by the workers and by the serial path)"""
+    start = time.time()
+    try:
+        # The output may be a hardlink into the audio cache - never write through it
+        Path(job.output_path).unlink(missing_ok=True)
+        if job.phonemes and callable(getattr(service, "synthesize_phonemes", None)):
+            from encode_pipeline import encode_audio
+            from audio_manifest import describe_pcm
+            samples, sample_rate = service.synthesize_phonemes(
+                phonemes=job.phonemes, voice_name=job.voice, speaking_rate=job.speed)
+            encode_start = time.time()
+            encode_audio(samples, sample_rate, job.output_path)
+            return TTSResult(job, True, time.time() - start, clip=describe_pcm(samples, sample_rate),
+                             encode_seconds=time.time() - encode_start)
+        success = service.synthesize_speech_to_file(
+            text=job.text,
+            voice_name=job.voice,
+            speaking_rate=job.speed,
+            output_file=job.output_path
+        )
+        return TTSResult(job, bool(success), time.time() - start)
+    except Exception as e:
+        return TTSResult(job, False, time.time() - start, str(e))
+
+
+def _run_job(job: TTSJob) -> TTSResult:
+    return synthesize_job(_service, job)
+
+
+class ProgressReporter:
+    """Prints a single aggregate progress line across all workers"""
+
+    def __init__(self, total: int, interval: float = PROGRESS_INTERVAL, stream=sys.stdout):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.start = time.time()
+        self._last_print = 0.0
+
+    def update(self, result: TTSResult):
+        self.done += 1
+        if not result.success:
+            self.failed += 1
+            print(f"\n❌ {result.job.json_name} question {result.job.question_id}: "
+                  f"{result.error or 'synthesis failed'}", file=self.stream)
+        now = time.time()
+        if now - self._last_print >= self.interval or self.done == self.total:
+            self._last_print = now
+            self.print_line()
+
+    def print_line(self):
+        elapsed = time.time() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        print(f"\r🔄 {self.done}/{self.total} questions ({self.failed} failed) "
+              f"| {rate:.2f} q/s | ETA {eta:.0f}s   ", end='', flush=True, file=self.stream)
+        if self.done == self.total:
+            print(file=self.stream)
+
+
+class TTSWorkerPool:
+    """Process pool whose workers each hold one loaded TTS service"""
+
+    def __init__(self, service_factory: Callable, workers: int = 2, threads_per_worker: int = 1):
+        self.service_factory = service_factory
+        self.workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+
+    def run(self, jobs: Iterable[TTSJob], progress: Optional[ProgressReporter] = None,
+            keep: Optional[Callable[[TTSJob], bool]] = None) -> List[TTSResult]:
+        """Synthesize every job; results come back in completion order. Jobs are handed out
+        a few at a time, and `keep(job)` is asked just before each one is - jobs it rejects
+        (e.g. their folder's lease was lost) are dropped without a result."""
+        pending = deque(jobs)
+        results = []
+        if not pending:
+            return results
+        finished = queue.Queue()
+        in_flight = 0
+        with multiprocessing.Pool(processes=min(self.workers, len(pending)), initializer=_init_worker,
+                                  initargs=(self.service_factory, self.threads_per_worker)) as pool:
+            while pending or in_flight:
+                # One job per idle worker plus one queued each, so long questions don't stall a batch
+                while pending and in_flight < 2 * self.workers:
+                    job = pending.popleft()
+                    if keep is not None and not keep(job):
+                        continue
+                    pool.apply_async(_run_job, (job,), callback=finished.put,
+                                     error_callback=lambda e, job=job: finished.put(TTSResult(job, False, 0.0, str(e))))
+                    in_flight += 1
+                if not in_flight:
+                    break
+                result = finished.get()
+                in_flight -= 1
+                results.append(result)
+                if progress:
+                    progress.update(result)
+        return results
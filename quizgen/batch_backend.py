@@ -0,0 +1,234 @@
+"""
+Batch Backend - Generate quizzes through the OpenAI Batch API
+Builds one JSONL batch from every unprocessed topic, uploads and submits it, polls until
+it finishes and feeds the results through the normal validation / save path. The batch
+id is kept in batch_state.json so a restarted process resumes polling instead of
+submitting (and paying for) the same batch twice.
+"""
+
+import os
+import json
+import time
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import aiohttp
+
+from instrumentation import counter
+from response_cache import request_key
+from stream_parser import DIFFICULTIES
+
+BATCH_COMPLETION_WINDOW = '24h'
+BATCH_POLL_INTERVAL = 60  # Seconds between status checks
+BATCH_TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+TOKENS = counter('quizgen_tokens', 'Billed tokens by direction (in = prompt, out = completion)')
+
+
+class BatchBackend:
+    """Runs a QuizGenerator's pending topics as a single Batch API job"""
+
+    def __init__(self, generator, state_file: Path, poll_interval: float = BATCH_POLL_INTERVAL):
+        self.generator = generator
+        self.state_file = Path(state_file)
+        self.poll_interval = poll_interval
+        # https://api.openai.com/v1/chat/completions -> https://api.openai.com/v1
+        self.api_base = generator.api_url.rsplit('/chat/completions', 1)[0]
+        self.headers = {'Authorization': f'Bearer {generator.api_key}'}
+
+    def _log(self, message: str):
+        self.generator._log(message)
+
+    # State
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        if not self.state_file.exists():
+            return None
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self._log(f"Ignoring unreadable batch state {self.state_file.name}: {e}")
+            return None
+
+    def _save_state(self, state: Dict[str, Any]):
+        tmp_path = self.state_file.with_name(self.state_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_file)
+
+    # Batch construction
+
+    def build_requests(self, topics: List[str]) -> List[Dict[str, Any]]:
+        """One /v1/chat/completions batch line per topic"""
+        return [
+            {
+                'custom_id': f"topic-{index}",
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._request_body(topic),
+            }
+            for index, topic in enumerate(topics, 1)
+        ]
+
+    def _request_body(self, topic: str) -> Dict[str, Any]:
+        """The live-mode payload for a topic, minus the streaming flags batches don't accept"""
+        payload = self.generator._build_payload(self.generator._create_prompt_for_topic(topic))
+        payload.pop('stream', None)
+        payload.pop('stream_options', None)
+        return payload
+
+    def _pending_topics(self) -> List[str]:
+        """Unprocessed topics, saving any whose exact request is already in the response cache"""
+        generator = self.generator
+        pending = []
+        for topic in generator.topics:
+            if not generator._needs_generation(topic):
+                generator.skipped_count += 1
+                generator._quiz_ready(topic)
+                continue
+            empty = {'quiz': {d: [] for d in DIFFICULTIES}}
+            cached = generator._load_cached_response(request_key(self._request_body(topic)), empty)
+            if cached is not None:
+                self._log(f"♻ Cache hit for '{topic}' - not added to the batch")
+                generator._record_result({'success': True, 'data': cached, 'topic': topic})
+                continue
+            pending.append(topic)
+        return pending
+
+    # API calls
+
+    async def _submit(self, session: aiohttp.ClientSession, topics: List[str]) -> Dict[str, Any]:
+        requests = self.build_requests(topics)
+        body = '\n'.join(json.dumps(line, ensure_ascii=False) for line in requests) + '\n'
+
+        form = aiohttp.FormData()
+        form.add_field('purpose', 'batch')
+        form.add_field('file', body.encode('utf-8'), filename='quizgen_batch.jsonl',
+                       content_type='application/jsonl')
+        async with session.post(f"{self.api_base}/files", headers=self.headers, data=form) as response:
+            if response.status != 200:
+                raise Exception(f"Batch file upload failed {response.status}: {await response.text()}")
+            input_file = await response.json()
+
+        batch_request = {
+            'input_file_id': input_file['id'],
+            'endpoint': '/v1/chat/completions',
+            'completion_window': BATCH_COMPLETION_WINDOW,
+        }
+        async with session.post(f"{self.api_base}/batches", headers=self.headers, json=batch_request) as response:
+            if response.status != 200:
+                raise Exception(f"Batch creation failed {response.status}: {await response.text()}")
+            batch = await response.json()
+
+        state = {
+            'batch_id': batch['id'],
+            'input_file_id': input_file['id'],
+            'submitted_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'topics': {line['custom_id']: topic for line, topic in zip(requests, topics)},
+        }
+        self._save_state(state)
+        for topic in topics:
+            self.generator.journal.record(topic, 'started', backend='batch', batch_id=batch['id'])
+        self._log(f"Submitted batch {batch['id']} with {len(topics)} topics")
+        return state
+
+    async def _poll(self, session: aiohttp.ClientSession, batch_id: str) -> Dict[str, Any]:
+        last_counts = None
+        while True:
+            async with session.get(f"{self.api_base}/batches/{batch_id}", headers=self.headers) as response:
+                if response.status != 200:
+                    raise Exception(f"Batch status failed {response.status}: {await response.text()}")
+                batch = await response.json()
+
+            counts = batch.get('request_counts') or {}
+            if counts != last_counts:
+                self._log(f"Batch {batch_id}: {batch['status']} "
+                          f"({counts.get('completed', 0)}/{counts.get('total', 0)} done, "
+                          f"{counts.get('failed', 0)} failed)")
+                last_counts = counts
+            if batch['status'] in BATCH_TERMINAL_STATUSES:
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    async def _download(self, session: aiohttp.ClientSession, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        async with session.get(f"{self.api_base}/files/{file_id}/content", headers=self.headers) as response:
+            if response.status != 200:
+                raise Exception(f"Batch download failed {response.status}: {await response.text()}")
+            text = await response.text()
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    # Results
+
+    def _result_for_line(self, topic: str, line: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn one output/error JSONL line into the generator's result dict"""
+        generator = self.generator
+        response = line.get('response') or {}
+        if line.get('error') or response.get('status_code') != 200:
+            error = line.get('error') or response.get('body')
+            return {'success': False, 'error': f"Batch request failed: {error}", 'topic': topic}
+        try:
+            body = response['body']
+            content = body['choices'][0]['message']['content']
+            quiz_data = json.loads(content)
+        except Exception as e:
+            return {'success': False, 'error': f"Unreadable batch response: {e}", 'topic': topic}
+        usage = body.get('usage') or {}
+        TOKENS.inc(usage.get('prompt_tokens') or 0, direction='in')
+        TOKENS.inc(usage.get('completion_tokens') or 0, direction='out')
+
+        if not generator._validate_quiz_structure(quiz_data):
+            return {'success': False, 'error': f"Invalid structure: {generator._get_validation_error(quiz_data)}",
+                    'topic': topic}
+        if generator.cache:
+            generator.cache.put(request_key(self._request_body(topic)), topic, content,
+                                body.get('usage'), body.get('model', ''))
+        return {'success': True, 'data': quiz_data, 'topic': topic}
+
+    async def _collect(self, session: aiohttp.ClientSession, state: Dict[str, Any], batch: Dict[str, Any]):
+        lines = await self._download(session, batch.get('output_file_id'))
+        lines += await self._download(session, batch.get('error_file_id'))
+        seen = set()
+        for line in lines:
+            topic = state['topics'].get(line.get('custom_id'))
+            if topic is None or topic in seen:
+                continue
+            seen.add(topic)
+            self.generator._record_result(self._result_for_line(topic, line))
+
+        for topic in state['topics'].values():
+            if topic not in seen:
+                self.generator._record_result({'success': False, 'topic': topic,
+                                               'error': f"No batch result (batch {batch['status']})"})
+
+    async def run(self):
+        """Submit (or resume) the batch, wait for it and save every result"""
+        generator = self.generator
+        total_topics = len(generator.topics)
+        run_start = time.time()
+        generator.output_dir.mkdir(parents=True, exist_ok=True)
+
+        async with aiohttp.ClientSession() as session:
+            state = self._load_state()
+            if state:
+                self._log(f"Resuming batch {state['batch_id']} ({len(state['topics'])} topics) "
+                          f"submitted {state['submitted_at']}")
+            else:
+                topics = self._pending_topics()
+                if not topics:
+                    self._log("Nothing to submit - every topic is already processed")
+                    generator._finish_run(total_topics)
+                    return
+                state = await self._submit(session, topics)
+
+            batch = await self._poll(session, state['batch_id'])
+            if batch['status'] != 'completed':
+                self._log(f"Batch {state['batch_id']} ended as '{batch['status']}' - collecting partial results")
+            await self._collect(session, state, batch)
+
+        # Results are saved; a new run should build a fresh batch from whatever is still missing
+        self.state_file.unlink(missing_ok=True)
+        generator.elapsed_seconds = time.time() - run_start
+        generator._finish_run(total_topics)
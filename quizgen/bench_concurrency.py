@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Concurrency Benchmark - Wall-clock time of QuizGenerator against the mock server
+Runs the same synthetic topic list at several in-flight limits (default 1, 4 and 16).
+"""
+
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+from mock_openai_server import MockOpenAIServer
+from quiz_generator import QuizGenerator
+
+
+async def run_level(concurrency: int, topics: int, latency: float,
+                    fault_rate: float = 0.0, retry_after: float = None,
+                    latency_per_question: float = 0.0, shard_mode: str = 'off') -> dict:
+    server = MockOpenAIServer(latency=latency, fault_rate=fault_rate, retry_after=retry_after, seed=concurrency,
+                              latency_per_question=latency_per_question)
+    url = await server.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = QuizGenerator(
+                max_concurrency=concurrency,
+                topics=[f"Benchmark Topic {i}" for i in range(topics)],
+                output_dir=Path(tmp),
+                api_url=url,
+                shard_mode=shard_mode,
+                cache_dir=Path(tmp) / '.cache',
+                journal_file=Path(tmp) / 'quiz_jobs.jsonl',
+            )
+            generator.api_key = 'mock-key'
+            generator._log = lambda message: generator.log_entries.append(message)
+            generator._save_log = lambda: None
+            await generator.generate_all_quizzes()
+            return {
+                'concurrency': concurrency,
+                'generated': generator.generated_count,
+                'failed': len(generator.failed_topics),
+                'seconds': generator.elapsed_seconds,
+                'max_in_flight': server.max_in_flight,
+                'faults': sum(server.fault_counts.values()),
+            }
+    finally:
+        await server.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark QuizGenerator concurrency levels')
+    parser.add_argument('--topics', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.5, help='Mock seconds per completion')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--fault-rate', type=float, default=0.0, help='Injected 429/5xx probability')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds on faults')
+    parser.add_argument('--latency-per-question', type=float, default=0.0,
+                        help='Extra mock seconds per generated question')
+    parser.add_argument('--shards', choices=['off', 'difficulty', 'chunk'], default='off',
+                        help='Shard mode passed to QuizGenerator')
+    args = parser.parse_args()
+
+    print(f"{'concurrency':>12} {'generated':>10} {'failed':>7} {'faults':>7} {'in-flight':>10} {'seconds':>9}")
+    for level in args.levels:
+        r = await run_level(level, args.topics, args.latency, args.fault_rate, args.retry_after,
+                            args.latency_per_question, args.shards)
+        print(f"{r['concurrency']:>12} {r['generated']:>10} {r['failed']:>7} {r['faults']:>7} "
+              f"{r['max_in_flight']:>10} {r['seconds']:>9.2f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
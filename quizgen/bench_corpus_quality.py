@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Corpus Quality Benchmark - Time corpus_quality on large synthetic corpora
+Builds N random questions with a known share of planted near-duplicates (one word
+changed, same answer) and reports load / check / dedupe time plus duplicate recall.
+"""
+
+import time
+import random
+import argparse
+
+from corpus_quality import QuizCorpus, check_questions, find_near_duplicates
+
+
+def synthetic_records(count: int, duplicate_rate: float, seed: int = 7):
+    """(records, planted) - planted maps each near-duplicate index to its original"""
+    rng = random.Random(seed)
+    vocab = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(3, 9))) for _ in range(5000)]
+    records, planted = [], {}
+    for i in range(count):
+        if i > 0 and rng.random() < duplicate_rate:
+            original = rng.randrange(i)
+            q = records[original][2]
+            words = q['question'].split()
+            words[rng.randrange(len(words))] = rng.choice(vocab)  # one-word edit
+            question = {'question': ' '.join(words), 'options': list(q['options']), 'answer': q['answer']}
+            planted[i] = original
+        else:
+            options = [' '.join(rng.choices(vocab, k=rng.randint(1, 3))) for _ in range(3)]
+            question = {'question': ' '.join(rng.choices(vocab, k=rng.randint(8, 14))) + '?',
+                        'options': options, 'answer': rng.choice(options)}
+        records.append((f"topic-{i // 90}.json", f"q{i % 90 + 1}", question))
+    return records, planted
+
+
+def run(count: int, duplicate_rate: float) -> dict:
+    records, planted = synthetic_records(count, duplicate_rate)
+
+    start = time.time()
+    corpus = QuizCorpus(records)
+    loaded = time.time()
+    check_questions(corpus)
+    checked = time.time()
+    clusters = find_near_duplicates(corpus)
+    deduped = time.time()
+
+    cluster_of = {}
+    for n, cluster in enumerate(clusters):
+        for q in cluster['questions']:
+            cluster_of[(q['file'], q['location'])] = n
+
+    def key(i):
+        return records[i][0], records[i][1]
+
+    found = sum(1 for dup, original in planted.items()
+                if key(dup) in cluster_of and cluster_of.get(key(dup)) == cluster_of.get(key(original)))
+    return {
+        'questions': count,
+        'load': loaded - start,
+        'checks': checked - loaded,
+        'dedupe': deduped - checked,
+        'clusters': len(clusters),
+        'recall': found / len(planted) if planted else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark corpus_quality on synthetic corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 250000])
+    parser.add_argument('--duplicate-rate', type=float, default=0.02, help='Share of planted near-duplicates')
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} {'load':>7} {'checks':>7} {'dedupe':>7} {'total':>7} {'clusters':>9} {'recall':>7}")
+    for size in args.sizes:
+        r = run(size, args.duplicate_rate)
+        total = r['load'] + r['checks'] + r['dedupe']
+        print(f"{r['questions']:>10} {r['load']:>7.2f} {r['checks']:>7.2f} {r['dedupe']:>7.2f} "
+              f"{total:>7.2f} {r['clusters']:>9} {r['recall']:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Corpus Store Benchmark - corpus_store.py against the JSON directory layout
+Copies the segregated chunks (scaled up `--scale` times under renamed topics) into a temporary
+directory and a temporary store, then times what the consumers do: listing the chunks at
+startup, scanning every question, loading random chunks (full and audio-line views) and the
+one-off import. Best of --repeat runs; disk usage is reported for both.
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+from corpus_quality import iter_quiz_file
+from corpus_store import CorpusStore, VIEWS, render_json
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def build_layout(source: Path, directory: Path, audio_dir: Path, scale: int) -> int:
+    """Write `scale` renamed copies of every chunk in the segregated and audio-line layouts"""
+    directory.mkdir()
+    audio_dir.mkdir()
+    count = 0
+    for path in sorted(source.glob('*.json')):
+        data = json.loads(path.read_text(encoding='utf-8'))
+        lines = {'quiz': [{'question_id': q['question_id'], 'question': q['question']} for q in data['quiz']]}
+        topic, _, chunk = path.stem.rpartition('.')
+        for copy in range(scale):
+            name = f"{topic} #{copy}.{chunk}.json" if copy else path.name
+            (directory / name).write_text(render_json(data), encoding='utf-8')
+            (audio_dir / name).write_text(render_json(lines), encoding='utf-8')
+            count += 1
+    return count
+
+
+def dir_bytes(*directories: Path) -> int:
+    return sum(p.stat().st_size for d in directories for p in d.glob('*.json'))
+
+
+def run(scale: int, loads: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks_dir, audio_dir = Path(tmp) / 'segregated', Path(tmp) / 'audio'
+        files = build_layout(VIEWS['segregated'][1], chunks_dir, audio_dir, scale)
+        store_path = Path(tmp) / 'corpus.sqlite'
+
+        start = time.perf_counter()
+        store = CorpusStore(store_path)
+        store.import_directory('segregated', chunks_dir)
+        store.close()
+        import_seconds = time.perf_counter() - start
+
+        names = sorted(p.name for p in chunks_dir.glob('*.json'))
+        sample = random.Random(0).choices(names, k=loads)
+
+        def dir_startup():
+            return sorted(f for f in os.listdir(chunks_dir) if f.endswith('.json'))
+
+        def store_startup():
+            s = CorpusStore(store_path)
+            s.names('segregated')
+            s.close()
+
+        def dir_scan():
+            return sum(1 for n in dir_startup() for _ in iter_quiz_file(chunks_dir / n))
+
+        store = CorpusStore(store_path)
+
+        def store_scan():
+            return sum(1 for _ in store.records('segregated'))
+
+        def dir_load(directory):
+            return lambda: [json.loads((directory / n).read_text(encoding='utf-8')) for n in sample]
+
+        def store_load(view):
+            return lambda: [store.load(view, n) for n in sample]
+
+        result = {
+            'files': files,
+            'questions': store_scan(),
+            'import_s': import_seconds,
+            'rows': [
+                ('startup (list chunks)', best_of(repeat, dir_startup), best_of(repeat, store_startup)),
+                ('scan every question', best_of(repeat, dir_scan), best_of(repeat, store_scan)),
+                (f'load {loads} chunks', best_of(repeat, dir_load(chunks_dir)), best_of(repeat, store_load('segregated'))),
+                (f'load {loads} audio lines', best_of(repeat, dir_load(audio_dir)), best_of(repeat, store_load('audio'))),
+            ],
+            'dir_mb': dir_bytes(chunks_dir, audio_dir) / 1e6,
+            'store_mb': sum(p.stat().st_size for p in Path(tmp).glob('corpus.sqlite*')) / 1e6,
+        }
+        store.close()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the corpus store against the JSON directories')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10], help='Copies of the segregated corpus')
+    parser.add_argument('--loads', type=int, default=500, help='Random chunk loads per timing')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        r = run(scale, args.loads, args.repeat)
+        print(f"\nscale {scale}: {r['files']} chunks, {r['questions']} questions | "
+              f"JSON {r['dir_mb']:.1f} MB (full + audio lines) vs store {r['store_mb']:.1f} MB, "
+              f"import {r['import_s']:.2f}s")
+        print(f"{'operation':<24} {'json dir s':>11} {'store s':>9} {'speedup':>8}")
+        for name, directory, stored in r['rows']:
+            print(f"{name:<24} {directory:>11.4f} {stored:>9.4f} {directory / stored:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Hedging Benchmark - Tail latency of QuizGenerator with and without hedged requests
+Runs the same synthetic topics against the mock server with a heavy-tailed (pareto) latency,
+once plainly and once with hedging, and compares per-topic p50/p95/p99, wall time, requests
+sent and the tokens the hedges cost. Hedging starts once the run has MIN_SAMPLES latencies.
+"""
+
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_suite import percentile
+from hedging import HedgeBudget, HEDGE_QUANTILE, HEDGE_MAX_RATE
+from mock_openai_server import MockOpenAIServer
+from quiz_generator import QuizGenerator
+from rate_limiter import RateLimiter
+from synthetic_topics import synthetic_topics
+
+
+async def run_mode(hedge: bool, topics: int, concurrency: int, latency: float, spread: float,
+                   hedge_quantile: float, max_rate: float, seed: int) -> dict:
+    server = MockOpenAIServer(latency=latency, latency_distribution='pareto', latency_spread=spread, seed=seed,
+                              requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+    url = await server.start()
+    latencies = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = QuizGenerator(
+                max_concurrency=concurrency,
+                topics=synthetic_topics(topics, seed),
+                output_dir=Path(tmp),
+                api_url=url,
+                use_cache=False,
+                journal_file=Path(tmp) / 'quiz_jobs.jsonl',
+                hedge=hedge,
+            )
+            generator.api_key = 'mock-key'
+            generator.rate_limiter = RateLimiter(10 ** 6, 10 ** 9)
+            if hedge:
+                # Mock completions take milliseconds, so drop the one-second floor
+                generator.hedging = HedgeBudget(hedge_quantile, max_rate, min_delay=0.0)
+            generator._log = lambda message: None
+            generator._save_log = lambda: None
+            record_result = generator._record_result
+
+            def timed_record(result, elapsed):
+                latencies.append(elapsed)
+                return record_result(result, elapsed)
+
+            generator._record_result = timed_record
+            await generator.generate_all_quizzes()
+            hedging = generator.hedging
+            return {
+                'mode': f"hedged p{hedge_quantile * 100:.0f}" if hedge else 'plain',
+                'generated': generator.generated_count,
+                'seconds': generator.elapsed_seconds,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'requests': server.request_count,
+                'hedged': hedging.fired if hedging else 0,
+                'won': hedging.won if hedging else 0,
+                'hedge_tokens': hedging.hedge_tokens if hedging else 0,
+                'cancelled_tokens': hedging.cancelled_tokens if hedging else 0,
+                'tokens': sum(generator.topic_tokens.values()),
+            }
+    finally:
+        await server.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark hedged requests against a heavy-tailed mock API')
+    parser.add_argument('--topics', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.1, help='Minimum mock seconds per completion')
+    parser.add_argument('--spread', type=float, default=0.7, help='Pareto 1 / alpha - larger is heavier-tailed')
+    parser.add_argument('--quantile', type=float, default=HEDGE_QUANTILE, help='Latency quantile that triggers a hedge')
+    parser.add_argument('--max-rate', type=float, default=HEDGE_MAX_RATE, help='Hedges allowed per request')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'wall s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'requests':>9} "
+          f"{'hedged':>7} {'won':>5} {'billed tok':>11} {'hedge tok':>10} {'cancel tok':>11}")
+    for hedge in (False, True):
+        r = await run_mode(hedge, args.topics, args.concurrency, args.latency, args.spread,
+                           args.quantile, args.max_rate, args.seed)
+        print(f"{r['mode']:<12} {r['seconds']:>7.2f} {r['p50']:>7.3f} {r['p95']:>7.3f} {r['p99']:>7.3f} "
+              f"{r['requests']:>9} {r['hedged']:>7} {r['won']:>5} {r['tokens']:>11} "
+              f"{r['hedge_tokens']:>10} {r['cancelled_tokens']:>11}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
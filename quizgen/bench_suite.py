@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Reproducible offline benchmarks of the generation and TTS stages
+Generation scenarios run QuizGenerator against the mock chat-completions server (lognormal
+latency, injected 429/5xx); TTS scenarios run the encoder pipeline over FakeKokoroTTSService
+at a fixed real-time factor. Topic lists come from synthetic_topics, so every machine runs the
+same corpus. Each scenario runs in its own process so peak RSS is its own.
+
+Results (throughput, p50/p95 per-topic or per-clip latency, peak RSS, clips/sec) are written
+to JSON and compared with a stored baseline; any metric worse than the baseline by more than
+--tolerance is reported and the exit status is 1.
+
+    python bench_suite.py                      # quick scenarios vs bench_baseline.json
+    python bench_suite.py --full               # adds the 10,000-topic corpus
+    python bench_suite.py --update-baseline    # accept the current numbers
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from synthetic_topics import synthetic_topics
+
+BASE_DIR = Path(__file__).parent
+AUDIOGEN_DIR = BASE_DIR.parent / 'audiogen'
+BASELINE_FILE = BASE_DIR / 'bench_baseline.json'
+RESULTS_FILE = BASE_DIR / 'bench_results.json'
+TOLERANCE = 0.25  # Allowed relative slowdown before a metric counts as a regression
+
+SCENARIOS = {
+    'generate-10': {'stage': 'generate', 'topics': 10, 'concurrency': 4},
+    'generate-100': {'stage': 'generate', 'topics': 100, 'concurrency': 16},
+    'generate-10000': {'stage': 'generate', 'topics': 10000, 'concurrency': 64, 'full': True},
+    'tts-10': {'stage': 'tts', 'topics': 10, 'batch_size': 1},
+    'tts-10-batched': {'stage': 'tts', 'topics': 10, 'batch_size': 4},
+    'tts-100': {'stage': 'tts', 'topics': 100, 'batch_size': 4, 'full': True},
+}
+
+# Mock API: median 50 ms per completion with a lognormal tail, 2% injected faults
+MOCK = {'latency': 0.05, 'latency_distribution': 'lognormal', 'latency_spread': 0.5,
+        'fault_rate': 0.02, 'retry_after': 0.05}
+# Fake TTS: 1 s of speech costs 5 ms; audio folders hold 15 questions
+TTS = {'real_time_factor': 0.005, 'questions_per_file': 15, 'encoder_workers': 2, 'queue_depth': 8}
+
+# metric -> which direction is better
+METRICS = {
+    'topics_per_second': 'higher',
+    'clips_per_second': 'higher',
+    'p50_seconds': 'lower',
+    'p95_seconds': 'lower',
+    'peak_rss_mb': 'lower',
+    'failed': 'lower',
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024  # bytes on macOS, KiB elsewhere
+
+
+async def _run_generate(spec: dict, seed: int) -> dict:
+    from mock_openai_server import MockOpenAIServer
+    from quiz_generator import QuizGenerator
+    from rate_limiter import RateLimiter
+    from retry_policy import RetryPolicy, CircuitBreaker
+
+    server = MockOpenAIServer(seed=seed, requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, **MOCK)
+    url = await server.start()
+    latencies = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = QuizGenerator(
+                max_concurrency=spec['concurrency'],
+                topics=synthetic_topics(spec['topics'], seed),
+                output_dir=Path(tmp),
+                api_url=url,
+                cache_dir=Path(tmp) / '.cache',
+                journal_file=Path(tmp) / 'quiz_jobs.jsonl',
+                retry_policy=RetryPolicy(base_delay=0.05, max_delay=1.0, rng=random.Random(seed)),
+            )
+            generator.api_key = 'mock-key'
+            # Limits are the mock's business here; the real ones would make this a rate-limit benchmark
+            generator.rate_limiter = RateLimiter(10 ** 6, 10 ** 9)
+            generator.circuit_breaker = CircuitBreaker(3, 0.5)
+            generator._log = lambda message: None
+            generator._save_log = lambda: None
+            record_result = generator._record_result
+
+            def timed_record(result, elapsed):
+                latencies.append(elapsed)
+                return record_result(result, elapsed)
+
+            generator._record_result = timed_record
+            await generator.generate_all_quizzes()
+            return {
+                'topics': spec['topics'],
+                'generated': generator.generated_count,
+                'failed': len(generator.failed_topics),
+                'seconds': round(generator.elapsed_seconds, 3),
+                'topics_per_second': round(spec['topics'] / generator.elapsed_seconds, 3),
+                'p50_seconds': round(percentile(latencies, 50), 4),
+                'p95_seconds': round(percentile(latencies, 95), 4),
+                'requests': server.request_count,
+                'faults': sum(server.fault_counts.values()),
+            }
+    finally:
+        await server.stop()
+
+
+def _question_text(rng: random.Random, topic: str, number: int) -> str:
+    words = ['which', 'famous', 'clue', 'country', 'decade', 'known', 'first', 'name', 'picture', 'sound']
+    return f"Question {number} about {topic}: " + ' '.join(rng.choices(words, k=rng.randint(4, 18))) + '?'
+
+
+def _run_tts(spec: dict, seed: int) -> dict:
+    sys.path.insert(0, str(AUDIOGEN_DIR))
+    from fake_tts_service import FakeKokoroTTSService, write_wav
+    from tts_pool import TTSJob
+    from tts_batch import BatchedSynthesizer
+    from encode_pipeline import EncoderPipeline, pcm_per_question
+
+    rng = random.Random(seed)
+    service = FakeKokoroTTSService(real_time_factor=TTS['real_time_factor'], seed=seed)
+    voices = ['af_heart', 'am_michael', 'bf_emma']
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.time()
+        for index, topic in enumerate(synthetic_topics(spec['topics'], seed)):
+            # One audio folder per topic, one voice per folder - as audio_generator does it
+            folder = Path(tmp) / f"topic_{index}"
+            folder.mkdir()
+            voice = voices[index % len(voices)]
+            jobs = [TTSJob(f"topic_{index}.json", number, _question_text(rng, topic, number), voice,
+                           str(folder / f"question_{number}.wav"))
+                    for number in range(1, TTS['questions_per_file'] + 1)]
+            if spec['batch_size'] > 1:
+                producer = BatchedSynthesizer(service, spec['batch_size']).iter_pcm(jobs)
+            else:
+                producer = pcm_per_question(service, jobs)
+            pipeline = EncoderPipeline(TTS['encoder_workers'], TTS['queue_depth'], encoder=write_wav)
+            results.extend(pipeline.run(producer))
+        seconds = time.time() - start
+
+    clip_seconds = [r.seconds for r in results if r.success]
+    audio = sum((r.clip or {}).get('duration', 0.0) for r in results if r.success)
+    return {
+        'topics': spec['topics'],
+        'clips': len(results),
+        'failed': sum(not r.success for r in results),
+        'seconds': round(seconds, 3),
+        'clips_per_second': round(len(results) / seconds, 3),
+        'p50_seconds': round(percentile(clip_seconds, 50), 4),
+        'p95_seconds': round(percentile(clip_seconds, 95), 4),
+        'audio_seconds': round(audio, 1),
+        'real_time_speedup': round(audio / seconds, 1),
+    }
+
+
+def run_scenario(name: str, seed: int = 0) -> dict:
+    """Run one scenario in this process and return its metrics"""
+    spec = SCENARIOS[name]
+    if spec['stage'] == 'generate':
+        result = asyncio.run(_run_generate(spec, seed))
+    else:
+        result = _run_tts(spec, seed)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_isolated(name: str, seed: int = 0) -> dict:
+    """Run a scenario in a fresh process, so peak RSS isn't inherited from earlier scenarios"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_scenario, name, seed).result()
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = TOLERANCE) -> List[str]:
+    """Regressions of `results` against `baseline`, one line each (empty when none)"""
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, better in METRICS.items():
+            if metric not in metrics or metric not in expected:
+                continue
+            value, reference = metrics[metric], expected[metric]
+            if metric == 'failed':
+                worse = value > reference  # Counts - no tolerance
+            elif better == 'higher':
+                worse = value < reference * (1 - tolerance)
+            else:
+                worse = value > reference * (1 + tolerance)
+            if worse:
+                regressions.append(f"{name}: {metric} {value} vs baseline {reference}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the offline benchmark scenarios and check for regressions')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), help='Scenarios to run (default: quick set)')
+    parser.add_argument('--full', action='store_true', help='Include the large scenarios (10,000 topics)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE, help='Where to write the results JSON')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed relative regression (0.25 = 25%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    args = parser.parse_args()
+
+    names = args.scenarios or [name for name, spec in SCENARIOS.items() if args.full or not spec.get('full')]
+    results = {}
+    print(f"{'scenario':<16} {'per sec':>9} {'p50 s':>8} {'p95 s':>8} {'rss MB':>8} {'failed':>7} {'seconds':>8}")
+    for name in names:
+        r = results[name] = run_isolated(name, args.seed)
+        rate = r.get('topics_per_second', r.get('clips_per_second'))
+        print(f"{name:<16} {rate:>9.1f} {r['p50_seconds']:>8.3f} {r['p95_seconds']:>8.3f} "
+              f"{r['peak_rss_mb']:>8.1f} {r['failed']:>7} {r['seconds']:>8.2f}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()}",
+        'seed': args.seed,
+        'scenarios': results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"\n📝 Results written to {args.output}")
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8')) if args.baseline.exists() else {}
+        report['scenarios'] = {**baseline.get('scenarios', {}), **results}
+        args.baseline.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"📌 Baseline updated: {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"⚠️  No baseline at {args.baseline} - run with --update-baseline to store one")
+        return
+
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8'))['scenarios'],
+                          args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline.name}")
+
+
+if __name__ == '__main__':
+    main()
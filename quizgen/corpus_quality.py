@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Corpus Quality - Whole-corpus checks for generated quizzes
+Loads every quiz in QuizzesOp / quizz_segregated into columnar numpy arrays, finds
+near-duplicate questions with MinHash + LSH banding (no all-pairs comparison) and flags
+duplicate options, answers with odd casing / whitespace and length-giveaway answers.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+
+BASE_DIR = Path(__file__).parent
+DEFAULT_DIRS = [BASE_DIR / 'QuizzesOp', BASE_DIR / 'quizz_segregated']
+
+SHINGLE_CHARS = 5  # Character n-grams - questions are too short for word shingles
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: candidate pairs from ~0.5 estimated Jaccard
+DUPLICATE_THRESHOLD = 0.7  # Minimum estimated Jaccard for a reported near-duplicate
+LENGTH_GIVEAWAY_RATIO = 1.5  # Answer this many times longer than every distractor...
+LENGTH_GIVEAWAY_MIN_CHARS = 8  # ...and at least this many characters longer
+OPTIONS_PER_QUESTION = 3
+
+_ASCII_PUNCT_SPACE = re.compile(r'[\s!-/:-@\[-`{-~]+')  # Emoji and non-Latin text survive
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, punctuation-free, single-spaced form used for comparisons"""
+    return _ASCII_PUNCT_SPACE.sub(' ', text.lower()).strip()
+
+
+def _normalize_option(text: str) -> str:
+    return _SPACES.sub(' ', text).strip().casefold()
+
+
+def _has_odd_whitespace(text: str) -> bool:
+    return text != text.strip() or '  ' in text
+
+
+class QuizCorpus:
+    """Every question of a set of quiz files as parallel arrays (one row per question)"""
+
+    def __init__(self, records: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        files: Dict[str, int] = {}
+        file_idx, locations, questions, answers, options, option_counts = [], [], [], [], [], []
+        for source, location, q in records:
+            file_idx.append(files.setdefault(source, len(files)))
+            locations.append(location)
+            questions.append(str(q.get('question', '')))
+            answers.append(str(q.get('answer', '')))
+            opts = [str(o) for o in q.get('options', [])]
+            option_counts.append(len(opts))
+            options.append((opts + [''] * OPTIONS_PER_QUESTION)[:OPTIONS_PER_QUESTION])
+
+        self.files = list(files)
+        self.file_idx = np.array(file_idx, dtype=np.int32)
+        self.locations = locations
+        self.questions = questions
+        self.answers = answers
+        self.options = options
+        self.option_counts = np.array(option_counts, dtype=np.int16)
+        self.normalized = [normalize_text(q) for q in questions]
+
+        flat = [o for row in options for o in row]
+        shape = (len(options), OPTIONS_PER_QUESTION)
+        self.option_lengths = np.fromiter(map(len, flat), dtype=np.int32, count=len(flat)).reshape(shape)
+        norm_options = [_normalize_option(o) for o in flat]
+        norm_answers = [_normalize_option(a) for a in answers]
+        # Small integer ids make the option / answer comparisons plain numpy equality tests
+        vocab: Dict[str, int] = {}
+        self.option_ids = np.array([vocab.setdefault(o, len(vocab)) for o in norm_options],
+                                   dtype=np.int64).reshape(shape)
+        self.answer_ids = np.array([vocab.setdefault(a, len(vocab)) for a in norm_answers], dtype=np.int64)
+        self.option_exact = np.array([a == o for a, row in zip(answers, options) for o in row],
+                                     dtype=bool).reshape(shape)
+        self.odd_whitespace = np.array([_has_odd_whitespace(a) or any(map(_has_odd_whitespace, row))
+                                        for a, row in zip(answers, options)], dtype=bool)
+        self.option_ids[self.option_lengths == 0] = -1  # Padding never matches anything
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def describe(self, index: int) -> Dict[str, Any]:
+        return {
+            'file': self.files[self.file_idx[index]],
+            'location': self.locations[index],
+            'question': self.questions[index],
+        }
+
+
+def iter_quiz_file(path: Path) -> Iterable[Tuple[str, str, Dict[str, Any]]]:
+    """(file, location, question) for a QuizzesOp ({difficulty: [...]}) or segregated ([...]) quiz"""
+    with open(path, 'r', encoding='utf-8') as f:
+        quiz = json.load(f).get('quiz', {})
+    name = path.name
+    if isinstance(quiz, dict):
+        for difficulty, items in quiz.items():
+            for idx, q in enumerate(items, 1):
+                yield name, f"{difficulty}#{idx}", q
+    else:
+        for idx, q in enumerate(quiz, 1):
+            yield name, f"q{q.get('question_id', idx)}", q
+
+
+def load_corpus(directory: Path) -> QuizCorpus:
+    def records():
+        for path in sorted(Path(directory).glob('*.json')):
+            try:
+                yield from iter_quiz_file(path)
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Skipping unreadable {path.name}: {e}", file=sys.stderr)
+    return QuizCorpus(records())
+
+
+# Near-duplicate detection
+
+def minhash_signatures(texts: List[str], num_perm: int = NUM_PERMUTATIONS,
+                       shingle: int = SHINGLE_CHARS, seed: int = 1) -> np.ndarray:
+    """(len(texts), num_perm) MinHash signatures over character shingles, fully in numpy"""
+    encoded = [t.ljust(shingle).encode('utf-8') for t in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    # Pack every `shingle`-byte window into one integer, then keep windows inside a single text
+    windows = np.zeros(len(buf) - shingle + 1, dtype=np.uint64)
+    for j in range(shingle):
+        windows |= buf[j:len(buf) - shingle + 1 + j] << np.uint64(8 * j)
+    owner = np.repeat(np.arange(len(texts)), lengths)[:len(windows)]
+    valid = np.arange(len(windows)) - starts[owner] <= lengths[owner] - shingle
+    windows, owner = windows[valid], owner[valid]
+    group_starts = np.searchsorted(owner, np.arange(len(texts)))
+
+    # Mix each window down to 32 bits once; the permutations are then cheap uint32 affine maps
+    base = ((windows * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.uint32)
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint32) | np.uint32(1)
+    offsets = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint32)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    hashed = np.empty_like(base)
+    for p in range(num_perm):
+        np.multiply(base, multipliers[p], out=hashed)  # wraps mod 2**32
+        hashed += offsets[p]
+        signatures[:, p] = np.minimum.reduceat(hashed, group_starts)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = LSH_BANDS) -> np.ndarray:
+    """(k, 2) index pairs sharing at least one LSH band - each bucket is linked to its first member"""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    mix = np.random.default_rng(0).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    pairs = []
+    for b in range(bands):
+        keys = (signatures[:, b * rows:(b + 1) * rows].astype(np.uint64) * mix).sum(axis=1)  # wraps mod 2**64
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        leader = order[np.maximum.accumulate(np.where(new_bucket, np.arange(n), 0))]
+        members = ~new_bucket
+        pairs.append(np.stack([leader[members], order[members]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs)
+    return np.unique(np.sort(pairs, axis=1), axis=0)
+
+
+def find_near_duplicates(corpus: QuizCorpus, threshold: float = DUPLICATE_THRESHOLD) -> List[Dict[str, Any]]:
+    """Clusters of repeated questions: identical after normalization, or at least `threshold`
+    estimated Jaccard similar *and* sharing an answer. The answer check keeps templated
+    questions ("What is the full form of FBI?" / "...of HIV?") from being reported."""
+    if len(corpus) < 2:
+        return []
+    signatures = minhash_signatures(corpus.normalized)
+    pairs = lsh_candidate_pairs(signatures)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    same_text = np.array([corpus.normalized[a] == corpus.normalized[b] for a, b in pairs.tolist()], dtype=bool)
+    same_answer = corpus.answer_ids[pairs[:, 0]] == corpus.answer_ids[pairs[:, 1]]
+    keep = same_text | ((similarity >= threshold) & same_answer)
+    pairs, similarity = pairs[keep], similarity[keep]
+
+    parent = list(range(len(corpus)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs.tolist():
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    members: Dict[int, List[int]] = {}
+    for i in np.unique(pairs).tolist():
+        members.setdefault(find(i), []).append(i)
+    best: Dict[int, float] = {}
+    for (a, _), sim in zip(pairs.tolist(), similarity.tolist()):
+        root = find(a)
+        best[root] = min(best.get(root, 1.0), sim)
+
+    clusters = []
+    for root, indices in members.items():
+        exact = len({corpus.normalized[i] for i in indices}) == 1
+        clusters.append({
+            'size': len(indices),
+            'exact': exact,
+            'cross_file': len({int(corpus.file_idx[i]) for i in indices}) > 1,
+            'min_similarity': 1.0 if exact else round(best[root], 3),
+            'questions': [corpus.describe(i) for i in indices],
+        })
+    clusters.sort(key=lambda c: (-c['size'], c['questions'][0]['file']))
+    return clusters
+
+
+# Per-question checks (vectorized over the whole corpus)
+
+def check_questions(corpus: QuizCorpus) -> Dict[str, np.ndarray]:
+    """Boolean mask per issue, one entry per question"""
+    ids = corpus.option_ids
+    matches = (ids == corpus.answer_ids[:, None]) & (ids >= 0)
+    has_answer = matches.any(axis=1)
+
+    # Answer length against the longest distractor
+    lengths = corpus.option_lengths
+    answer_col = matches.argmax(axis=1)
+    rows = np.arange(len(corpus))
+    answer_len = lengths[rows, answer_col]
+    distractors = lengths.copy()
+    distractors[rows, answer_col] = -1
+    longest_other = distractors.max(axis=1)
+
+    return {
+        'option_count': corpus.option_counts != OPTIONS_PER_QUESTION,
+        'duplicate_options': ((ids[:, 0] == ids[:, 1]) | (ids[:, 0] == ids[:, 2]) | (ids[:, 1] == ids[:, 2]))
+                             & (ids >= 0).all(axis=1),
+        'answer_not_in_options': ~has_answer,
+        'answer_casing': has_answer & ~corpus.option_exact.any(axis=1),
+        'odd_whitespace': corpus.odd_whitespace,
+        'length_giveaway': has_answer & (longest_other > 0)
+                           & (answer_len >= LENGTH_GIVEAWAY_RATIO * longest_other)
+                           & (answer_len - longest_other >= LENGTH_GIVEAWAY_MIN_CHARS),
+    }
+
+
+def analyze(corpus: QuizCorpus, threshold: float = DUPLICATE_THRESHOLD) -> Dict[str, Any]:
+    """Full quality report for one corpus"""
+    issues = check_questions(corpus)
+    return {
+        'questions': len(corpus),
+        'files': len(corpus.files),
+        'issues': {name: [corpus.describe(i) for i in np.flatnonzero(mask).tolist()]
+                   for name, mask in issues.items()},
+        'duplicate_clusters': find_near_duplicates(corpus, threshold),
+    }
+
+
+def print_report(name: str, report: Dict[str, Any], examples: int = 5):
+    print(f"\n{name}: {report['questions']} questions in {report['files']} files")
+    for issue, found in report['issues'].items():
+        print(f"  {issue:<22} {len(found)}")
+        for item in found[:examples]:
+            print(f"      {item['file']} {item['location']}: {item['question'][:80]}")
+    clusters = report['duplicate_clusters']
+    cross = sum(c['cross_file'] for c in clusters)
+    print(f"  {'duplicate_clusters':<22} {len(clusters)} ({cross} spanning files, "
+          f"{sum(c['size'] for c in clusters)} questions)")
+    for cluster in clusters[:examples]:
+        kind = 'exact' if cluster['exact'] else f"~{cluster['min_similarity']:.2f}"
+        print(f"      [{kind}] " + ' | '.join(f"{q['file']} {q['location']}: {q['question'][:50]}"
+                                              for q in cluster['questions'][:3]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check quiz corpora for duplicates and answer/option problems')
+    parser.add_argument('dirs', nargs='*', type=Path, default=DEFAULT_DIRS,
+                        help='Quiz directories, each checked as its own corpus (default: QuizzesOp, quizz_segregated)')
+    parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                        help='Minimum estimated Jaccard similarity for near-duplicates')
+    parser.add_argument('--json', type=Path, help='Write the full report to this file')
+    parser.add_argument('--examples', type=int, default=5, help='Examples printed per issue')
+    parser.add_argument('--store', action='store_true',
+                        help='Check the source and segregated views of corpus_store.py instead of directories')
+    args = parser.parse_args()
+
+    if args.store:
+        from corpus_store import CorpusStore
+        store = CorpusStore()
+        sources = [(f"store:{view}", lambda view=view: QuizCorpus(store.records(view)))
+                   for view in ('source', 'segregated')]
+    else:
+        sources = [(directory, lambda directory=directory: load_corpus(directory)) for directory in args.dirs]
+
+    reports = {}
+    for source, load in sources:
+        start = time.time()
+        corpus = load()
+        reports[str(source)] = report = analyze(corpus, args.threshold)
+        print_report(Path(source).name if isinstance(source, Path) else source, report, args.examples)
+        print(f"  checked in {time.time() - start:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"\nFull report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Corpus Store - every quiz question in one indexed SQLite file
+The same questions otherwise live as indent-2 JSON in QuizzesOp, quizz_segregated,
+quizz_segregated_backup, 'lines for audio ' and 'videogen/quiz jsons'. The store keeps each
+file once per collection (source quizzes, segregated chunks, the backup chunks) as a row of
+compact JSON indexed by name and by (topic, chunk), and renders any of today's layouts on demand:
+
+    source      QuizzesOp/<topic>.json                {'quiz': {difficulty: [question, ...]}}
+    segregated  quizz_segregated/<topic>.<n>.json     {'quiz': [{question_id, question, options, answer}]}
+                (videogen/quiz jsons holds the same files)
+    audio       lines for audio /<topic>.<n>.json     {'quiz': [{question_id, question}]}
+    backup      quizz_segregated_backup/<topic>.<n>.json
+
+Reads are lazy: loading one chunk is one index lookup and one parse of ~3 KB of compact JSON,
+listing chunks reads only the index, and the file is memory-mapped so hot pages are shared
+between processes. One store replaces the five directories (~12 MB of indent-2 JSON).
+
+    python corpus_store.py import                   # QuizzesOp, quizz_segregated, backup -> corpus.sqlite
+    python corpus_store.py check                    # Exported views byte-identical to the directories?
+    python corpus_store.py export audio /tmp/lines  # Recreate a layout anywhere
+    python corpus_store.py show "Famous Business Rivalries.1.json" --view audio
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).parent
+CORPUS_STORE_PATH = Path(os.getenv('CORPUS_STORE_PATH', BASE_DIR / 'corpus.sqlite'))
+MMAP_BYTES = 256 * 1024 * 1024
+
+# view -> (collection its rows live in, directory holding the layout today)
+VIEWS = {
+    'source': ('source', BASE_DIR / 'QuizzesOp'),
+    'segregated': ('segregated', BASE_DIR / 'quizz_segregated'),
+    'audio': ('segregated', BASE_DIR / 'lines for audio '),  # Trailing space is part of the folder name
+    'backup': ('backup', BASE_DIR / 'quizz_segregated_backup'),
+}
+IMPORTABLE_VIEWS = ('source', 'segregated', 'backup')  # 'audio' is derived from segregated
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    collection TEXT NOT NULL,
+    name TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics (id),
+    chunk INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    body TEXT NOT NULL,
+    UNIQUE (collection, name)
+);
+CREATE INDEX IF NOT EXISTS files_by_topic ON files (collection, topic_id, chunk);
+"""
+
+
+def split_name(view: str, name: str) -> Tuple[str, int]:
+    """(topic, chunk) of a layout file name; source quizzes are chunk 0"""
+    stem = name[:-5] if name.endswith('.json') else name
+    if VIEWS[view][0] == 'source':
+        return stem, 0
+    topic, _, chunk = stem.rpartition('.')
+    if not topic or not chunk.isdigit():
+        raise ValueError(f"'{name}' is not a <topic>.<n>.json chunk name")
+    return topic, int(chunk)
+
+
+def render_json(data: Any) -> str:
+    """Exactly what the generator and segregator write (indent 2, UTF-8, no trailing newline)"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+class CorpusStore:
+    """Indexed, lazily read quiz corpus with import/export to the JSON directory layouts"""
+
+    def __init__(self, path: Path = CORPUS_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        self.conn.executescript(SCHEMA)
+
+    # Reading
+
+    def topics(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM topics ORDER BY name")]
+
+    def names(self, view: str = 'segregated', topic: Optional[str] = None) -> List[str]:
+        """File names of a layout sorted like a directory listing (or one topic's, in chunk order)"""
+        collection = VIEWS[view][0]
+        if topic is None:
+            rows = self.conn.execute("SELECT name FROM files WHERE collection = ? ORDER BY name", (collection,))
+        else:
+            rows = self.conn.execute("SELECT f.name FROM files f JOIN topics t ON t.id = f.topic_id "
+                                     "WHERE f.collection = ? AND t.name = ? ORDER BY f.chunk", (collection, topic))
+        return [row[0] for row in rows]
+
+    def _body(self, view: str, name: str) -> Optional[str]:
+        if not name.endswith('.json'):
+            name += '.json'
+        row = self.conn.execute("SELECT body FROM files WHERE collection = ? AND name = ?",
+                                (VIEWS[view][0], name)).fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _view(view: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        if view == 'audio':
+            return {'quiz': [{'question_id': q['question_id'], 'question': q['question']} for q in data['quiz']]}
+        return data
+
+    def load(self, view: str, name: str) -> Optional[Dict[str, Any]]:
+        """One file of a layout as json.load would return it, or None if it isn't stored"""
+        body = self._body(view, name)
+        return None if body is None else self._view(view, json.loads(body))
+
+    def render(self, view: str, name: str) -> Optional[str]:
+        """The file's exact text in that layout"""
+        data = self.load(view, name)
+        return None if data is None else render_json(data)
+
+    def question(self, view: str, name: str, question_id: int) -> Optional[Dict[str, Any]]:
+        """One question of a chunk by question_id (source quizzes: 1-based position across difficulties)"""
+        data = self.load(view, name)
+        if data is None:
+            return None
+        if isinstance(data['quiz'], dict):
+            questions = [q for items in data['quiz'].values() for q in items]
+            return questions[question_id - 1] if 0 < question_id <= len(questions) else None
+        return next((q for q in data['quiz'] if q.get('question_id') == question_id), None)
+
+    def records(self, view: str = 'segregated') -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(file, location, question) for every question of a layout in one scan (corpus_quality input)"""
+        rows = self.conn.execute("SELECT name, body FROM files WHERE collection = ? ORDER BY name",
+                                 (VIEWS[view][0],))
+        for name, body in rows:
+            quiz = self._view(view, json.loads(body))['quiz']
+            if isinstance(quiz, dict):
+                for difficulty, items in quiz.items():
+                    for idx, q in enumerate(items, 1):
+                        yield name, f"{difficulty}#{idx}", q
+            else:
+                for idx, q in enumerate(quiz, 1):
+                    yield name, f"q{q.get('question_id', idx)}", q
+
+    # Writing
+
+    def _topic_id(self, topic: str) -> int:
+        self.conn.execute("INSERT OR IGNORE INTO topics (name) VALUES (?)", (topic,))
+        return self.conn.execute("SELECT id FROM topics WHERE name = ?", (topic,)).fetchone()[0]
+
+    @staticmethod
+    def _count(view: str, data: Dict[str, Any]) -> int:
+        """Questions in a file, after checking it has the layout's shape"""
+        quiz = data.get('quiz') if isinstance(data, dict) else None
+        if VIEWS[view][0] == 'source':
+            if not isinstance(quiz, dict) or not all(isinstance(v, list) for v in quiz.values()):
+                raise ValueError("source quizzes need {'quiz': {difficulty: [...]}}")
+            return sum(len(items) for items in quiz.values())
+        if not isinstance(quiz, list) or not all(isinstance(q, dict) and 'question_id' in q for q in quiz):
+            raise ValueError("chunks need {'quiz': [{'question_id': ...}, ...]}")
+        return len(quiz)
+
+    def put(self, view: str, name: str, data: Dict[str, Any], sha256: Optional[str] = None):
+        """Store (or replace) one file of an importable layout"""
+        if view not in IMPORTABLE_VIEWS:
+            raise ValueError(f"Only {', '.join(IMPORTABLE_VIEWS)} can be stored ('{view}' is derived)")
+        topic, chunk = split_name(view, name)
+        name = f"{name[:-5] if name.endswith('.json') else name}.json"
+        questions = self._count(view, data)
+        sha256 = sha256 or hashlib.sha256(render_json(data).encode('utf-8')).hexdigest()
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        self.conn.execute("INSERT OR IGNORE INTO topics (name) VALUES (?)", (topic,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (collection, name, topic_id, chunk, questions, sha256, body) "
+            "VALUES (?, ?, (SELECT id FROM topics WHERE name = ?), ?, ?, ?, ?)",
+            (VIEWS[view][0], name, topic, chunk, questions, sha256, body))
+
+    def remove(self, view: str, name: str) -> bool:
+        if not name.endswith('.json'):
+            name += '.json'
+        return self.conn.execute("DELETE FROM files WHERE collection = ? AND name = ?",
+                                 (VIEWS[view][0], name)).rowcount == 1
+
+    def import_directory(self, view: str, directory: Optional[Path] = None, prune: bool = True) -> Dict[str, int]:
+        """Mirror a layout directory into the store; files whose hash is unchanged aren't re-parsed"""
+        directory = Path(directory or VIEWS[view][1])
+        collection = VIEWS[view][0]
+        known = dict(self.conn.execute("SELECT name, sha256 FROM files WHERE collection = ?", (collection,)))
+        counts = {'imported': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        seen = set()
+        self.conn.execute("BEGIN IMMEDIATE")  # One transaction: readers see the old or the new directory
+        try:
+            for path in sorted(directory.glob('*.json')):
+                seen.add(path.name)
+                raw = path.read_bytes()
+                sha256 = hashlib.sha256(raw).hexdigest()
+                if known.get(path.name) == sha256:
+                    counts['unchanged'] += 1
+                    continue
+                try:
+                    self.put(view, path.name, json.loads(raw), sha256)
+                    counts['imported'] += 1
+                except ValueError as e:
+                    print(f"⚠️  Skipping {path.name}: {e}")
+                    counts['failed'] += 1
+            if prune:
+                for name in set(known) - seen:
+                    counts['removed'] += self.remove(view, name)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def export(self, view: str, directory: Path) -> int:
+        """Write every file of a layout into `directory`; returns the number written"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        names = self.names(view)
+        for name in names:
+            tmp_path = directory / f"{name}.tmp"
+            tmp_path.write_text(self.render(view, name), encoding='utf-8')
+            os.replace(tmp_path, directory / name)
+        return len(names)
+
+    def check(self, view: str, directory: Optional[Path] = None) -> Dict[str, List[str]]:
+        """Compare a layout directory with what the store renders for it"""
+        directory = Path(directory or VIEWS[view][1])
+        on_disk = {path.name for path in directory.glob('*.json')}
+        stored = set(self.names(view))
+        differ = [name for name in sorted(on_disk & stored)
+                  if (directory / name).read_text(encoding='utf-8') != self.render(view, name)]
+        return {'differ': differ, 'missing': sorted(on_disk - stored), 'extra': sorted(stored - on_disk)}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {collection: {'files': files, 'questions': questions} for collection, files, questions in
+                self.conn.execute("SELECT collection, COUNT(*), SUM(questions) FROM files GROUP BY collection")}
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import, export and inspect the quiz corpus store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='Mirror layout directories into the store')
+    imp.add_argument('views', nargs='*', metavar='VIEW', help=f"Any of {', '.join(IMPORTABLE_VIEWS)} (default: all)")
+    imp.add_argument('--dir', type=Path, help="Directory to import (default: the view's usual folder)")
+    exp = sub.add_parser('export', help='Write a layout from the store')
+    exp.add_argument('view', choices=list(VIEWS))
+    exp.add_argument('directory', type=Path)
+    chk = sub.add_parser('check', help='Verify the store reproduces layout directories byte for byte')
+    chk.add_argument('views', nargs='*', metavar='VIEW', help=f"Any of {', '.join(VIEWS)} (default: all)")
+    chk.add_argument('--dir', type=Path, help="Directory to compare (default: the view's usual folder)")
+    show = sub.add_parser('show', help='Print one file as the store renders it')
+    show.add_argument('name')
+    show.add_argument('--view', choices=list(VIEWS), default='segregated')
+    sub.add_parser('stats', help='Files and questions per collection')
+    parser.add_argument('--store', type=Path, default=CORPUS_STORE_PATH)
+    args = parser.parse_args()
+    allowed = IMPORTABLE_VIEWS if args.command == 'import' else VIEWS
+    for view in getattr(args, 'views', None) or []:
+        if view not in allowed:
+            parser.error(f"unknown view '{view}' (choose from {', '.join(allowed)})")
+
+    store = CorpusStore(args.store)
+    try:
+        if args.command == 'import':
+            for view in args.views or IMPORTABLE_VIEWS:
+                counts = store.import_directory(view, args.dir)
+                print(f"📥 {view:<10} " + "  ".join(f"{k} {v}" for k, v in counts.items()))
+        elif args.command == 'export':
+            print(f"📤 {store.export(args.view, args.directory)} files written to {args.directory}")
+        elif args.command == 'check':
+            for view in args.views or VIEWS:
+                result = store.check(view, args.dir)
+                status = '✅' if not any(result.values()) else '❌'
+                print(f"{status} {view:<10} " + "  ".join(f"{k} {len(v)}" for k, v in result.items()))
+                for kind, names in result.items():
+                    for name in names[:5]:
+                        print(f"     {kind}: {name}")
+        elif args.command == 'show':
+            text = store.render(args.view, args.name)
+            print(text if text is not None else f"❌ {args.name} is not in the {args.view} view")
+        else:
+            for collection, counts in store.stats().items():
+                print(f"{collection:<10} files {counts['files']:>6}  questions {counts['questions']:>7}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
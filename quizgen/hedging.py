@@ -0,0 +1,47 @@
+"""
+Hedging - Duplicate slow requests to cut the tail of quiz generation
+A request still unanswered after the rolling p90 (HEDGE_QUANTILE) of past latencies for its
+size gets a duplicate; the first successful answer wins and the other request is cancelled.
+Hedges take a reservation from the shared RPM/TPM limiter like any request, and at most
+`max_rate` of all requests may be hedged so a slow API doesn't double the load on itself.
+"""
+
+from typing import Optional
+
+from token_budget import UsageHistory, MIN_SAMPLES, quantile
+
+HEDGE_QUANTILE = 0.9
+HEDGE_MAX_RATE = 0.1  # Hedges allowed per request sent
+HEDGE_MIN_DELAY = 1.0  # Seconds - never hedge a request faster than this
+
+
+class HedgeBudget:
+    """When to hedge, how often it is allowed, and what it cost"""
+
+    def __init__(self, hedge_quantile: float = HEDGE_QUANTILE, max_rate: float = HEDGE_MAX_RATE,
+                 min_delay: float = HEDGE_MIN_DELAY):
+        self.quantile = hedge_quantile
+        self.max_rate = max_rate
+        self.min_delay = min_delay
+        self.requests = 0  # Primary requests sent
+        self.fired = 0
+        self.won = 0  # Hedges that answered before their primary
+        self.hedge_tokens = 0  # Billed by hedges that won
+        self.cancelled_tokens = 0  # Reserved by cancelled losers - an upper bound on what they were billed
+
+    def delay(self, history: UsageHistory, version: str, questions: int) -> Optional[float]:
+        """Seconds to wait before hedging a `questions`-question request (None = not enough history)"""
+        samples = history.latency.get(version, ())
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return max(self.min_delay, quantile(samples, self.quantile) * questions)
+
+    def allow(self) -> bool:
+        return self.fired < max(1, int(self.max_rate * self.requests))
+
+    def summary(self) -> str:
+        rate = self.fired / self.requests if self.requests else 0.0
+        won = self.won / self.fired if self.fired else 0.0
+        return (f"{self.fired} of {self.requests} requests hedged ({rate:.1%}), hedge won {self.won} ({won:.0%}); "
+                f"tokens billed by winning hedges {self.hedge_tokens}, "
+                f"reserved by cancelled requests {self.cancelled_tokens}")
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Instrumentation - counters, histograms, gauges and span timings for the generators
+quiz_generator and audio_generator record into one process-wide registry. With a metrics
+directory configured (--metrics-dir or METRICS_DIR) the registry is written as
+    <dir>/<service>.prom          Prometheus/OpenMetrics text (node_exporter textfile format)
+    <dir>/<service>.trace.jsonl   one Chrome trace event per finished span
+every METRICS_INTERVAL seconds and at exit. Without one, recording still works (it's a dict
+update under a lock) and nothing is written.
+
+    python instrumentation.py chrome metrics/quizgen.trace.jsonl   # -> .trace.json for Perfetto / chrome://tracing
+    python instrumentation.py summary metrics/audiogen.trace.jsonl # where the time went, per span name
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import asyncio
+import argparse
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', '15'))  # Seconds between .prom rewrites / trace flushes
+TRACE_BUFFER = 512  # Finished spans held in memory before they're appended to the trace file
+
+# Seconds - from a cache hit to a six-minute generation request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RATIO_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self.values: Dict[LabelKey, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] += amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+    def exposition(self) -> List[str]:
+        return [f"{self.name}_total{_format_labels(key)} {_format_value(value)}"
+                for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = value
+
+    def exposition(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = lock
+        # Per label set: [count per bucket (last one is +Inf), sum, count]
+        self.series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self.series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def total(self, **labels) -> float:
+        series = self.series.get(_label_key(labels))
+        return series[1] if series else 0.0
+
+    def exposition(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+def _track_id() -> int:
+    """Chrome trace 'thread' for a span: the asyncio task when inside one, else the OS thread.
+    Concurrent topics on one event loop then show up as separate rows instead of overlapping."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Span:
+    """Times a block; the finished span goes to the trace (if one is being written)"""
+    __slots__ = ('registry', 'name', 'args', 'start', 'wall_start', 'seconds')
+
+    def __init__(self, registry: 'Registry', name: str, args: Dict[str, object]):
+        self.registry = registry
+        self.name = name
+        self.args = args
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.registry.event(self.name, self.wall_start, self.seconds, **self.args)
+        return False
+
+
+class Registry:
+    """Every metric of one process, plus its buffered trace events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, object] = {}
+        self.service = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+        self.directory: Optional[Path] = None
+        self._events: List[str] = []
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, self._lock, **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = '') -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = '', buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def span(self, name: str, **args) -> Span:
+        return Span(self, name, args)
+
+    def event(self, name: str, started: float, seconds: float, **args):
+        """Add a span that was timed elsewhere (e.g. in a worker process); `started` is time.time()"""
+        if self.directory is None:
+            return
+        event = json.dumps({'name': name, 'cat': self.service, 'ph': 'X',
+                            'ts': int(started * 1e6), 'dur': int(seconds * 1e6),
+                            'pid': os.getpid(), 'tid': _track_id(), 'args': args}, default=str)
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= TRACE_BUFFER
+        if full:
+            self.flush_trace()
+
+    # Output
+
+    @property
+    def prom_path(self) -> Path:
+        return self.directory / f"{self.service}.prom"
+
+    @property
+    def trace_path(self) -> Path:
+        return self.directory / f"{self.service}.trace.jsonl"
+
+    def configure(self, service: str, directory: Optional[str] = None):
+        """Name this process's output and start writing it if a directory is given (or METRICS_DIR)"""
+        self.service = service
+        directory = directory or METRICS_DIR
+        if not directory or self.directory is not None:
+            return
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def exposition(self) -> str:
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self.metrics.items()):
+                if metric.help:
+                    lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                lines.extend(metric.exposition())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self):
+        """Atomically replace <service>.prom, so a scraper never reads half a file"""
+        if self.directory is None:
+            return
+        tmp = self.prom_path.with_name(self.prom_path.name + f'.{os.getpid()}.tmp')
+        tmp.write_text(self.exposition(), encoding='utf-8')
+        os.replace(tmp, self.prom_path)
+
+    def flush_trace(self):
+        with self._lock:
+            events, self._events = self._events, []
+        if events and self.directory is not None:
+            # One append per flush; O_APPEND keeps concurrent processes' lines whole
+            with open(self.trace_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(events) + '\n')
+
+    def _write_loop(self):
+        while not self._stop.wait(METRICS_INTERVAL):
+            try:
+                self.write_prometheus()
+                self.flush_trace()
+            except OSError as e:
+                print(f"⚠️  Could not write metrics: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self.directory is not None:
+            self.write_prometheus()
+            self.flush_trace()
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+span = REGISTRY.span
+event = REGISTRY.event
+configure = REGISTRY.configure
+
+
+# Trace tools
+
+def read_trace(path: Path) -> Iterable[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def to_chrome_trace(events: Iterable[dict]) -> dict:
+    """Trace events as a Chrome trace document (opens in Perfetto / chrome://tracing with a flame view)"""
+    events = list(events)
+    tracks = {}
+    for event in events:
+        # Task ids are huge and meaningless - renumber each process's tracks from 1
+        event['tid'] = tracks.setdefault((event['pid'], event['tid']), len(tracks) + 1)
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def summarize_trace(events: Iterable[dict]) -> List[Tuple[str, int, float, float]]:
+    """(span name, count, total seconds, max seconds), most total time first"""
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for event in events:
+        entry = totals[event['name']]
+        seconds = event['dur'] / 1e6
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+    return sorted(((name, n, total, longest) for name, (n, total, longest) in totals.items()),
+                  key=lambda row: row[2], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert or summarize a JSONL span trace')
+    parser.add_argument('command', choices=['chrome', 'summary'], help='chrome: write a Chrome trace JSON; summary: time per span')
+    parser.add_argument('trace', type=Path, help='A <service>.trace.jsonl file')
+    parser.add_argument('-o', '--output', type=Path, help='Chrome trace output (default: next to the input, .json)')
+    args = parser.parse_args()
+
+    events = read_trace(args.trace)
+    if args.command == 'chrome':
+        output = args.output or args.trace.with_suffix('.json')
+        document = to_chrome_trace(events)
+        output.write_text(json.dumps(document), encoding='utf-8')
+        print(f"📈 {len(document['traceEvents'])} spans written to {output} - open it in https://ui.perfetto.dev")
+    else:
+        print(f"{'span':<28} {'count':>7} {'total s':>10} {'mean s':>9} {'max s':>9}")
+        for name, n, total, longest in summarize_trace(events):
+            print(f"{name:<28} {n:>7} {total:>10.2f} {total / n:>9.3f} {longest:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
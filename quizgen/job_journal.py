@@ -0,0 +1,75 @@
+"""
+Job Journal - Append-only, fsync'd JSONL record of quiz generation state transitions
+Every event (started, attempt, succeeded, failed) is durable the moment it is
+written, so a crash or Ctrl-C keeps the run's diagnostics and lets the next run resume.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class JobJournal:
+    """One JSON object per line: {"ts", "run", "topic", "event", ...details}"""
+
+    def __init__(self, path: Path, run_id: Optional[str] = None):
+        self.path = Path(path)
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def record(self, topic: str, event: str, **details: Any):
+        """Append one event and fsync it before returning"""
+        entry = {'ts': round(time.time(), 3), 'run': self.run_id, 'topic': topic, 'event': event}
+        entry.update({k: v for k, v in details.items() if v is not None})
+        f = self._open()
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def events(self) -> List[Dict[str, Any]]:
+        """All readable events; a torn final line from a crash mid-write is skipped"""
+        if not self.path.exists():
+            return []
+        events = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Fold the journal into the latest known state of every topic"""
+        states: Dict[str, Dict[str, Any]] = {}
+        for event in self.events():
+            state = states.setdefault(event['topic'], {'state': None, 'attempts': 0, 'runs': 0})
+            if event['event'] == 'started':
+                state['runs'] += 1
+                state['attempts_this_run'] = 0
+            elif event['event'] == 'attempt':
+                state['attempts'] += 1
+                state['attempts_this_run'] = state.get('attempts_this_run', 0) + 1
+            state['state'] = event['event'] if event['event'] != 'attempt' else 'in_progress'
+            state['updated'] = event['ts']
+            state['run'] = event['run']
+            for key in ('error', 'latency', 'total_tokens'):
+                if key in event:
+                    state[key] = event[key]
+        return states
+
+    def topics_in_state(self, *wanted: str) -> List[str]:
+        return [topic for topic, state in self.replay().items() if state['state'] in wanted]
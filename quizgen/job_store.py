@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Job Store - shared SQLite (WAL) queue for generation, audio and render jobs
+One table of jobs keyed on (kind, name), used by the Python stages and by
+videogen/scripts/jobStore.ts, which runs each of its calls through `job_store.py --call`
+(so the renderer needs no native SQLite module and both sides share this implementation).
+
+Workers claim a job with a lease and keep it with heartbeats; a worker that dies stops
+renewing and its job becomes claimable again once the lease expires, so nothing needs a
+manual "reset stuck jobs". Per-(kind, status) counts are maintained by triggers, so a
+progress summary is a handful of row reads no matter how many jobs exist.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+JOB_STORE_PATH = Path(os.getenv('JOB_STORE_PATH', PROJECT_ROOT / 'jobs.sqlite'))
+JOB_KINDS = ('generate', 'audio', 'render')
+JOB_STATUSES = ('pending', 'running', 'completed', 'failed')
+DEFAULT_LEASE = 600.0  # Seconds a claim lasts without a heartbeat
+BUSY_TIMEOUT_MS = 10000
+
+# JobStore methods videogen/scripts/jobStore.ts may run through --call
+CALLABLE = ('enqueue', 'enqueue_many', 'claim', 'heartbeat', 'update_details', 'complete', 'fail',
+            'release', 'release_expired', 'get', 'jobs', 'summary')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    details TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (kind, status, updated_at);
+CREATE INDEX IF NOT EXISTS jobs_by_lease ON jobs (kind, status, lease_expires);
+CREATE TABLE IF NOT EXISTS job_counts (
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, status)
+);
+CREATE TRIGGER IF NOT EXISTS jobs_count_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO job_counts (kind, status, n) VALUES (NEW.kind, NEW.status, 1)
+        ON CONFLICT (kind, status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_count_update AFTER UPDATE OF status ON jobs
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE job_counts SET n = n - 1 WHERE kind = OLD.kind AND status = OLD.status;
+    INSERT INTO job_counts (kind, status, n) VALUES (NEW.kind, NEW.status, 1)
+        ON CONFLICT (kind, status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_count_delete AFTER DELETE ON jobs BEGIN
+    UPDATE job_counts SET n = n - 1 WHERE kind = OLD.kind AND status = OLD.status;
+END;
+"""
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    """Lease-based job queue on a WAL-mode SQLite file shared between processes and nodes"""
+
+    def __init__(self, path: Path = JOB_STORE_PATH, owner: Optional[str] = None):
+        self.path = Path(path)
+        self.owner = owner or default_owner()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE transactions
+        self.conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['details'] = json.loads(job['details'] or '{}')
+        return job
+
+    def enqueue(self, kind: str, name: str, details: Dict[str, Any] = None, reset: bool = False) -> bool:
+        """Add a pending job; an existing one is left alone unless `reset` (then it's pending again)"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected {', '.join(JOB_KINDS)})")
+        now = time.time()
+        inserted = self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (kind, name, details, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, name, json.dumps(details or {}), now, now)).rowcount
+        if not inserted and reset:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE kind = ? AND name = ? AND status <> 'running'", (now, kind, name))
+        return bool(inserted)
+
+    def enqueue_many(self, kind: str, names: List[str]) -> int:
+        """Enqueue many jobs in one transaction (existing ones are untouched); returns how many were new"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected {', '.join(JOB_KINDS)})")
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = sum(self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (kind, name, details, created_at, updated_at) VALUES (?, ?, '{}', ?, ?)",
+                (kind, name, now, now)).rowcount for name in names)
+            self.conn.execute("COMMIT")
+            return inserted
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, kind: str, name: Optional[str] = None, lease: float = DEFAULT_LEASE,
+              include_failed: bool = False) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest claimable job (or the named one): pending, optionally
+        failed, or running with an expired lease. Returns the job, or None."""
+        now = time.time()
+        statuses = ('pending', 'failed') if include_failed else ('pending',)
+        where = (f"kind = ? AND (status IN ({','.join('?' * len(statuses))}) "
+                 f"OR (status = 'running' AND lease_expires < ?))")
+        params: List[Any] = [kind, *statuses, now]
+        if name is not None:
+            where += " AND name = ?"
+            params.append(name)
+        self.conn.execute("BEGIN IMMEDIATE")  # Take the write lock before choosing, so two claimers can't pick the same job
+        try:
+            row = self.conn.execute(f"SELECT name FROM jobs WHERE {where} ORDER BY updated_at LIMIT 1",
+                                    params).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE kind = ? AND name = ?",
+                (self.owner, now + lease, now, kind, row['name']))
+            job = self.get(kind, row['name'])
+            self.conn.execute("COMMIT")
+            return job
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def heartbeat(self, kind: str, name: str, lease: float = DEFAULT_LEASE) -> bool:
+        """Extend our lease; False if the job was taken over (stop working on it)"""
+        now = time.time()
+        return self.conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE kind = ? AND name = ? AND status = 'running' AND owner = ?",
+            (now + lease, now, kind, name, self.owner)).rowcount == 1
+
+    def update_details(self, kind: str, name: str, details: Dict[str, Any]) -> bool:
+        """Merge fields into a running job's details (only while we hold it)"""
+        job = self.get(kind, name)
+        if job is None or job['status'] != 'running' or job['owner'] != self.owner:
+            return False
+        return self.conn.execute(
+            "UPDATE jobs SET details = ?, updated_at = ? WHERE kind = ? AND name = ? AND owner = ?",
+            (json.dumps({**job['details'], **details}), time.time(), kind, name, self.owner)).rowcount == 1
+
+    def _finish(self, kind: str, name: str, status: str, error: Optional[str],
+                details: Optional[Dict[str, Any]]) -> bool:
+        now = time.time()
+        job = self.get(kind, name)
+        if job is None or job['status'] != 'running' or job['owner'] != self.owner:
+            return False  # Lease lost - whoever holds it now reports the outcome
+        merged = {**job['details'], **(details or {})}
+        return self.conn.execute(
+            "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, last_error = ?, details = ?, "
+            "updated_at = ? WHERE kind = ? AND name = ? AND status = 'running' AND owner = ?",
+            (status, error, json.dumps(merged), now, kind, name, self.owner)).rowcount == 1
+
+    def complete(self, kind: str, name: str, details: Dict[str, Any] = None) -> bool:
+        return self._finish(kind, name, 'completed', None, details)
+
+    def fail(self, kind: str, name: str, error: str, details: Dict[str, Any] = None) -> bool:
+        return self._finish(kind, name, 'failed', error[:1000], details)
+
+    def release(self, kind: str, name: str) -> bool:
+        """Hand a job we hold back to pending without recording an outcome"""
+        return self.conn.execute(
+            "UPDATE jobs SET status = 'pending', owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE kind = ? AND name = ? AND status = 'running' AND owner = ?",
+            (time.time(), kind, name, self.owner)).rowcount == 1
+
+    def release_expired(self, kind: str) -> List[str]:
+        """Put running jobs whose lease expired back to pending; returns their names"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            names = [row['name'] for row in self.conn.execute(
+                "SELECT name FROM jobs WHERE kind = ? AND status = 'running' AND lease_expires < ?", (kind, now))]
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'pending', owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE kind = ? AND name = ?", [(now, kind, name) for name in names])
+            self.conn.execute("COMMIT")
+            return names
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def get(self, kind: str, name: str) -> Optional[Dict[str, Any]]:
+        return self._row(self.conn.execute("SELECT * FROM jobs WHERE kind = ? AND name = ?", (kind, name)).fetchone())
+
+    def jobs(self, kind: str, status: Optional[str] = None, limit: int = -1) -> List[Dict[str, Any]]:
+        if status is None:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE kind = ? ORDER BY updated_at LIMIT ?", (kind, limit))
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE kind = ? AND status = ? ORDER BY updated_at LIMIT ?",
+                                     (kind, status, limit))
+        return [self._row(row) for row in rows]
+
+    def summary(self, kind: str) -> Dict[str, int]:
+        """Jobs per status from the trigger-maintained counts, plus running jobs whose lease expired"""
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update(dict(self.conn.execute("SELECT status, n FROM job_counts WHERE kind = ?", (kind,)).fetchall()))
+        counts['stale'] = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE kind = ? AND status = 'running' AND lease_expires < ?",
+            (kind, time.time())).fetchone()[0]
+        counts['total'] = sum(counts[status] for status in JOB_STATUSES)
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+def call(store: JobStore, request: Dict[str, Any]) -> Any:
+    """Run {"method": ..., "args": {...}} on `store` (one of CALLABLE) and return its result"""
+    method = request.get('method')
+    if method not in CALLABLE:
+        raise ValueError(f"Unknown job store method '{method}'")
+    return getattr(store, method)(**request.get('args', {}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the shared job store')
+    parser.add_argument('--kind', choices=JOB_KINDS, help='Only this kind of job')
+    parser.add_argument('--list', metavar='STATUS', choices=JOB_STATUSES, help='List the jobs in this status')
+    parser.add_argument('--call', action='store_true',
+                        help='Run one JSON request from stdin and print the JSON result (used by jobStore.ts)')
+    parser.add_argument('--path', type=Path, default=JOB_STORE_PATH, help='Store file (default: $JOB_STORE_PATH)')
+    parser.add_argument('--owner', default=None, help='Lease owner for --call (default: host:pid)')
+    args = parser.parse_args()
+
+    store = JobStore(args.path, args.owner)
+    if args.call:
+        try:
+            print(json.dumps(call(store, json.load(sys.stdin))))
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            store.close()
+        return
+    for kind in [args.kind] if args.kind else JOB_KINDS:
+        counts = store.summary(kind)
+        print(f"{kind:<9} " + "  ".join(f"{status} {counts[status]}" for status in (*JOB_STATUSES, 'stale')))
+        if args.list:
+            for job in store.jobs(kind, args.list):
+                print(f"    {job['name']}  attempts={job['attempts']}  {job['last_error'] or ''}")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
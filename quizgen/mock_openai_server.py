@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Chat Completions Server
+Local stand-in for /v1/chat/completions used to benchmark QuizGenerator without
+spending tokens. Returns a valid quiz, a `usage` block and x-ratelimit-* headers, and can inject
+429/5xx faults (with Retry-After) to exercise the retry policy. Streaming requests are
+answered with server-sent events, optionally cut off mid-body. The /v1/files and
+/v1/batches endpoints emulate the Batch API, finishing each batch after `batch_latency`.
+
+Completion latency is `latency` (+ `latency_per_question` per question) scaled by a draw from
+`latency_distribution`: constant, uniform (±latency_spread), lognormal (sigma = latency_spread,
+median 1) or pareto (alpha = 1 / latency_spread, a heavy tail). `explanation_chars` pads every
+question with an explanation to make responses larger.
+
+Like the real API, a completion longer than the request's `max_completion_tokens` (4 characters
+per token, plus `reasoning_tokens` of hidden reasoning) is cut off at the cap and finishes
+with finish_reason "length".
+"""
+
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+from aiohttp import web
+
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'lognormal', 'pareto')
+
+
+class MockOpenAIServer:
+    """Configurable fake chat-completions endpoint"""
+
+    def __init__(self, latency: float = 1.0, questions_per_difficulty: int = 30,
+                 requests_per_minute: int = 500, tokens_per_minute: int = 500000,
+                 fault_rate: float = 0.0, fault_statuses=(429, 500, 503), retry_after: float = None,
+                 fault_script=None, seed: int = None, stream_cut_rate: float = 0.0,
+                 stream_chunk_chars: int = 64, latency_per_question: float = 0.0,
+                 batch_latency: float = 1.0, latency_distribution: str = 'constant',
+                 latency_spread: float = 0.5, explanation_chars: int = 0, reasoning_tokens: int = 0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency_distribution}' "
+                             f"(expected {', '.join(LATENCY_DISTRIBUTIONS)})")
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.explanation_chars = explanation_chars
+        self.reasoning_tokens = reasoning_tokens
+        self.truncated = 0  # Completions cut off at max_completion_tokens
+        self.latency_per_question = latency_per_question
+        self.questions_per_difficulty = questions_per_difficulty
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.fault_rate = fault_rate
+        self.fault_statuses = list(fault_statuses)
+        self.retry_after = retry_after
+        self.fault_script = list(fault_script or [])  # Statuses returned first, in order (200 = pass through)
+        self.rng = random.Random(seed)
+        self.stream_cut_rate = stream_cut_rate
+        self.stream_chunk_chars = stream_chunk_chars
+        self.streams_cut = 0
+        self.disconnects = 0  # Streams the client abandoned before the end
+        self.batch_latency = batch_latency
+        self.files = {}    # file id -> text content
+        self.batches = {}  # batch id -> batch object (+ private '_started' timestamp)
+        self.request_count = 0
+        self.fault_counts = {}
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self._window = deque()  # (timestamp, tokens) of requests served in the last minute
+        self._runner = None
+
+    def build_quiz(self, topic: str, counts: dict = None) -> dict:
+        """Build a structurally valid quiz for the given topic"""
+        quiz = {}
+        for difficulty in ['low', 'medium', 'hard']:
+            count = self.questions_per_difficulty if counts is None else counts[difficulty]
+            quiz[difficulty] = [
+                {
+                    'question': f"[{topic}] {difficulty} question {i} (request {self.request_count})?",
+                    'options': [f"{difficulty} {i} A", f"{difficulty} {i} B", f"{difficulty} {i} C"],
+                    'answer': f"{difficulty} {i} A",
+                    **({'explanation': self._filler(self.explanation_chars)} if self.explanation_chars else {}),
+                }
+                for i in range(1, count + 1)
+            ]
+        return {'quiz': quiz}
+
+    @staticmethod
+    def _filler(chars: int) -> str:
+        words = 'because the clue points to the only option that fits every part of the question '
+        return (words * (chars // len(words) + 1))[:chars]
+
+    def completion_latency(self, n_questions: int) -> float:
+        """Seconds to spend on a completion of `n_questions`, drawn from the configured distribution"""
+        base = self.latency + self.latency_per_question * n_questions
+        if self.latency_distribution == 'uniform':
+            return base * max(0.0, self.rng.uniform(1 - self.latency_spread, 1 + self.latency_spread))
+        if self.latency_distribution == 'lognormal':
+            return base * self.rng.lognormvariate(0.0, self.latency_spread)
+        if self.latency_distribution == 'pareto':
+            return base * self.rng.paretovariate(1 / max(self.latency_spread, 1e-6))
+        return base
+
+    @staticmethod
+    def requested_counts(prompt: str):
+        """Honour the generator's continuation and shard prompts ('return ONLY the ... questions')"""
+        match = re.search(r'ONLY the (?:missing|following) questions: (\d+) low, (\d+) medium, (\d+) hard',
+                          prompt, re.IGNORECASE)
+        if not match:
+            return None
+        return dict(zip(['low', 'medium', 'hard'], map(int, match.groups())))
+
+    def _ratelimit_headers(self, tokens: int) -> dict:
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] > 60:
+            self._window.popleft()
+        self._window.append((now, tokens))
+        used_tokens = sum(t for _, t in self._window)
+        return {
+            'x-ratelimit-limit-requests': str(self.requests_per_minute),
+            'x-ratelimit-remaining-requests': str(max(0, self.requests_per_minute - len(self._window))),
+            'x-ratelimit-limit-tokens': str(self.tokens_per_minute),
+            'x-ratelimit-remaining-tokens': str(max(0, self.tokens_per_minute - used_tokens)),
+        }
+
+    def _next_fault(self):
+        if self.fault_script:
+            status = self.fault_script.pop(0)
+            return None if status == 200 else status
+        if self.fault_rate and self.rng.random() < self.fault_rate:
+            return self.rng.choice(self.fault_statuses)
+        return None
+
+    def _fault_response(self, status: int) -> web.Response:
+        self.fault_counts[status] = self.fault_counts.get(status, 0) + 1
+        headers = {}
+        if status == 429:
+            headers['x-ratelimit-remaining-requests'] = '0'
+            headers['x-ratelimit-reset-requests'] = '1s'
+        if self.retry_after is not None:
+            headers['retry-after'] = str(self.retry_after)
+        body = {'error': {'message': f"Injected fault {status}", 'type': 'mock_fault'}}
+        return web.json_response(body, status=status, headers=headers)
+
+    async def handle_chat_completions(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.request_count += 1
+        fault = self._next_fault()
+        if fault is not None:
+            return self._fault_response(fault)
+
+        prompt = payload['messages'][-1]['content']
+        quiz = self.build_quiz(prompt[:40], self.requested_counts(prompt))
+        content, finish_reason = self._apply_token_cap(payload, json.dumps(quiz))
+        # Completion time grows with the number of questions generated
+        latency = self.completion_latency(sum(len(v) for v in quiz['quiz'].values()))
+        if payload.get('stream'):
+            return await self._stream_response(request, payload, content, latency, finish_reason)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self.in_flight -= 1
+
+        return web.json_response(self._completion_body(payload, content, finish_reason),
+                                 headers=self._ratelimit_headers(self._usage(payload, content)['total_tokens']))
+
+    def _apply_token_cap(self, payload: dict, content: str):
+        """Cut `content` at the request's max_completion_tokens -> (content, finish_reason)"""
+        cap = payload.get('max_completion_tokens')
+        if cap is None or len(content) // 4 + self.reasoning_tokens <= cap:
+            return content, 'stop'
+        self.truncated += 1
+        return content[:max(0, cap - self.reasoning_tokens) * 4], 'length'
+
+    def _completion_body(self, payload: dict, content: str, finish_reason: str = 'stop') -> dict:
+        return {
+            'id': f"chatcmpl-mock-{self.request_count}",
+            'object': 'chat.completion',
+            'model': payload.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': finish_reason,
+            }],
+            'usage': self._usage(payload, content),
+        }
+
+    def _usage(self, payload: dict, content: str) -> dict:
+        usage = {
+            'prompt_tokens': sum(len(m['content']) for m in payload['messages']) // 4,
+            'completion_tokens': len(content) // 4 + self.reasoning_tokens,
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        return usage
+
+    async def _stream_response(self, request: web.Request, payload: dict, content: str,
+                               latency: float, finish_reason: str = 'stop') -> web.StreamResponse:
+        """Send the completion as SSE chunks spread over `latency` seconds"""
+        usage = self._usage(payload, content)
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            **self._ratelimit_headers(usage['total_tokens']),
+        })
+        await response.prepare(request)
+
+        chunks = [content[i:i + self.stream_chunk_chars] for i in range(0, len(content), self.stream_chunk_chars)]
+        cut_at = len(chunks)
+        if self.stream_cut_rate and self.rng.random() < self.stream_cut_rate:
+            cut_at = self.rng.randrange(1, len(chunks))
+        delay = latency / max(1, len(chunks))
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for index, chunk in enumerate(chunks):
+                if index == cut_at:
+                    # Drop the connection mid-body, like a proxy timeout would
+                    self.streams_cut += 1
+                    request.transport.close()
+                    return response
+                event = {'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}]}
+                try:
+                    await response.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                except ConnectionResetError:
+                    # The client hung up (a cancelled hedge loser, or a client-side timeout)
+                    self.disconnects += 1
+                    return response
+                await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+
+        final = {'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}]}
+        await response.write(f"data: {json.dumps(final)}\n\n".encode('utf-8'))
+        if (payload.get('stream_options') or {}).get('include_usage'):
+            await response.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode('utf-8'))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    # Batch API
+
+    async def handle_file_upload(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form['file']
+        content = upload.file.read().decode('utf-8')
+        file_id = f"file-mock-{len(self.files) + 1}"
+        self.files[file_id] = content
+        return web.json_response({'id': file_id, 'object': 'file', 'purpose': form.get('purpose'),
+                                  'bytes': len(content), 'filename': upload.filename})
+
+    async def handle_file_content(self, request: web.Request) -> web.Response:
+        file_id = request.match_info['file_id']
+        if file_id not in self.files:
+            return web.json_response({'error': {'message': 'No such file'}}, status=404)
+        return web.Response(text=self.files[file_id], content_type='application/jsonl')
+
+    async def handle_create_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get('input_file_id') not in self.files:
+            return web.json_response({'error': {'message': 'Unknown input_file_id'}}, status=400)
+        lines = [l for l in self.files[body['input_file_id']].splitlines() if l.strip()]
+        batch_id = f"batch_mock_{len(self.batches) + 1}"
+        self.batches[batch_id] = {
+            'id': batch_id,
+            'object': 'batch',
+            'endpoint': body.get('endpoint'),
+            'input_file_id': body['input_file_id'],
+            'completion_window': body.get('completion_window'),
+            'status': 'in_progress',
+            'output_file_id': None,
+            'error_file_id': None,
+            'request_counts': {'total': len(lines), 'completed': 0, 'failed': 0},
+            '_started': time.monotonic(),
+        }
+        return web.json_response(self._public_batch(batch_id))
+
+    async def handle_get_batch(self, request: web.Request) -> web.Response:
+        batch_id = request.match_info['batch_id']
+        if batch_id not in self.batches:
+            return web.json_response({'error': {'message': 'No such batch'}}, status=404)
+        batch = self.batches[batch_id]
+        if batch['status'] == 'in_progress' and time.monotonic() - batch['_started'] >= self.batch_latency:
+            self._finish_batch(batch)
+        return web.json_response(self._public_batch(batch_id))
+
+    def _public_batch(self, batch_id: str) -> dict:
+        return {k: v for k, v in self.batches[batch_id].items() if not k.startswith('_')}
+
+    def _finish_batch(self, batch: dict):
+        """Answer every request of the input file, failing some when fault injection is on"""
+        outputs, errors = [], []
+        for line in self.files[batch['input_file_id']].splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            self.request_count += 1
+            fault = self._next_fault()
+            if fault is not None:
+                errors.append({'id': f"batch_req_{self.request_count}", 'custom_id': item['custom_id'],
+                               'response': {'status_code': fault, 'body': {'error': {'message': f"Injected fault {fault}"}}},
+                               'error': None})
+                continue
+            payload = item['body']
+            prompt = payload['messages'][-1]['content']
+            content = json.dumps(self.build_quiz(prompt[:40], self.requested_counts(prompt)))
+            outputs.append({'id': f"batch_req_{self.request_count}", 'custom_id': item['custom_id'],
+                            'response': {'status_code': 200, 'body': self._completion_body(payload, content)},
+                            'error': None})
+
+        for kind, rows in (('output_file_id', outputs), ('error_file_id', errors)):
+            if rows:
+                file_id = f"file-mock-{len(self.files) + 1}"
+                self.files[file_id] = '\n'.join(json.dumps(r) for r in rows) + '\n'
+                batch[kind] = file_id
+        batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs),
+                                   'failed': len(errors)}
+        batch['status'] = 'completed'
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/v1/chat/completions', self.handle_chat_completions)
+        app.router.add_post('/v1/files', self.handle_file_upload)
+        app.router.add_get('/v1/files/{file_id}/content', self.handle_file_content)
+        app.router.add_post('/v1/batches', self.handle_create_batch)
+        app.router.add_get('/v1/batches/{batch_id}', self.handle_get_batch)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start serving in the current event loop and return the completions URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}/v1/chat/completions"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock OpenAI chat-completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per completion')
+    parser.add_argument('--latency-per-question', type=float, default=0.0, help='Extra seconds per question')
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='constant',
+                        help='How completion latency varies around --latency')
+    parser.add_argument('--latency-spread', type=float, default=0.5,
+                        help='uniform: ± fraction, lognormal: sigma, pareto: 1 / alpha')
+    parser.add_argument('--explanation-chars', type=int, default=0, help='Pad each question to enlarge responses')
+    parser.add_argument('--reasoning-tokens', type=int, default=0,
+                        help='Hidden reasoning tokens billed (and counted against the cap) per completion')
+    parser.add_argument('--questions', type=int, default=30, help='Questions per difficulty')
+    parser.add_argument('--fault-rate', type=float, default=0.0, help='Probability of an injected 429/5xx')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds on faults')
+    parser.add_argument('--stream-cut-rate', type=float, default=0.0, help='Probability a stream is cut mid-body')
+    parser.add_argument('--batch-latency', type=float, default=1.0, help='Seconds until a batch completes')
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(latency=args.latency, questions_per_difficulty=args.questions,
+                              fault_rate=args.fault_rate, retry_after=args.retry_after,
+                              stream_cut_rate=args.stream_cut_rate,
+                              latency_per_question=args.latency_per_question,
+                              batch_latency=args.batch_latency,
+                              latency_distribution=args.latency_distribution,
+                              latency_spread=args.latency_spread,
+                              explanation_chars=args.explanation_chars,
+                              reasoning_tokens=args.reasoning_tokens)
+    print(f"Mock server on http://{args.host}:{args.port}/v1/chat/completions")
+    print(f"Set OPENAI_API_URL to that address to point quiz_generator.py at it")
+    web.run_app(server.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Pipeline Driver - generation -> segregation -> TTS -> render, with overlapping stages
+Runs the stages as concurrent asyncio consumers joined by queues: a topic is segregated
+as soon as its quiz is saved, each chunk is synthesized as soon as it's written and each
+complete audio folder is queued for rendering, so the TTS and render hardware work while
+generation is still running. Every stage skips work that is already done, so rerunning
+the driver resumes where the last run stopped. Generation and audio jobs are recorded in
+the shared job store (job_store.py) next to the render jobs masterRender claims there.
+
+Queues after segregation are bounded: when TTS or rendering falls behind, the stage
+feeding it blocks instead of piling up work. Generation is not throttled - its output is
+already on disk, so queuing a topic name costs nothing.
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from instrumentation import configure as configure_metrics
+from job_store import JobStore, DEFAULT_LEASE
+from quiz_generator import QuizGenerator, OUTPUT_DIR
+from quiz_segregator import QuizSegregator, segregate_topic
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+AUDIOGEN_DIR = PROJECT_ROOT / 'audiogen'
+VIDEOGEN_DIR = PROJECT_ROOT / 'videogen'
+AUDIO_JSONS_DIR = AUDIOGEN_DIR / 'jsons '  # Trailing space is part of the existing folder name
+VIDEO_JSONS_DIR = VIDEOGEN_DIR / 'quiz jsons'
+VIDEO_OUTPUT_DIR = VIDEOGEN_DIR / 'output' / 'videos'
+RENDER_LOG_DIR = VIDEOGEN_DIR / 'output' / 'render_logs'
+RENDER_COMMAND = ['npx', 'ts-node', '--project', 'scripts/tsconfig.json', 'scripts/masterRender.ts', '--quiz']
+
+SEGREGATE_WORKERS = 2
+TTS_WORKERS = 1  # Each loads its own Kokoro model
+RENDER_WORKERS = 1  # Each render already runs RENDER_CONCURRENCY browser tabs
+QUEUE_DEPTH = 8  # Chunks waiting for TTS, and audio folders waiting for a render, before the feeder blocks
+REPORT_INTERVAL = 30.0  # Seconds between throughput lines
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    busy: float = 0.0  # Seconds spent working, summed over workers
+    started: float = field(default_factory=time.time)
+
+    def line(self, queued: Optional[int] = None) -> str:
+        elapsed = time.time() - self.started
+        rate = self.done / elapsed * 3600 if elapsed > 0 else 0.0
+        text = (f"{self.name:<10} {self.done:>5} done {self.skipped:>5} skipped {self.failed:>4} failed "
+                f"| {rate:8.1f}/h")
+        if self.workers:
+            busy = self.busy / (elapsed * self.workers) if elapsed > 0 else 0.0
+            text += f" | {busy:4.0%} busy over {self.workers} worker(s)"
+        if queued is not None:
+            text += f" | {queued} queued"
+        return text
+
+
+def publish_file(source: Path, target_dir: Path):
+    """Copy a chunk into a downstream input folder (atomically; unchanged files are left alone)"""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / source.name
+    data = source.read_bytes()
+    if target.exists() and target.read_bytes() == data:
+        return
+    tmp = target.with_name(target.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def video_output_path(chunk_name: str) -> Path:
+    """Where masterRender writes a chunk's video (same naming as fileManager.getQuizList)"""
+    return VIDEO_OUTPUT_DIR / (re.sub(r'\s+', '_', Path(chunk_name).stem) + '.mp4')
+
+
+class PipelineDriver:
+    """Runs the four stages concurrently and reports per-stage throughput"""
+
+    def __init__(self, generator: Optional[QuizGenerator], segregator: QuizSegregator = None,
+                 segregate_workers: int = SEGREGATE_WORKERS, tts_workers: int = TTS_WORKERS,
+                 render_workers: int = RENDER_WORKERS, queue_depth: int = QUEUE_DEPTH,
+                 tts: bool = True, render: bool = True, backend: str = 'live',
+                 report_interval: float = REPORT_INTERVAL):
+        self.generator = generator
+        self.segregator = segregator or QuizSegregator()
+        self.segregate_workers = max(1, segregate_workers)
+        self.tts_workers = max(1, tts_workers)
+        self.render_workers = max(1, render_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.tts = tts
+        self.render = render and tts
+        self.backend = backend
+        self.report_interval = report_interval
+        self.stats: Dict[str, StageStats] = {
+            'generate': StageStats('generate', 0),
+            'segregate': StageStats('segregate', self.segregate_workers),
+        }
+        if self.tts:
+            self.stats['tts'] = StageStats('tts', self.tts_workers)
+        if self.render:
+            self.stats['render'] = StageStats('render', self.render_workers)
+        self._local = threading.local()  # Per TTS thread: (service, audio cache, phoneme frontend)
+        self._audiogen = None
+        self.jobs: Optional[JobStore] = None  # Opened by run(); only used from the event loop thread
+
+    # Stage hand-offs
+
+    def _on_quiz_ready(self, topic: str, path: Path):
+        """Called by the generator (in the event loop) for every saved or already-present quiz"""
+        self.stats['generate'].done += 1
+        self.jobs.enqueue('generate', topic, {'path': str(path)})
+        if self.jobs.claim('generate', topic, include_failed=True):
+            self.jobs.complete('generate', topic)
+        self.topics.put_nowait(path)
+
+    async def _segregate_worker(self, pool: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        stats = self.stats['segregate']
+        while True:
+            source = await self.topics.get()
+            if source is _DONE:
+                return
+            start = time.time()
+            try:
+                if self.segregator.is_current(source):
+                    files = self.segregator.state[source.stem]['files']
+                    stats.skipped += 1
+                else:
+                    result = await loop.run_in_executor(pool, segregate_topic, str(source),
+                                                        *self.segregator.worker_args(source))
+                    self.segregator.record(result)
+                    if result['leftover']:
+                        print(f"! {source.stem}: {result['leftover']} leftover questions don't fill a chunk")
+                    files = result['files']
+                    stats.done += 1
+                for name in files:
+                    publish_file(self.segregator.segregated_dir / name, VIDEO_JSONS_DIR)
+                    publish_file(self.segregator.audio_dir / name, AUDIO_JSONS_DIR)
+            except Exception as e:
+                stats.failed += 1
+                print(f"✗ Segregating {source.stem} failed: {e}")
+                continue
+            finally:
+                stats.busy += time.time() - start
+            if self.tts:
+                for name in files:
+                    await self.chunks.put(name)  # Blocks while TTS is QUEUE_DEPTH chunks behind
+
+    def _load_audiogen(self):
+        if self._audiogen is None:
+            sys.path.insert(0, str(AUDIOGEN_DIR))
+            import audio_generator
+            self._audiogen = audio_generator
+        return self._audiogen
+
+    def _tts_context(self):
+        """This thread's TTS service, audio cache and phoneme frontend, created on first use"""
+        if not hasattr(self._local, 'service'):
+            ag = self._load_audiogen()
+            self._local.service = ag.build_tts_service()  # Segmented like audio_generator's own runs
+            self._local.cache = ag.open_cache(self._local.service, enabled=ag.USE_AUDIO_CACHE)
+            self._local.frontend = ag.open_frontend(
+                enabled=ag.USE_PHONEME_CACHE and ag.supports_phonemes(self._local.service))
+        return self._local.service, self._local.cache, self._local.frontend
+
+    def _synthesize(self, name: str) -> str:
+        """Generate one chunk's audio folder (runs on a TTS thread); returns the outcome"""
+        ag = self._load_audiogen()
+        json_path = AUDIO_JSONS_DIR / name
+        if ag.folder_is_current(json_path, ag.select_voice_for_json(json_path.stem)):
+            return 'skipped'
+        lease = ag.claim_json(json_path)
+        if lease is None:
+            return 'leased'  # Another node is on it and will render it
+        with lease:
+            service, cache, frontend = self._tts_context()
+            ag.process_single_json(json_path, service, cache, frontend, lease)
+        return 'done' if ag.folder_is_current(json_path, ag.select_voice_for_json(json_path.stem)) else 'failed'
+
+    async def _keep_alive(self, kind: str, name: str):
+        """Heartbeat a job-store lease until cancelled"""
+        while True:
+            await asyncio.sleep(DEFAULT_LEASE / 3)
+            if not self.jobs.heartbeat(kind, name):
+                print(f"⚠️  Lost the {kind} lease on {name}")
+                return
+
+    async def _tts_worker(self, pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        stats = self.stats['tts']
+        while True:
+            name = await self.chunks.get()
+            if name is _DONE:
+                return
+            stem = Path(name).stem
+            self.jobs.enqueue('audio', stem, {'json': name}, reset=True)
+            if self.jobs.claim('audio', stem) is None:
+                stats.skipped += 1  # Another driver is synthesizing it and will queue the render
+                continue
+            start = time.time()
+            keep_alive = asyncio.create_task(self._keep_alive('audio', stem))
+            error = None
+            try:
+                outcome = await loop.run_in_executor(pool, self._synthesize, name)
+            except Exception as e:
+                outcome, error = 'failed', str(e)
+                print(f"✗ TTS for {name} failed: {e}")
+            finally:
+                keep_alive.cancel()
+            stats.busy += time.time() - start
+            if outcome == 'leased':
+                self.jobs.release('audio', stem)
+            elif outcome == 'failed':
+                self.jobs.fail('audio', stem, error or 'Audio folder incomplete after synthesis')
+            else:
+                self.jobs.complete('audio', stem, {'outcome': outcome})
+            if outcome == 'done':
+                stats.done += 1
+            elif outcome == 'failed':
+                stats.failed += 1
+            else:
+                stats.skipped += 1
+            if self.render and outcome in ('done', 'skipped'):
+                await self.renders.put(name)  # Blocks while renders are QUEUE_DEPTH folders behind
+
+    async def _render_worker(self):
+        stats = self.stats['render']
+        while True:
+            name = await self.renders.get()
+            if name is _DONE:
+                return
+            if video_output_path(name).exists():
+                stats.skipped += 1
+                continue
+            start = time.time()
+            RENDER_LOG_DIR.mkdir(parents=True, exist_ok=True)
+            with open(RENDER_LOG_DIR / f"{Path(name).stem}.log", 'wb') as log:
+                process = await asyncio.create_subprocess_exec(
+                    *RENDER_COMMAND, Path(name).stem, cwd=str(VIDEOGEN_DIR),
+                    stdout=log, stderr=asyncio.subprocess.STDOUT)
+                try:
+                    code = await process.wait()
+                except asyncio.CancelledError:
+                    process.terminate()  # Don't leave a render running after the pipeline stops
+                    raise
+            stats.busy += time.time() - start
+            if code == 0:
+                stats.done += 1
+            else:
+                stats.failed += 1
+                print(f"✗ Render of {Path(name).stem} exited with code {code} (see {RENDER_LOG_DIR.name}/)")
+
+    # Orchestration
+
+    def report(self):
+        queues = {'segregate': self.topics, 'tts': getattr(self, 'chunks', None),
+                  'render': getattr(self, 'renders', None)}
+        for name, stats in self.stats.items():
+            queue = queues.get(name)
+            print("  " + stats.line(queue.qsize() if queue is not None else None))
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            print(f"\n📊 Pipeline throughput")
+            self.report()
+
+    @staticmethod
+    async def _close(queue: asyncio.Queue, workers: List[asyncio.Task]):
+        """Tell a stage's workers no more input is coming and wait for them to finish"""
+        for _ in workers:
+            await queue.put(_DONE)
+        await asyncio.gather(*workers)
+
+    async def _generate(self, existing: bool):
+        if existing or self.generator is None:
+            for path in sorted(OUTPUT_DIR.glob('*.json')):
+                self._on_quiz_ready(path.stem, path)
+            return
+        self.generator.on_quiz_ready = self._on_quiz_ready
+        if self.backend == 'batch':
+            await self.generator.generate_all_quizzes_batch()
+        else:
+            await self.generator.generate_all_quizzes()
+
+    async def run(self, existing: bool = False):
+        """Run every stage to completion; `existing` feeds the saved quizzes instead of generating"""
+        self.topics: asyncio.Queue = asyncio.Queue()
+        self.chunks: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        self.renders: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        self.segregator.segregated_dir.mkdir(parents=True, exist_ok=True)
+        self.segregator.audio_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs = JobStore()
+        start = time.time()
+        reporter = asyncio.create_task(self._report_loop())
+        try:
+            with ProcessPoolExecutor(max_workers=self.segregate_workers) as segregate_pool, \
+                    ThreadPoolExecutor(max_workers=self.tts_workers, thread_name_prefix='tts') as tts_pool:
+                segregators = [asyncio.create_task(self._segregate_worker(segregate_pool))
+                               for _ in range(self.segregate_workers)]
+                synthesizers = [asyncio.create_task(self._tts_worker(tts_pool))
+                                for _ in range(self.tts_workers)] if self.tts else []
+                renderers = [asyncio.create_task(self._render_worker())
+                             for _ in range(self.render_workers)] if self.render else []
+                try:
+                    await self._generate(existing)
+                except BaseException:
+                    # Ctrl-C, cancellation or a generator error: stop now instead of draining. Claimed
+                    # job-store rows stop heartbeating and their leases expire, so a rerun (or another
+                    # driver) picks them up.
+                    print("\n⏹️  Pipeline interrupted - stopping workers without draining the queues")
+                    workers = segregators + synthesizers + renderers
+                    for task in workers:
+                        task.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    segregate_pool.shutdown(wait=False, cancel_futures=True)
+                    tts_pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                # Drain stage by stage, so each one sees everything the previous produced
+                await self._close(self.topics, segregators)
+                await self._close(self.chunks, synthesizers)
+                await self._close(self.renders, renderers)
+        finally:
+            reporter.cancel()
+            self.jobs.close()
+
+        if self.tts and self._audiogen is not None:
+            cache = self._audiogen.open_cache(enabled=self._audiogen.USE_AUDIO_CACHE)
+            if cache:
+                cache.evict()
+        print("\n" + "=" * 80)
+        print(f"🏁 Pipeline finished in {time.time() - start:.1f}s")
+        self.report()
+        print("=" * 80)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Generate, segregate, voice and render quizzes as one overlapping pipeline')
+    parser.add_argument('--existing', action='store_true',
+                        help='Skip generation and feed the quizzes already in QuizzesOp through the pipeline')
+    parser.add_argument('--backend', choices=['live', 'batch'], default='live', help='Quiz generation backend')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache')
+    parser.add_argument('--segregate-workers', type=int, default=SEGREGATE_WORKERS, help='Segregation processes')
+    parser.add_argument('--tts-workers', type=int, default=TTS_WORKERS, help='TTS threads, one model each')
+    parser.add_argument('--render-workers', type=int, default=RENDER_WORKERS, help='Concurrent masterRender processes (each stages its own audio under public/jobs)')
+    parser.add_argument('--queue-depth', type=int, default=QUEUE_DEPTH,
+                        help='Items queued before TTS / rendering push back on the stage feeding them')
+    parser.add_argument('--no-tts', action='store_true', help='Stop after segregation')
+    parser.add_argument('--no-render', action='store_true', help='Stop after TTS')
+    parser.add_argument('--report-interval', type=float, default=REPORT_INTERVAL, help='Seconds between throughput lines')
+    parser.add_argument('--metrics-dir', default=None,
+                        help='Write pipeline.prom and pipeline.trace.jsonl (generation and TTS metrics) here')
+    args = parser.parse_args()
+    configure_metrics('pipeline', args.metrics_dir)
+
+    generator = None if args.existing else QuizGenerator(use_cache=not args.no_cache)
+    driver = PipelineDriver(generator, segregate_workers=args.segregate_workers, tts_workers=args.tts_workers,
+                            render_workers=args.render_workers, queue_depth=args.queue_depth,
+                            tts=not args.no_tts, render=not args.no_render, backend=args.backend,
+                            report_interval=args.report_interval)
+    await driver.run(existing=args.existing)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
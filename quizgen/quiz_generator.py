@@ -2,31 +2,70 @@
 """
 Quiz Generator - Automated quiz generation using OpenAI GPT-5-mini
 Generates 90-question quizzes (30 low, 30 medium, 30 hard) for multiple topics
-One request every 30 seconds (2 requests per minute)
+Topics run concurrently, throttled by RPM/TPM token buckets
 """
 
 import os
+import re
 import json
+import copy
 import time
 import asyncio
+import argparse
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
 import aiohttp
 from dotenv import load_dotenv
 
+from rate_limiter import RateLimiter
+from retry_policy import RetryPolicy, CircuitBreaker, RATE_LIMIT, TIMEOUT
+from stream_parser import IncrementalQuizParser, sse_data, DIFFICULTIES
+from response_cache import ResponseCache, request_key
+from job_journal import JobJournal
+from token_budget import UsageHistory, prompt_version
+from hedging import HedgeBudget
+from instrumentation import counter, gauge, histogram, span, configure as configure_metrics, event as trace_event
+
 # Load environment variables
 load_dotenv()
 
 # Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 MODEL_NAME = 'gpt-5-mini-2025-08-07'
-API_URL = 'https://api.openai.com/v1/chat/completions'
+API_URL = os.getenv('OPENAI_API_URL', 'https://api.openai.com/v1/chat/completions')
 
-# Rate limiting configuration - Sequential processing
-# 1 request per minute with 6 minute timeout for 90-question generation
-DELAY_BETWEEN_REQUESTS = 60  # 1 minute between requests
+# Rate limiting configuration - Concurrent processing
+# Topics are generated in parallel; RPM/TPM token buckets keep us inside the account limits
+MAX_CONCURRENT_REQUESTS = int(os.getenv('QUIZGEN_CONCURRENCY', '4'))  # Requests in flight at once
+REQUESTS_PER_MINUTE = int(os.getenv('QUIZGEN_RPM', '500'))  # Tier 1 RPM limit
+TOKENS_PER_MINUTE = int(os.getenv('QUIZGEN_TPM', '500000'))  # Tier 1 TPM limit
 REQUEST_TIMEOUT = 360  # 6 minutes (360 seconds) timeout per request - generating 90 questions takes time
+MAX_COMPLETION_TOKENS = 16000
+REASONING_EFFORT = 'medium'
+QUESTIONS_PER_DIFFICULTY = 30
+
+# Adaptive limits - size max_completion_tokens, the timeout and the TPM reservation of each request
+# from the journaled usage of earlier ones (see token_budget.py); the constants above are the ceilings
+ADAPTIVE_LIMITS = os.getenv('QUIZGEN_ADAPTIVE_LIMITS', '1') == '1'
+MAX_CONTINUATIONS = 3  # Truncated responses (finish_reason "length") continued before giving up
+CONTINUATION_CAP_GROWTH = 1.5  # Each continuation after a truncation gets a larger cap
+
+# Hedging (opt-in) - duplicate a request that outlives the rolling p90 latency, keep the first answer
+HEDGE_REQUESTS = os.getenv('QUIZGEN_HEDGE', '0') == '1'
+
+# Streaming - questions are checkpointed as they arrive so a cut stream keeps its progress
+STREAM_RESPONSES = os.getenv('QUIZGEN_STREAM', '0') == '1'
+STREAM_IDLE_TIMEOUT = 60  # Seconds without a chunk before the stream counts as stalled
+
+# Sharding - split each topic into smaller concurrent requests and merge the results
+# 'off' = one 90-question request, 'difficulty' = 3 requests, 'chunk' = SHARD_CHUNK_SIZE per request
+SHARD_MODE = os.getenv('QUIZGEN_SHARDS', 'off')
+SHARD_CHUNK_SIZE = 15
+
+# Retry configuration - see retry_policy.py for per-status-class budgets
+CIRCUIT_BREAKER_THRESHOLD = 3  # Consecutive 429s before every worker pauses
+CIRCUIT_BREAKER_COOLDOWN = 30  # Minimum pause (seconds) once the breaker opens
 
 # Paths
 BASE_DIR = Path(__file__).parent
@@ -34,23 +73,72 @@ PROMPT_FILE = BASE_DIR / 'prompt.json'
 TOPICS_FILE = BASE_DIR / 'topics.json'
 OUTPUT_DIR = BASE_DIR / 'QuizzesOp'
 LOG_FILE = BASE_DIR / 'quiz_generation.log'
+RESPONSE_CACHE_DIR = BASE_DIR / '.response_cache'
+BATCH_STATE_FILE = BASE_DIR / 'batch_state.json'
+JOURNAL_FILE = BASE_DIR / 'quiz_jobs.jsonl'  # Append-only per-topic state transitions
+
+# Response cache - identical requests (prompt, model, parameters) are never billed twice
+USE_RESPONSE_CACHE = os.getenv('QUIZGEN_CACHE', '1') == '1'
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # Least recently used entries are evicted beyond this
+CACHE_MAX_AGE_DAYS = 30
 
 # Ensure output directory exists
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Metrics - written out only when a metrics directory is configured (see instrumentation.py)
+API_LATENCY = histogram('quizgen_api_request_seconds', 'OpenAI request latency by outcome and HTTP status')
+TOKENS = counter('quizgen_tokens', 'Billed tokens by direction (in = prompt, out = completion)')
+RETRIES = counter('quizgen_retries', 'Requests retried, by failure class')
+CACHE_HITS = counter('quizgen_response_cache_hits', 'Requests answered from the response cache')
+RATE_LIMIT_WAIT = histogram('quizgen_rate_limit_wait_seconds', 'Time held by the RPM/TPM limiter before a request')
+TOPICS_WAITING = gauge('quizgen_topics_waiting', 'Topics queued for a concurrency slot')
+TOPIC_SECONDS = histogram('quizgen_topic_seconds', 'Wall time per generated topic, by result')
+TRUNCATIONS = counter('quizgen_truncated_responses', 'Responses cut off at max_completion_tokens')
+HEDGES = counter('quizgen_hedged_requests', 'Hedged duplicates by result (fired, won, cancelled)')
+
 
 class QuizGenerator:
     """Main class for generating quizzes using OpenAI API"""
 
-    def __init__(self):
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS, topics: List[str] = None,
+                 output_dir: Path = OUTPUT_DIR, api_url: str = API_URL,
+                 retry_policy: RetryPolicy = None, stream: bool = STREAM_RESPONSES,
+                 shard_mode: str = SHARD_MODE, use_cache: bool = USE_RESPONSE_CACHE,
+                 cache_dir: Path = RESPONSE_CACHE_DIR, regenerate_stale: bool = False,
+                 journal_file: Path = JOURNAL_FILE, adaptive_limits: bool = ADAPTIVE_LIMITS,
+                 hedge: bool = HEDGE_REQUESTS):
         self.api_key = OPENAI_API_KEY
+        self.api_url = api_url
+        self.output_dir = Path(output_dir)
+        self.checkpoint_dir = self.output_dir / '.partial'
+        self.stream = stream
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_slots = asyncio.Semaphore(self.max_concurrency)  # Held by every HTTP request
         self.master_prompt = self._load_master_prompt()
-        self.topics = self._load_topics()
+        self.shard_prompt = self._load_shard_prompt()
+        if shard_mode not in ('off', 'difficulty', 'chunk'):
+            raise ValueError(f"Unknown shard mode '{shard_mode}' (expected off, difficulty or chunk)")
+        self.shard_mode = shard_mode
+        self.cache = ResponseCache(cache_dir, CACHE_MAX_BYTES, CACHE_MAX_AGE_DAYS) if use_cache else None
+        self.regenerate_stale = regenerate_stale
+        self.topics = topics if topics is not None else self._load_topics()
+        self.rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = CircuitBreaker(CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN)
+        self.journal = JobJournal(journal_file)
+        self.adaptive_limits = adaptive_limits
+        self.prompt_version = prompt_version(self.master_prompt, self.shard_prompt, MODEL_NAME, REASONING_EFFORT)
+        self.usage_history = UsageHistory.from_events(self.journal.events())
+        self.hedging = HedgeBudget() if hedge else None
+        self.topic_tokens = {}  # Billed tokens per topic in this run, across retries and shards
         self.session = None
         self.generated_count = 0
         self.failed_topics = []
         self.log_entries = []
+        self._log_file = None
         self.skipped_count = 0
+        self.elapsed_seconds = 0.0
+        self.on_quiz_ready = None  # Optional callback(topic, path) for each saved or already-present quiz
 
     def _load_master_prompt(self) -> str:
         """Load the master prompt from prompt.json"""
@@ -61,6 +149,14 @@ class QuizGenerator:
         except Exception as e:
             raise Exception(f"Error loading prompt.json: {e}")
 
+    def _load_shard_prompt(self) -> str:
+        """Load the per-shard instruction appended to the master prompt in sharded mode"""
+        try:
+            with open(PROMPT_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f).get('shard_prompt', '')
+        except Exception as e:
+            raise Exception(f"Error loading prompt.json: {e}")
+
     def _load_topics(self) -> List[str]:
         """Load topics from topics.json"""
         try:
@@ -81,25 +177,99 @@ class QuizGenerator:
         filename = filename.strip()[:200]
         return filename + '.json'
 
+    def _quiz_ready(self, topic: str):
+        """Hand a finished quiz file to whoever consumes them (see pipeline_driver.py)"""
+        if self.on_quiz_ready is not None:
+            self.on_quiz_ready(topic, self.output_dir / self._sanitize_filename(topic))
+
     def _is_topic_already_processed(self, topic: str) -> bool:
-        """Check if a quiz file already exists for this topic"""
+        """Check if a complete quiz file already exists for this topic"""
         filename = self._sanitize_filename(topic)
-        filepath = OUTPUT_DIR / filename
-        return filepath.exists()
+        filepath = self.output_dir / filename
+        if not filepath.exists():
+            return False
+        # Files written before saves became atomic may be truncated - regenerate those
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                json.load(f)
+        except (OSError, ValueError) as e:
+            self._log(f"Existing quiz for '{topic}' is unreadable ({e}) - regenerating")
+            return False
+        return True
 
     def _create_prompt_for_topic(self, topic: str) -> str:
         """Replace [TOPIC] placeholder with actual topic"""
         return self.master_prompt.replace('[TOPIC]', topic)
 
-    async def _make_api_request(self, topic: str, retry_count: int = 3) -> Dict[str, Any]:
-        """Make API request to OpenAI for a single topic"""
-        prompt = self._create_prompt_for_topic(topic)
-
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.api_key}'
-        }
-
+    def _estimate_request_tokens(self, payload: Dict[str, Any]) -> int:
+        """TPM reservation: the estimated prompt tokens plus the completion cap"""
+        return self.usage_history.estimator.prompt_tokens(payload) + payload['max_completion_tokens']
+
+    def _create_shard_prompt(self, topic: str, shard: tuple, targets: Dict[str, int]) -> str:
+        """Master prompt narrowed to one shard's question counts"""
+        if not self.shard_prompt:
+            raise Exception("prompt.json has no 'shard_prompt' template for sharded mode")
+        index, count = shard
+        instruction = (self.shard_prompt
+                       .replace('[SHARD]', str(index)).replace('[SHARDS]', str(count))
+                       .replace('[LOW]', str(targets['low'])).replace('[MEDIUM]', str(targets['medium']))
+                       .replace('[HARD]', str(targets['hard'])).replace('[TOPIC]', topic))
+        return self._create_prompt_for_topic(topic) + instruction
+
+    def _create_remainder_prompt(self, topic: str, checkpoint: Dict[str, Any],
+                                 targets: Dict[str, int] = None) -> str:
+        """Ask only for the questions still missing from a partially generated quiz"""
+        missing = self._missing_counts(checkpoint, targets)
+        existing = [q['question'] for difficulty in DIFFICULTIES for q in checkpoint['quiz'][difficulty]]
+        return (
+            self._create_prompt_for_topic(topic)
+            + "\n\n## Continuation of a Partial Quiz\n\n"
+            + f"{len(existing)} questions have already been generated. Return ONLY the missing questions: "
+            + f"{missing['low']} low, {missing['medium']} medium, {missing['hard']} hard. "
+            + "Use the same JSON structure and an empty array for any difficulty that needs no more questions. "
+            + "Do not repeat any of these existing questions:\n"
+            + '\n'.join(f"- {q}" for q in existing)
+        )
+
+    def _completion_cap(self, targets: Dict[str, int] = None) -> int:
+        """max_completion_tokens for a full quiz or a shard of it"""
+        if targets is None:
+            return MAX_COMPLETION_TOKENS
+        # Scale the completion cap to the shard, keeping headroom for reasoning tokens
+        share = sum(targets.values()) / (QUESTIONS_PER_DIFFICULTY * len(DIFFICULTIES))
+        return min(MAX_COMPLETION_TOKENS, int(MAX_COMPLETION_TOKENS * share) + 4000)
+
+    def _request_limits(self, topic: str, questions: int, ceiling: int, truncations: int = 0,
+                        timeouts: int = 0) -> tuple:
+        """(max_completion_tokens, timeout seconds) for a request asking for `questions` questions"""
+        if not self.adaptive_limits:
+            return ceiling, REQUEST_TIMEOUT
+        cap = self.usage_history.completion_cap(self.prompt_version, questions, ceiling, topic)
+        if truncations:
+            # The history under-predicted this topic - grow past the usual ceiling, up to the hard limit
+            cap = min(MAX_COMPLETION_TOKENS, int(cap * CONTINUATION_CAP_GROWTH ** truncations))
+        timeout = self.usage_history.timeout(self.prompt_version, questions, REQUEST_TIMEOUT)
+        return cap, min(REQUEST_TIMEOUT, timeout * 2 ** timeouts)  # Back off the timeout after each one
+
+    def _initial_prompt(self, topic: str, targets: Dict[str, int] = None, shard: tuple = None) -> str:
+        """Prompt for a fresh (non-resumed) request"""
+        if shard is not None:
+            return self._create_shard_prompt(topic, shard, targets)
+        return self._create_prompt_for_topic(topic)
+
+    def _request_keys(self, topic: str) -> List[str]:
+        """Cache keys of the fresh requests this topic would send with the current configuration"""
+        if self.shard_mode == 'off':
+            return [request_key(self._build_payload(self._create_prompt_for_topic(topic)))]
+        plan = self._shard_plan()
+        return [
+            request_key(self._build_payload(self._initial_prompt(topic, targets, (index, len(plan))),
+                                            self._completion_cap(targets)))
+            for index, targets in enumerate(plan, 1)
+        ]
+
+    def _build_payload(self, prompt: str, max_completion_tokens: int = MAX_COMPLETION_TOKENS) -> Dict[str, Any]:
+        """Chat-completions request body for a filled prompt"""
         payload = {
             'model': MODEL_NAME,
             'messages': [
@@ -112,54 +282,481 @@ class QuizGenerator:
                     'content': prompt
                 }
             ],
-            'max_completion_tokens': 16000,  # GPT-5-mini uses max_completion_tokens instead of max_tokens
+            'max_completion_tokens': max_completion_tokens,  # GPT-5-mini uses max_completion_tokens instead of max_tokens
             'response_format': {'type': 'json_object'},
-            'reasoning_effort': 'medium'  # Minimize reasoning time for faster responses
+            'reasoning_effort': REASONING_EFFORT  # Minimize reasoning time for faster responses
             # Note: temperature is not included - GPT-5-mini only supports default value of 1
         }
+        if self.stream:
+            payload['stream'] = True
+            payload['stream_options'] = {'include_usage': True}
+        return payload
+
+    async def _make_api_request(self, topic: str, targets: Dict[str, int] = None,
+                                shard: tuple = None) -> Dict[str, Any]:
+        """Make API request to OpenAI for a single topic (or one (index, count) shard of it)"""
+        key = topic if shard is None else f"{topic}.shard{shard[0]}"
+        label = topic if shard is None else f"{topic} [shard {shard[0]}/{shard[1]}]"
+        max_tokens = self._completion_cap(targets)
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        attempts = {}  # retries used per failure class
+        truncations = 0
+
+        while True:
+            # Resume from questions checkpointed by an earlier (truncated) attempt or run
+            checkpoint = self._load_checkpoint(key)
+            missing = self._missing_counts(checkpoint, targets)
+            if sum(missing.values()) == 0 and self._validate_result(checkpoint, targets):
+                return {'success': True, 'data': checkpoint, 'topic': topic}
+            if any(checkpoint['quiz'][d] for d in DIFFICULTIES):
+                self._log(f"Resuming '{label}' - requesting only missing questions {missing}")
+                prompt = self._create_remainder_prompt(topic, checkpoint, targets)
+            else:
+                prompt = self._initial_prompt(topic, targets, shard)
+            questions = sum(missing.values())
+            cap, timeout_seconds = self._request_limits(topic, questions, max_tokens, truncations,
+                                                        attempts.get(TIMEOUT, 0))
+            payload = self._build_payload(prompt, cap)
+            estimated_tokens = self._estimate_request_tokens(payload)
+            if self.stream:
+                timeout = aiohttp.ClientTimeout(total=timeout_seconds, sock_read=STREAM_IDLE_TIMEOUT)
+            else:
+                timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+            request_info = {'questions': questions, 'delivered': 0, 'cap': cap,
+                            'prompt_chars': sum(len(m['content']) for m in payload['messages'])}
+            already = sum(len(checkpoint['quiz'][d]) for d in DIFFICULTIES)
+
+            # An identical request was answered before - reuse it instead of paying again.
+            # The cap only decides where a response may be cut off, so the key keeps the static one.
+            cache_key = request_key({**payload, 'max_completion_tokens': max_tokens})
+            cached = self._load_cached_response(cache_key, checkpoint, targets)
+            if cached is not None:
+                self._log(f"♻ Cache hit for '{label}' ({cache_key[:12]})")
+                CACHE_HITS.inc()
+                if shard is not None:
+                    self._write_checkpoint(key, cached)
+                return {'success': True, 'data': cached, 'topic': topic}
+
+            paused = await self.circuit_breaker.wait()
+            if paused > 1:
+                self._log(f"Circuit breaker paused '{label}' for {paused:.1f}s")
+            waited = await self.rate_limiter.acquire(estimated_tokens)
+            RATE_LIMIT_WAIT.observe(waited)
+            if waited > 1:
+                self._log(f"Rate limiter held '{label}' for {waited:.1f}s")
+
+            hedge_after = self.hedging.delay(self.usage_history, self.prompt_version, questions) \
+                if self.hedging else None
+            reply = await self._send_with_hedge(topic, shard, label, key, payload, headers, timeout,
+                                                checkpoint, estimated_tokens, hedge_after)
+            response_headers = reply['headers']
+            if 'error' not in reply:
+                quiz_data, usage, content, finish_reason = (
+                    reply['quiz_data'], reply['usage'], reply['content'], reply['finish_reason'])
+                self.rate_limiter.record_usage(estimated_tokens, usage)
+                self.circuit_breaker.record_success()
+                request_info.update(finish_reason=finish_reason, delivered=sum(
+                    len(quiz_data['quiz'][d]) for d in DIFFICULTIES) - already)
+                truncated = finish_reason == 'length'
+                self._record_attempt(topic, shard, 'truncated' if truncated else 'ok', 200,
+                                     reply['started'], usage, request_info)
+
+                if truncated:
+                    TRUNCATIONS.inc()
+                    truncations += 1
+                    if truncations > MAX_CONTINUATIONS:
+                        return {'success': False, 'topic': topic,
+                                'error': f'Output truncated at max_completion_tokens {truncations} times'}
+                    # Continue from the salvaged questions rather than re-requesting all of them
+                    self._write_checkpoint(key, quiz_data)
+                    self._log(f"✂ '{label}' hit max_completion_tokens ({cap}) after "
+                              f"{request_info['delivered']} questions - requesting only the rest")
+                    continue
 
-        for attempt in range(retry_count):
-            try:
-                async with self.session.post(API_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT) as response:
-                    if response.status == 200:
+                # Validate the structure
+                if self._validate_result(quiz_data, targets):
+                    if self.cache:
+                        self.cache.put(cache_key, label, content, usage, MODEL_NAME)
+                    if shard is not None:
+                        # Keep finished shards so a rerun only repeats the ones that failed
+                        self._write_checkpoint(key, quiz_data)
+                    return {'success': True, 'data': quiz_data, 'topic': topic}
+                else:
+                    error_msg = self._get_validation_error(quiz_data)
+                    return {'success': False, 'error': f'Invalid structure: {error_msg}', 'topic': topic}
+
+            error, outcome = reply['error'], reply['outcome']
+            if reply['status'] is not None:
+                # Failed requests are not billed, so give the reservation back
+                self.rate_limiter.release(estimated_tokens)
+            self._record_attempt(topic, shard, outcome, reply['status'], reply['started'])
+
+            delay = self.retry_policy.next_delay(outcome, attempts, response_headers)
+            if outcome == RATE_LIMIT and self.circuit_breaker.record_rate_limit(delay or 0):
+                self._log(f"Circuit breaker open after repeated 429s - pausing all requests "
+                          f"for {self.circuit_breaker.open_until - time.monotonic():.1f}s")
+            if delay is None:
+                return {'success': False, 'error': error, 'topic': topic}
+            RETRIES.inc(outcome=outcome)
+
+            self._log(f"{error[:200]} for '{label}' ({outcome}, retry {attempts[outcome]}/"
+                      f"{self.retry_policy.rules[outcome]}), waiting {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+    async def _send(self, key: str, payload: Dict[str, Any], headers: Dict[str, str],
+                    timeout: aiohttp.ClientTimeout, checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """One HTTP attempt. The reply holds the merged quiz data, usage, content and finish_reason,
+        or 'error' and its failure class as 'outcome' - errors are returned, never raised."""
+        reply = {'started': time.time(), 'status': None, 'headers': None}
+        try:
+            # Every HTTP request - shards and hedges included - takes one of max_concurrency slots
+            async with self.request_slots:
+                reply['started'] = time.time()
+                async with self.session.post(self.api_url, headers=headers, json=payload,
+                                             timeout=timeout) as response:
+                    self.rate_limiter.update_from_headers(response.headers)
+                    if response.status != 200:
+                        reply.update(status=response.status, headers=response.headers,
+                                     error=f"API error {response.status}: {await response.text()}",
+                                     outcome=self.retry_policy.classify(status=response.status))
+                        return reply
+                    if self.stream:
+                        quiz_data, usage, content, finish_reason = await self._read_stream(key, response, checkpoint)
+                    else:
                         result = await response.json()
+                        usage = result.get('usage')
                         content = result['choices'][0]['message']['content']
+                        finish_reason = result['choices'][0].get('finish_reason')
 
-                        # Parse the JSON response
-                        quiz_data = json.loads(content)
-
-                        # Validate the structure
-                        if self._validate_quiz_structure(quiz_data):
-                            return {'success': True, 'data': quiz_data, 'topic': topic}
+                        if finish_reason == 'length':
+                            # Cut off at the cap - keep the questions that closed, the caller continues
+                            quiz_data = self._salvage_questions(checkpoint, content)
                         else:
-                            error_msg = self._get_validation_error(quiz_data)
-                            return {'success': False, 'error': f'Invalid structure: {error_msg}', 'topic': topic}
-
-                    elif response.status == 429:  # Rate limit
-                        wait_time = 60
-                        self._log(f"Rate limit hit for '{topic}', waiting {wait_time}s...")
-                        await asyncio.sleep(wait_time)
-                        continue
-
-                    else:
-                        error_text = await response.text()
-                        return {'success': False, 'error': f"API error {response.status}: {error_text}", 'topic': topic}
-
-            except asyncio.TimeoutError:
-                self._log(f"Timeout for '{topic}', attempt {attempt + 1}/{retry_count}")
-                if attempt < retry_count - 1:
-                    await asyncio.sleep(10)
+                            # Parse the JSON response and add it to anything already checkpointed
+                            quiz_data = self._merge_questions(checkpoint, json.loads(content))
+                    reply.update(status=200, quiz_data=quiz_data, usage=usage, content=content,
+                                 finish_reason=finish_reason)
+        except Exception as e:
+            reply['error'] = 'Request timeout' if isinstance(e, asyncio.TimeoutError) else str(e)
+            reply['outcome'] = self.retry_policy.classify(error=e)
+        return reply
+
+    async def _send_with_hedge(self, topic: str, shard: tuple, label: str, key: str, payload: Dict[str, Any],
+                               headers: Dict[str, str], timeout: aiohttp.ClientTimeout,
+                               checkpoint: Dict[str, Any], estimated_tokens: int,
+                               hedge_after: float = None) -> Dict[str, Any]:
+        """Send a request; if it is still unanswered after `hedge_after` seconds, send a duplicate
+        and return whichever succeeds first. The other one is cancelled. A streamed hedge
+        checkpoints to its own file; only the winner's questions end up in the topic's checkpoint."""
+        if hedge_after is None:
+            return await self._send(key, payload, headers, timeout, checkpoint)
+        self.hedging.requests += 1
+        snapshot = copy.deepcopy(checkpoint)  # A streamed primary fills `checkpoint` as it goes
+        sent = {}  # task -> when its request went out
+        primary = asyncio.create_task(self._send(key, payload, headers, timeout, checkpoint))
+        sent[primary] = time.time()
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not self.hedging.allow() or self.circuit_breaker.is_open:
+            return await primary
+
+        hedge_key = f"{key}.hedge"
+
+        async def hedged():
+            # The duplicate is paid for from the same RPM/TPM budget as every other request;
+            # it only counts as sent once that reservation is made
+            await self.rate_limiter.acquire(estimated_tokens)
+            sent[hedge] = time.time()
+            self.hedging.fired += 1
+            HEDGES.inc(result='fired')
+            self._log(f"⑂ '{label}' unanswered after {hedge_after:.1f}s - sending a hedged duplicate")
+            return await self._send(hedge_key, payload, headers, timeout, snapshot)
+
+        hedge = asyncio.create_task(hedged())
+        pending = {primary, hedge}
+        winner = None
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                replies = sorted(((task, task.result()) for task in done), key=lambda tr: 'error' in tr[1])
+                winner, reply = replies[0]
+                if 'error' in reply and pending:
+                    winner = None
+                for task, other in replies:
+                    if task is not winner:
+                        self._discard_reply(topic, shard, other, estimated_tokens)
+                if winner is None:
                     continue
-                return {'success': False, 'error': 'Request timeout', 'topic': topic}
-
-            except Exception as e:
-                self._log(f"Error for '{topic}': {str(e)}")
-                if attempt < retry_count - 1:
-                    await asyncio.sleep(10)
+                if winner is hedge and 'error' not in reply:
+                    self.hedging.won += 1
+                    self.hedging.hedge_tokens += (reply['usage'] or {}).get('total_tokens') or 0
+                    HEDGES.inc(result='won')
+                return reply
+        finally:
+            for task in pending:
+                task.cancel()
+                if task in sent:
+                    # It may already have been billed, so its reservation stays spent
+                    self.hedging.cancelled_tokens += estimated_tokens
+                    HEDGES.inc(result='cancelled')
+                    self._record_attempt(topic, shard, 'cancelled', None, sent[task])
+            await asyncio.gather(*pending, return_exceptions=True)
+            if winner is hedge and self.stream and 'error' not in hedge.result():
+                # The cancelled primary checkpointed its own partial stream - keep the hedge's
+                self._write_checkpoint(key, hedge.result()['quiz_data'])
+            self._checkpoint_path(hedge_key).unlink(missing_ok=True)
+
+    def _discard_reply(self, topic: str, shard: tuple, reply: Dict[str, Any], estimated_tokens: int):
+        """Settle the reservation and journal entry of a hedged request whose reply isn't used"""
+        if 'error' not in reply:
+            self.rate_limiter.record_usage(estimated_tokens, reply['usage'])
+            self._record_attempt(topic, shard, 'ok', 200, reply['started'], reply['usage'])
+            return
+        if reply['status'] is not None:
+            self.rate_limiter.release(estimated_tokens)
+        self._record_attempt(topic, shard, reply['outcome'], reply['status'], reply['started'])
+
+    def _record_attempt(self, topic: str, shard: tuple, outcome: str, status: int,
+                        started: float, usage: Dict[str, Any] = None, request: Dict[str, Any] = None):
+        """Journal one HTTP attempt and add its billed tokens to the topic's total.
+
+        For answered requests `request` describes them (questions asked for and delivered, cap,
+        prompt size, finish_reason); with the usage it feeds the adaptive limits.
+        """
+        latency = time.time() - started
+        tokens = (usage or {}).get('total_tokens')
+        if tokens:
+            self.topic_tokens[topic] = self.topic_tokens.get(topic, 0) + tokens
+        API_LATENCY.observe(latency, outcome=outcome, status=status or 'none')
+        TOKENS.inc((usage or {}).get('prompt_tokens') or 0, direction='in')
+        TOKENS.inc((usage or {}).get('completion_tokens') or 0, direction='out')
+        trace_event('quiz.request', started, latency, topic=topic, shard=shard[0] if shard else None,
+                    outcome=outcome, status=status, tokens=tokens)
+        details = {}
+        if request and usage:
+            details = dict(request, version=self.prompt_version, prompt_tokens=usage.get('prompt_tokens'),
+                           completion_tokens=usage.get('completion_tokens'))
+            self.usage_history.record(topic, self.prompt_version, request['questions'], request['delivered'],
+                                      request['prompt_chars'], details['prompt_tokens'] or 0,
+                                      details['completion_tokens'] or 0, latency, request.get('finish_reason'))
+        self.journal.record(topic, 'attempt', shard=shard[0] if shard else None, outcome=outcome,
+                            status=status, latency=round(latency, 3), total_tokens=tokens, **details)
+
+    async def _read_stream(self, topic: str, response: aiohttp.ClientResponse,
+                           checkpoint: Dict[str, Any]):
+        """Consume an SSE completion, checkpointing each question the moment it closes"""
+        parser = IncrementalQuizParser()
+        usage = None
+        finish_reason = None
+
+        async for line in response.content:
+            data = sse_data(line)
+            if not data:
+                continue
+            if data == '[DONE]':
+                break
+            event = json.loads(data)
+            if event.get('usage'):
+                usage = event['usage']
+            for choice in event.get('choices') or []:
+                finish_reason = choice.get('finish_reason') or finish_reason
+                delta = (choice.get('delta') or {}).get('content')
+                if not delta:
                     continue
-                return {'success': False, 'error': str(e), 'topic': topic}
+                for difficulty, question in parser.feed(delta):
+                    if self._validate_question(question):
+                        checkpoint['quiz'][difficulty].append(question)
+                        self._write_checkpoint(topic, checkpoint)
+
+        # Raises StreamTruncated if the body never closed - completed questions stay checkpointed.
+        # A body cut off at the token cap is expected to be incomplete; the caller continues it.
+        if finish_reason != 'length':
+            parser.result()
+        return checkpoint, usage, parser.text, finish_reason
+
+    def _salvage_questions(self, checkpoint: Dict[str, Any], content: str) -> Dict[str, Any]:
+        """Add the questions that closed before a completion was cut off to the checkpoint"""
+        parser = IncrementalQuizParser()
+        for difficulty, question in parser.feed(content):
+            if self._validate_question(question):
+                checkpoint['quiz'][difficulty].append(question)
+        return checkpoint
+
+    def _load_cached_response(self, cache_key: str, checkpoint: Dict[str, Any],
+                              targets: Dict[str, int] = None):
+        """Quiz data rebuilt from a cached response, or None on a miss / unusable entry"""
+        if not self.cache:
+            return None
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+        try:
+            quiz_data = self._merge_questions(checkpoint, json.loads(entry['content']))
+        except (ValueError, KeyError, TypeError):
+            return None
+        return quiz_data if self._validate_result(quiz_data, targets) else None
+
+    def _needs_generation(self, topic: str) -> bool:
+        """Missing outputs always; existing ones only when stale and --regenerate-stale is set"""
+        if not self._is_topic_already_processed(topic):
+            return True
+        if not (self.regenerate_stale and self.cache):
+            return False
+        recorded = self.cache.output_keys(topic)
+        return recorded is not None and recorded != self._request_keys(topic)
+
+    def report_regeneration_plan(self) -> Dict[str, List[str]]:
+        """Dry run: classify every topic by what a real run would do, without any API calls"""
+        plan = {'up-to-date': [], 'untracked': [], 'stale': [], 'cached': [], 'new': []}
+        for topic in self.topics:
+            keys = self._request_keys(topic)
+            cached = self.cache is not None and all(self.cache.contains(k) for k in keys)
+            if self._is_topic_already_processed(topic):
+                recorded = self.cache.output_keys(topic) if self.cache else None
+                if recorded is None:
+                    plan['untracked'].append(topic)
+                elif recorded == keys:
+                    plan['up-to-date'].append(topic)
+                else:
+                    plan['stale'].append(topic)
+            else:
+                plan['cached' if cached else 'new'].append(topic)
+
+        descriptions = {
+            'up-to-date': 'output matches the current prompt/model/parameters',
+            'untracked': 'output exists but predates the cache - kept as is',
+            'stale': 'request changed since the output was saved (regenerated with --regenerate-stale)',
+            'cached': 'missing output, served from the response cache at no cost',
+            'new': 'missing output, needs a billed request',
+        }
+        self._log(f"Dry run for {len(self.topics)} topics (model {MODEL_NAME}, shards: {self.shard_mode})")
+        for status, topics in plan.items():
+            self._log(f"  {status:<11} {len(topics):>4}  - {descriptions[status]}")
+            if status in ('stale', 'new'):
+                for topic in topics:
+                    self._log(f"      • {topic}")
+        return plan
+
+    async def _make_sharded_request(self, topic: str) -> Dict[str, Any]:
+        """Fan a topic out into concurrent shard requests and merge them into one quiz"""
+        plan = self._shard_plan()
+        results = await asyncio.gather(*(
+            self._make_api_request(topic, targets, (index, len(plan)))
+            for index, targets in enumerate(plan, 1)
+        ))
+
+        failed = [r for r in results if not r['success']]
+        if failed:
+            return {'success': False, 'topic': topic,
+                    'error': f"{len(failed)}/{len(plan)} shards failed: {failed[0]['error']}"}
+
+        merged = {'quiz': {d: [] for d in DIFFICULTIES}}
+        for result in results:
+            merged = self._merge_questions(merged, result['data'])
+        total = sum(len(r['data']['quiz'].get(d) or []) for r in results for d in DIFFICULTIES)
+        kept = sum(len(merged['quiz'][d]) for d in DIFFICULTIES)
+        if kept < total:
+            self._log(f"Removed {total - kept} cross-shard duplicate question(s) for '{topic}'")
+
+        if self._validate_quiz_structure(merged):
+            return {'success': True, 'data': merged, 'topic': topic}
+        return {'success': False, 'error': f'Invalid structure: {self._get_validation_error(merged)}', 'topic': topic}
+
+    def _shard_plan(self) -> List[Dict[str, int]]:
+        """Question counts per shard request for the configured shard mode"""
+        plan = []
+        for target in DIFFICULTIES:
+            size = QUESTIONS_PER_DIFFICULTY if self.shard_mode == 'difficulty' else SHARD_CHUNK_SIZE
+            for start in range(0, QUESTIONS_PER_DIFFICULTY, size):
+                count = min(size, QUESTIONS_PER_DIFFICULTY - start)
+                plan.append({d: (count if d == target else 0) for d in DIFFICULTIES})
+        return plan
+
+    def _validate_result(self, quiz_data: Dict[str, Any], targets: Dict[str, int] = None) -> bool:
+        """Full-quiz validation, or for a shard: every requested difficulty present and valid"""
+        if targets is None:
+            return self._validate_quiz_structure(quiz_data)
+        try:
+            quiz = quiz_data['quiz']
+            for d in DIFFICULTIES:
+                questions = quiz.get(d) or []
+                if targets[d] and not questions:
+                    return False
+                if not all(self._validate_question(q) for q in questions):
+                    return False
+            return True
+        except Exception:
+            return False
 
-        return {'success': False, 'error': 'Max retries exceeded', 'topic': topic}
+    def _missing_counts(self, quiz_data: Dict[str, Any], targets: Dict[str, int] = None) -> Dict[str, int]:
+        """Questions still needed per difficulty to reach the target count"""
+        if targets is None:
+            targets = {d: QUESTIONS_PER_DIFFICULTY for d in DIFFICULTIES}
+        return {d: max(0, targets[d] - len(quiz_data['quiz'][d])) for d in DIFFICULTIES}
+
+    @staticmethod
+    def _normalize_question(text: str) -> str:
+        """Case/punctuation-insensitive form used to spot repeated questions"""
+        return ' '.join(re.sub(r'[^\w\s]', '', str(text).lower()).split())
+
+    def _merge_questions(self, base: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+        """Append questions from `extra` to `base`, skipping repeats of a question already present"""
+        merged = {'quiz': {d: list(base['quiz'][d]) for d in DIFFICULTIES}}
+        seen = {self._normalize_question(q['question']) for d in DIFFICULTIES for q in merged['quiz'][d]}
+        for d in DIFFICULTIES:
+            for q in (extra.get('quiz') or {}).get(d) or []:
+                if not isinstance(q, dict):
+                    merged['quiz'][d].append(q)  # Left for validation to report
+                    continue
+                normalized = self._normalize_question(q.get('question', ''))
+                if normalized not in seen:
+                    merged['quiz'][d].append(q)
+                    seen.add(normalized)
+        return merged
+
+    def _checkpoint_path(self, topic: str) -> Path:
+        return self.checkpoint_dir / self._sanitize_filename(topic)
+
+    def _load_checkpoint(self, topic: str) -> Dict[str, Any]:
+        """Load the partial quiz for a topic, or an empty one"""
+        empty = {'quiz': {d: [] for d in DIFFICULTIES}}
+        path = self._checkpoint_path(topic)
+        if not path.exists():
+            return empty
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {'quiz': {d: [q for q in data['quiz'].get(d, []) if self._validate_question(q)]
+                             for d in DIFFICULTIES}}
+        except Exception as e:
+            self._log(f"Ignoring unreadable checkpoint for '{topic}': {e}")
+            return empty
+
+    def _write_checkpoint(self, topic: str, checkpoint: Dict[str, Any]):
+        """Atomically persist the partial quiz"""
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self._checkpoint_path(topic)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _clear_checkpoint(self, topic: str):
+        """Remove the topic's checkpoint and those of any of its shards"""
+        self._checkpoint_path(topic).unlink(missing_ok=True)
+        if self.shard_mode != 'off':
+            for index in range(1, len(self._shard_plan()) + 1):
+                self._checkpoint_path(f"{topic}.shard{index}").unlink(missing_ok=True)
+
+    def _validate_question(self, q: Dict[str, Any]) -> bool:
+        """Check a single question has its fields, 3 options and an answer among them"""
+        if not isinstance(q, dict) or not all(key in q for key in ['question', 'options', 'answer']):
+            return False
+        if not isinstance(q['options'], list) or len(q['options']) != 3:
+            return False
+        return q['answer'] in q['options']
 
     def _validate_quiz_structure(self, quiz_data: Dict[str, Any]) -> bool:
         """Validate that quiz has correct structure - accepts any number of questions per difficulty"""
@@ -184,11 +781,7 @@ class QuizGenerator:
             # Validate each question has required fields
             for difficulty in ['low', 'medium', 'hard']:
                 for q in quiz[difficulty]:
-                    if not all(key in q for key in ['question', 'options', 'answer']):
-                        return False
-                    if len(q['options']) != 3:
-                        return False
-                    if q['answer'] not in q['options']:
+                    if not self._validate_question(q):
                         return False
 
             return True
@@ -241,10 +834,15 @@ class QuizGenerator:
         """Save quiz data to a JSON file"""
         try:
             filename = self._sanitize_filename(topic)
-            filepath = OUTPUT_DIR / filename
+            filepath = self.output_dir / filename
 
-            with open(filepath, 'w', encoding='utf-8') as f:
+            # Write to a temp file and rename over the target so a crash never leaves half a quiz
+            tmp_path = filepath.with_name(filename + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(quiz_data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
 
             # Count questions
             low = len(quiz_data['quiz']['low'])
@@ -265,75 +863,164 @@ class QuizGenerator:
         log_message = f"[{timestamp}] {message}"
         print(log_message)
         self.log_entries.append(log_message)
+        # Written through immediately so a crash or Ctrl-C keeps everything logged so far
+        try:
+            if self._log_file is None:
+                self._log_file = open(LOG_FILE, 'a', encoding='utf-8')
+            self._log_file.write(log_message + '\n')
+            self._log_file.flush()
+        except Exception as e:
+            print(f"Error writing log: {e}")
 
     def _save_log(self):
-        """Save log entries to file"""
+        """Close the run's log file with a blank separator line"""
         try:
-            with open(LOG_FILE, 'a', encoding='utf-8') as f:
-                f.write('\n'.join(self.log_entries) + '\n\n')
+            if self._log_file is not None:
+                self._log_file.write('\n')
+                self._log_file.close()
+                self._log_file = None
         except Exception as e:
             print(f"Error saving log: {e}")
 
+    def _record_result(self, result: Dict[str, Any], latency: float = None):
+        """Save a successful result, or record the failure; either way journal the outcome"""
+        topic = result['topic']
+        if latency is not None:
+            latency = round(latency, 3)
+        tokens = self.topic_tokens.get(topic)
+        if result['success']:
+            if self._save_quiz(topic, result['data']):
+                self.generated_count += 1
+                self._clear_checkpoint(topic)
+                if self.cache:
+                    self.cache.record_output(topic, self._request_keys(topic))
+                self.journal.record(topic, 'succeeded', latency=latency, total_tokens=tokens)
+                self._quiz_ready(topic)
+                return
+            result = {'success': False, 'topic': topic, 'error': 'Could not save quiz file'}
+        self._log(f"✗ Failed to generate quiz for '{topic}': {result['error']}")
+        self.failed_topics.append({
+            'topic': topic,
+            'error': result['error']
+        })
+        self.journal.record(topic, 'failed', error=result['error'][:500], latency=latency, total_tokens=tokens)
+
+    def select_topics(self, mode: str):
+        """Narrow self.topics using the journal. 'resume' runs the topics an interrupted run
+        started but never finished first, then the ones it never reached, leaving out topics
+        that succeeded or failed; 'retry-failed' keeps only topics whose last entry is a failure"""
+        failed = set(self.journal.topics_in_state('failed'))
+        if mode == 'retry-failed':
+            self.topics = [topic for topic in self.topics if topic in failed]
+        elif mode == 'resume':
+            interrupted = set(self.journal.topics_in_state('started', 'in_progress'))
+            finished = failed | set(self.journal.topics_in_state('succeeded'))
+            self.topics = ([topic for topic in self.topics if topic in interrupted]
+                           + [topic for topic in self.topics if topic not in interrupted and topic not in finished])
+            self._log(f"resume: {len(interrupted & set(self.topics))} topics were interrupted mid-run")
+        else:
+            raise ValueError(f"Unknown journal mode '{mode}' (expected resume or retry-failed)")
+        self._log(f"{mode}: {len(self.topics)} topics selected from {self.journal.path.name}")
+
+    async def _process_topic(self, idx: int, total_topics: int, topic: str, semaphore: asyncio.Semaphore):
+        """Generate and save a single topic once a concurrency slot is free"""
+        # Check if topic already processed (and still matches the current request)
+        if not self._needs_generation(topic):
+            self._log(f"⊘ Skipping '{topic}' - already processed")
+            self.skipped_count += 1
+            self._quiz_ready(topic)
+            return
+
+        TOPICS_WAITING.inc()
+        async with semaphore:
+            TOPICS_WAITING.inc(-1)
+            self._log(f"--- Processing {idx}/{total_topics}: '{topic}' ---")
+            self.journal.record(topic, 'started', shard_mode=self.shard_mode)
+            start_time = time.time()
+
+            # Make API request (fanned out into shards when sharding is enabled)
+            with span('quiz.topic', topic=topic) as timing:
+                if self.shard_mode != 'off':
+                    result = await self._make_sharded_request(topic)
+                else:
+                    result = await self._make_api_request(topic)
+                timing.args['success'] = result['success']
+
+            elapsed = time.time() - start_time
+            TOPIC_SECONDS.observe(elapsed, result='ok' if result['success'] else 'failed')
+            self._record_result(result, elapsed)
+            self._log(f"Finished '{topic}' in {elapsed:.1f}s")
+
+    async def generate_all_quizzes_batch(self, state_file: Path = BATCH_STATE_FILE,
+                                         poll_interval: float = None):
+        """Generate every pending topic through the OpenAI Batch API (cheaper, not interactive)"""
+        from batch_backend import BatchBackend, BATCH_POLL_INTERVAL
+
+        if not self.api_key:
+            self._log("ERROR: OPENAI_API_KEY not found. Please set it in .env file")
+            return
+
+        self._log(f"Starting batch quiz generation for {len(self.topics)} topics")
+        self._log("=" * 80)
+        backend = BatchBackend(self, state_file, poll_interval or BATCH_POLL_INTERVAL)
+        await backend.run()
+
     async def generate_all_quizzes(self):
-        """Main method to generate quizzes for all topics sequentially"""
+        """Main method to generate quizzes for all topics concurrently"""
         if not self.api_key:
             self._log("ERROR: OPENAI_API_KEY not found. Please set it in .env file")
             return
 
         total_topics = len(self.topics)
+        run_start = time.time()
         self._log(f"Starting quiz generation for {total_topics} topics")
-        self._log(f"Processing: 1 request every {DELAY_BETWEEN_REQUESTS} seconds")
-        self._log(f"Timeout per request: {REQUEST_TIMEOUT} seconds (3 minutes)")
+        self._log(f"Processing: up to {self.max_concurrency} requests in flight "
+                  f"(limits: {REQUESTS_PER_MINUTE} RPM, {TOKENS_PER_MINUTE} TPM)")
+        self._log(f"Timeout per request: {REQUEST_TIMEOUT} seconds ({REQUEST_TIMEOUT / 60:.0f} minutes)")
+        if self.adaptive_limits:
+            self._log("Request limits: " + self.usage_history.describe(
+                self.prompt_version, QUESTIONS_PER_DIFFICULTY * len(DIFFICULTIES), MAX_COMPLETION_TOKENS,
+                REQUEST_TIMEOUT))
+        if self.shard_mode != 'off':
+            self._log(f"Sharding: '{self.shard_mode}' mode, {len(self._shard_plan())} concurrent requests per topic")
         self._log(f"Each quiz: 90 questions (28-32 low, 28-32 medium, 28-32 hard)")
-        estimated_time = (total_topics * DELAY_BETWEEN_REQUESTS) / 60
-        self._log(f"Estimated time: {estimated_time:.1f} minutes ({estimated_time/60:.1f} hours)")
         self._log("=" * 80)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.cache:
+            evicted = self.cache.evict()
+            if evicted:
+                self._log(f"Evicted {evicted} old response cache entries")
 
         # Create aiohttp session
         async with aiohttp.ClientSession() as session:
             self.session = session
+            # Topics in flight and HTTP requests in flight are both capped at max_concurrency;
+            # a sharded or hedged topic shares the request slots with every other topic
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.request_slots = asyncio.Semaphore(self.max_concurrency)
 
-            # Process topics one by one with delay
-            for idx, topic in enumerate(self.topics, 1):
-                self._log(f"\n--- Processing {idx}/{total_topics}: '{topic}' ---")
-
-                # Check if topic already processed
-                if self._is_topic_already_processed(topic):
-                    self._log(f"⊘ Skipping '{topic}' - already processed")
-                    self.skipped_count += 1
-                    continue
-
-                start_time = time.time()
+            await asyncio.gather(*(
+                self._process_topic(idx, total_topics, topic, semaphore)
+                for idx, topic in enumerate(self.topics, 1)
+            ))
 
-                # Make API request
-                result = await self._make_api_request(topic)
-
-                # Save result
-                if result['success']:
-                    if self._save_quiz(result['topic'], result['data']):
-                        self.generated_count += 1
-                else:
-                    self._log(f"✗ Failed to generate quiz for '{result['topic']}': {result['error']}")
-                    self.failed_topics.append({
-                        'topic': result['topic'],
-                        'error': result['error']
-                    })
-
-                elapsed = time.time() - start_time
-
-                # Wait before next request (except for the last one)
-                if idx < total_topics:
-                    wait_time = max(0, DELAY_BETWEEN_REQUESTS - elapsed)
-                    if wait_time > 0:
-                        self._log(f"Waiting {wait_time:.1f}s before next request...")
-                        await asyncio.sleep(wait_time)
+        self.elapsed_seconds = time.time() - run_start
+        self._finish_run(total_topics)
 
+    def _finish_run(self, total_topics: int):
+        """Log the run summary and close the log and journal"""
         # Summary
         self._log("\n" + "=" * 80)
         self._log(f"Quiz Generation Complete!")
         self._log(f"Successfully generated: {self.generated_count}/{total_topics}")
         self._log(f"Skipped (already processed): {self.skipped_count}/{total_topics}")
         self._log(f"Failed: {len(self.failed_topics)}/{total_topics}")
+        self._log(f"Wall-clock time: {self.elapsed_seconds:.1f}s")
+        if self.cache:
+            self._log(f"Response cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        if self.hedging:
+            self._log(f"Hedging: {self.hedging.summary()}")
 
         if self.generated_count > 0:
             total_questions = self.generated_count * 90
@@ -344,31 +1031,74 @@ class QuizGenerator:
             for failed in self.failed_topics:
                 self._log(f"  - {failed['topic']}: {failed['error']}")
 
+        # Failures are already in the journal - point at how to rerun just those
+        if self.failed_topics:
+            self._log(f"\nFailures recorded in {self.journal.path.name} - rerun them with --retry-failed")
+
         # Save log
         self._save_log()
-
-        # Save failed topics for retry
-        if self.failed_topics:
-            failed_file = BASE_DIR / 'failed_topics.json'
-            with open(failed_file, 'w', encoding='utf-8') as f:
-                json.dump(self.failed_topics, f, indent=2)
-            self._log(f"\nFailed topics saved to {failed_file}")
+        self.journal.close()
 
 
 async def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description='Generate 90-question quizzes for every topic in topics.json')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report which topics would be regenerated, cached or skipped, then exit')
+    parser.add_argument('--regenerate-stale', action='store_true',
+                        help='Also regenerate saved quizzes whose prompt/model/parameters changed')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Send a duplicate of any request slower than the rolling p90 and keep the first answer')
+    parser.add_argument('--static-limits', action='store_true',
+                        help='Always send the fixed token cap and timeout instead of sizing them from history')
+    parser.add_argument('--backend', choices=['live', 'batch'], default='live',
+                        help="'live' = concurrent chat-completions requests, 'batch' = OpenAI Batch API")
+    journal_mode = parser.add_mutually_exclusive_group()
+    journal_mode.add_argument('--resume', action='store_true',
+                              help='Continue an interrupted run: topics the journal shows as started but unfinished go '
+                                   'first, then untouched ones; succeeded and failed topics are left out')
+    journal_mode.add_argument('--retry-failed', action='store_true',
+                              help='Only rerun topics whose last journal entry is a failure')
+    parser.add_argument('--segregate', action='store_true',
+                        help='Afterwards, split changed quizzes into quizz_segregated / "lines for audio " chunks')
+    parser.add_argument('--metrics-dir', default=None,
+                        help='Write quizgen.prom and quizgen.trace.jsonl here (default: $METRICS_DIR, off if unset)')
+    args = parser.parse_args()
+    configure_metrics('quizgen', args.metrics_dir)
+
     print("=" * 80)
     print("Quiz Generator - OpenAI GPT-5-mini")
     print("90 Questions per Topic (30 Low, 30 Medium, 30 Hard)")
     print("=" * 80)
 
-    generator = QuizGenerator()
-    await generator.generate_all_quizzes()
+    generator = QuizGenerator(use_cache=not args.no_cache, regenerate_stale=args.regenerate_stale,
+                              adaptive_limits=ADAPTIVE_LIMITS and not args.static_limits,
+                              hedge=HEDGE_REQUESTS or args.hedge)
+    if args.resume:
+        generator.select_topics('resume')
+    elif args.retry_failed:
+        generator.select_topics('retry-failed')
+    if args.dry_run:
+        generator.report_regeneration_plan()
+        return
+    if args.backend == 'batch':
+        await generator.generate_all_quizzes_batch()
+    else:
+        await generator.generate_all_quizzes()
 
     print("\n" + "=" * 80)
     print(f"All quizzes saved to: {OUTPUT_DIR}")
     print("=" * 80)
 
+    if args.segregate:
+        from quiz_segregator import QuizSegregator
+        summary = QuizSegregator().run()
+        print(f"Segregated {summary['topics']} topics into {summary['files']} chunks "
+              f"({summary['adopted']} existing chunks kept, {summary['skipped']} topics unchanged)")
+        for topic, count in sorted(summary['leftover'].items()):
+            print(f"  ! {topic}: {count} leftover questions don't fill a chunk and were not written")
+
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Quiz Segregator - Split generated quizzes into video-sized chunks
+Turns every QuizzesOp/<topic>.json into quizz_segregated/<topic>.N.json (questions with
+question_id, options shuffled) and "lines for audio /<topic>.N.json" (question text only)
+in a single pass per topic. Only topics whose source or settings changed are rewritten, and
+on a topic's first run, chunks already on disk that still match its source are kept as they are.
+"""
+
+import os
+import json
+import random
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BASE_DIR = Path(__file__).parent
+SOURCE_DIR = BASE_DIR / 'QuizzesOp'
+SEGREGATED_DIR = BASE_DIR / 'quizz_segregated'
+AUDIO_LINES_DIR = BASE_DIR / 'lines for audio '  # Trailing space is part of the existing folder name
+STATE_FILE = BASE_DIR / 'segregation_state.json'
+
+CHUNK_SIZE = 15  # Questions per video
+MIX_STRATEGIES = ('interleave', 'ramp', 'sequential')
+DEFAULT_STRATEGY = 'interleave'
+DEFAULT_SEED = 0
+DIFFICULTIES = ('low', 'medium', 'hard')
+
+
+def _hash_file(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _settings_key(chunk_size: int, strategy: str, seed: int) -> str:
+    return f"{chunk_size}:{strategy}:{seed}"
+
+
+def _write_json(path: Path, data: Any):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def order_questions(quiz: Dict[str, List[Dict[str, Any]]], chunk_size: int, strategy: str,
+                    rng: random.Random) -> List[List[Dict[str, Any]]]:
+    """Shuffle each difficulty, mix them per `strategy` and cut into full chunks.
+
+    interleave - low, medium, hard, low, ... so every chunk has an even spread (default)
+    ramp       - like interleave, then each chunk is reordered easy -> hard
+    sequential - all low, then all medium, then all hard
+    Leftover questions that don't fill a chunk are left out (segregate_topic reports them).
+    """
+    pools = {d: list(quiz.get(d, [])) for d in DIFFICULTIES}
+    for d in DIFFICULTIES:
+        rng.shuffle(pools[d])
+
+    if strategy == 'sequential':
+        ordered = [q for d in DIFFICULTIES for q in pools[d]]
+    else:
+        ordered = []
+        for i in range(max(len(p) for p in pools.values())):
+            ordered.extend(pools[d][i] for d in DIFFICULTIES if i < len(pools[d]))
+
+    rank = {id(q): DIFFICULTIES.index(d) for d in DIFFICULTIES for q in pools[d]}
+    chunks = []
+    for start in range(0, len(ordered) - chunk_size + 1, chunk_size):
+        chunk = ordered[start:start + chunk_size]
+        if strategy == 'ramp':
+            chunk.sort(key=lambda q: rank[id(q)])
+        chunks.append(chunk)
+    return chunks
+
+
+def _question_key(q: Dict[str, Any]) -> tuple:
+    return q['question'], q['answer'], frozenset(q['options'])
+
+
+def _adopt_existing(topic: str, segregated_dir: Path, audio_dir: Path, chunk_size: int,
+                    quiz: Dict[str, List[Dict[str, Any]]]) -> tuple:
+    """Keep <topic>.1.json, .2.json, ... while each is a full chunk of questions from the source
+    (same question, answer and options) not used by an earlier chunk. Stops at the first missing
+    or mismatched chunk. Returns (adopted file names, keys of the questions they use)."""
+    available = {_question_key(q) for d in DIFFICULTIES for q in quiz.get(d, [])}
+    adopted, used = [], set()
+    while True:
+        name = f"{topic}.{len(adopted) + 1}.json"
+        try:
+            with open(segregated_dir / name, 'r', encoding='utf-8') as f:
+                questions = json.load(f)['quiz']
+            keys = [_question_key(q) for q in questions]
+        except (OSError, ValueError, KeyError, TypeError):
+            break
+        if len(keys) != chunk_size or len(set(keys)) != len(keys) or not set(keys) <= available - used:
+            break
+        if not (audio_dir / name).exists():
+            _write_json(audio_dir / name, {'quiz': [{'question_id': q['question_id'], 'question': q['question']}
+                                                    for q in questions]})
+        adopted.append(name)
+        used.update(keys)
+    return adopted, used
+
+
+def segregate_topic(source: str, segregated_dir: str, audio_dir: str, chunk_size: int = CHUNK_SIZE,
+                    strategy: str = DEFAULT_STRATEGY, seed: int = DEFAULT_SEED,
+                    adopt: bool = False) -> Dict[str, Any]:
+    """Write every chunk of one source quiz in both output formats (runs in a worker process).
+
+    With `adopt`, existing chunks that still match the source are kept untouched and only the
+    questions they don't cover are chunked, numbered after them. Questions that don't fill a
+    final chunk are counted in the result's 'leftover'.
+    """
+    source = Path(source)
+    topic = source.stem
+    with open(source, 'rb') as f:
+        raw = f.read()
+    quiz = json.loads(raw)['quiz']
+
+    written, used = [], set()
+    if adopt:
+        written, used = _adopt_existing(topic, Path(segregated_dir), Path(audio_dir), chunk_size, quiz)
+        quiz = {d: [q for q in quiz.get(d, []) if _question_key(q) not in used] for d in DIFFICULTIES}
+    remaining = sum(len(quiz.get(d, [])) for d in DIFFICULTIES)
+
+    # Seeded per topic so a rerun (or a run on another machine) produces the same chunks
+    rng = random.Random(f"{seed}:{topic}")
+    chunks = order_questions(quiz, chunk_size, strategy, rng)
+
+    adopted = len(written)
+    for n, chunk in enumerate(chunks, adopted + 1):
+        questions, lines = [], []
+        for question_id, q in enumerate(chunk, 1):
+            options = list(q['options'])
+            rng.shuffle(options)
+            questions.append({'question_id': question_id, 'question': q['question'],
+                              'options': options, 'answer': q['answer']})
+            lines.append({'question_id': question_id, 'question': q['question']})
+        name = f"{topic}.{n}.json"
+        _write_json(Path(segregated_dir) / name, {'quiz': questions})
+        _write_json(Path(audio_dir) / name, {'quiz': lines})
+        written.append(name)
+
+    return {'topic': topic, 'source_hash': hashlib.sha256(raw).hexdigest(), 'files': written,
+            'adopted': adopted, 'leftover': remaining - len(chunks) * chunk_size}
+
+
+class QuizSegregator:
+    """Incrementally keeps the segregated and audio-line folders in sync with QuizzesOp"""
+
+    def __init__(self, source_dir: Path = SOURCE_DIR, segregated_dir: Path = SEGREGATED_DIR,
+                 audio_dir: Path = AUDIO_LINES_DIR, state_file: Path = STATE_FILE,
+                 chunk_size: int = CHUNK_SIZE, strategy: str = DEFAULT_STRATEGY,
+                 seed: int = DEFAULT_SEED, workers: Optional[int] = None):
+        if strategy not in MIX_STRATEGIES:
+            raise ValueError(f"Unknown mixing strategy '{strategy}' (expected {', '.join(MIX_STRATEGIES)})")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.source_dir = Path(source_dir)
+        self.segregated_dir = Path(segregated_dir)
+        self.audio_dir = Path(audio_dir)
+        self.state_file = Path(state_file)
+        self.chunk_size = chunk_size
+        self.strategy = strategy
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.settings = _settings_key(chunk_size, strategy, seed)
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        _write_json(self.state_file, self.state)
+
+    def is_current(self, source: Path) -> bool:
+        """True if the topic's chunks exist and match its source and the current settings"""
+        entry = self.state.get(source.stem)
+        if not entry or entry.get('settings') != self.settings:
+            return False
+        if any(not (self.segregated_dir / name).exists() or not (self.audio_dir / name).exists()
+               for name in entry.get('files', [])):
+            return False
+        return entry.get('source_hash') == _hash_file(source)
+
+    def pending(self, force: bool = False) -> List[Path]:
+        """Source quizzes whose outputs are missing or out of date"""
+        sources = sorted(self.source_dir.glob('*.json'))
+        return sources if force else [s for s in sources if not self.is_current(s)]
+
+    def _remove_stale(self, topic: str, keep: List[str]):
+        """Delete chunk files from an earlier run that the new chunking no longer produces"""
+        for name in set(self.state.get(topic, {}).get('files', [])) - set(keep):
+            (self.segregated_dir / name).unlink(missing_ok=True)
+            (self.audio_dir / name).unlink(missing_ok=True)
+
+    def _record(self, result: Dict[str, Any]):
+        self._remove_stale(result['topic'], result['files'])
+        self.state[result['topic']] = {
+            'source_hash': result['source_hash'],
+            'settings': self.settings,
+            'files': result['files'],
+        }
+
+    def worker_args(self, source: Path, force: bool = False) -> tuple:
+        """segregate_topic arguments after `source`, matching this segregator's settings. A topic
+        it has never recorded adopts the chunks already on disk, unless forced."""
+        adopt = not force and source.stem not in self.state
+        return (str(self.segregated_dir), str(self.audio_dir), self.chunk_size, self.strategy, self.seed, adopt)
+
+    def record(self, result: Dict[str, Any]):
+        """Adopt one segregate_topic result and persist the state (for callers outside run())"""
+        self._record(result)
+        self._save_state()
+
+    def run(self, force: bool = False) -> Dict[str, Any]:
+        """Segregate every changed topic across a process pool; returns a summary"""
+        self.segregated_dir.mkdir(parents=True, exist_ok=True)
+        self.audio_dir.mkdir(parents=True, exist_ok=True)
+        sources = self.pending(force)
+        summary = {'topics': 0, 'files': 0, 'skipped': len(list(self.source_dir.glob('*.json'))) - len(sources),
+                   'adopted': 0, 'leftover': {}, 'failed': []}
+        if not sources:
+            return summary
+
+        if self.workers == 1 or len(sources) == 1:
+            outcomes = []
+            for source in sources:
+                try:
+                    outcomes.append((source, segregate_topic(str(source), *self.worker_args(source, force)), None))
+                except Exception as e:
+                    outcomes.append((source, None, e))
+        else:
+            outcomes = []
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(sources))) as pool:
+                futures = {pool.submit(segregate_topic, str(source), *self.worker_args(source, force)): source
+                           for source in sources}
+                for future in as_completed(futures):
+                    try:
+                        outcomes.append((futures[future], future.result(), None))
+                    except Exception as e:
+                        outcomes.append((futures[future], None, e))
+
+        for source, result, error in outcomes:
+            if error is not None:
+                summary['failed'].append({'topic': source.stem, 'error': str(error)})
+                continue
+            self._record(result)
+            summary['topics'] += 1
+            summary['files'] += len(result['files'])
+            summary['adopted'] += result['adopted']
+            if result['leftover']:
+                summary['leftover'][result['topic']] = result['leftover']
+        self._save_state()
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split QuizzesOp quizzes into segregated and audio-line chunks')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Questions per chunk')
+    parser.add_argument('--strategy', choices=MIX_STRATEGIES, default=DEFAULT_STRATEGY,
+                        help='How difficulties are mixed within chunks')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Shuffle seed (per-topic streams)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rewrite every topic, even if unchanged')
+    parser.add_argument('--dry-run', action='store_true', help='List topics that would be rewritten')
+    args = parser.parse_args()
+
+    segregator = QuizSegregator(chunk_size=args.chunk_size, strategy=args.strategy,
+                                seed=args.seed, workers=args.workers)
+    if args.dry_run:
+        pending = segregator.pending(args.force)
+        for source in pending:
+            print(f"  would segregate: {source.stem}")
+        print(f"{len(pending)} topics out of date")
+        return
+
+    summary = segregator.run(args.force)
+    print(f"Segregated {summary['topics']} topics into {summary['files']} chunks "
+          f"({summary['adopted']} existing chunks kept, {summary['skipped']} topics unchanged)")
+    for topic, count in sorted(summary['leftover'].items()):
+        print(f"  ! {topic}: {count} leftover questions don't fill a chunk and were not written")
+    for failed in summary['failed']:
+        print(f"  ✗ {failed['topic']}: {failed['error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Rate Limiter - Token buckets for OpenAI requests-per-minute and tokens-per-minute limits
+Buckets are reserved before each request, reconciled with the `usage` field of the
+response and re-synchronised with the x-ratelimit-* headers the API sends back.
+"""
+
+import time
+import asyncio
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Continuously refilling bucket; waiters are served in FIFO order"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until `amount` tokens are available and take them. Returns seconds waited."""
+        # A single reservation can never exceed the bucket, otherwise it would wait forever
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float):
+        """Give back (positive) or charge (negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, remaining: float, limit: Optional[float] = None):
+        """Take the server's view of the bucket: it lowers our estimate when other clients share
+        the limit, and raises it (up to capacity) when the server has refilled faster than we assumed"""
+        if limit and limit != self.capacity:
+            self.capacity = float(limit)
+            self.rate = self.capacity / self.period
+        self._refill()
+        self.tokens = min(self.capacity, max(0.0, float(remaining)))
+
+
+class RateLimiter:
+    """Combined RPM + TPM limiter shared by every in-flight request"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Reserve one request and `estimated_tokens` tokens. Returns seconds spent waiting."""
+        waited = await self.requests.acquire(1)
+        try:
+            waited += await self.tokens.acquire(estimated_tokens)
+        except asyncio.CancelledError:
+            self.requests.adjust(1)  # Cancelled before it was sent - give the request back
+            raise
+        return waited
+
+    def record_usage(self, estimated_tokens: int, usage: Optional[Mapping]):
+        """Reconcile a reservation with the token count the API actually billed"""
+        if not usage:
+            return
+        actual = usage.get('total_tokens')
+        if actual is None:
+            actual = usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)
+        self.tokens.adjust(estimated_tokens - actual)
+
+    def release(self, estimated_tokens: int):
+        """Return a reservation for a request that never reached the model"""
+        self.tokens.adjust(estimated_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Refill the buckets from x-ratelimit-remaining-* / x-ratelimit-limit-* headers"""
+        for kind, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+            remaining = _header_number(headers, f'x-ratelimit-remaining-{kind}')
+            if remaining is None:
+                continue
+            bucket.sync(remaining, _header_number(headers, f'x-ratelimit-limit-{kind}'))
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
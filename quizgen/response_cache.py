@@ -0,0 +1,162 @@
+"""
+Response Cache - Content-addressed on-disk cache of chat-completion responses
+Entries are keyed by a hash of everything that shapes the completion (system prompt,
+filled user prompt, model, reasoning effort, token cap), so editing prompt.json or
+MODEL_NAME naturally invalidates exactly the topics whose request changed.
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Payload fields that change what the model produces - streaming flags deliberately excluded
+KEY_FIELDS = ('model', 'messages', 'reasoning_effort', 'max_completion_tokens', 'response_format')
+
+
+def request_key(payload: Dict[str, Any]) -> str:
+    """Stable SHA-256 of the fields of a chat-completions payload that affect the output"""
+    material = {field: payload.get(field) for field in KEY_FIELDS}
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _created(entry: Dict[str, Any], path: Path) -> float:
+    """Epoch seconds an entry was stored (entries written before it was a number: the ISO
+    string, or failing that the file's mtime)"""
+    created = entry.get('created_at')
+    if isinstance(created, (int, float)):
+        return float(created)
+    try:
+        return time.mktime(time.strptime(created, '%Y-%m-%dT%H:%M:%S'))
+    except (TypeError, ValueError):
+        return path.stat().st_mtime
+
+
+class ResponseCache:
+    """Raw responses + usage on disk, evicted by age (since created_at) and then
+    least-recently-used size (the file's mtime is its last use)"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 500 * 1024 * 1024, max_age_days: float = 30):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / 'entries'
+        self.outputs_file = self.cache_dir / 'outputs.json'
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._outputs = None
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}.json"
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        """The entry at `path` if it exists and hasn't expired; expired ones are deleted"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - _created(entry, path) > self.max_age:
+                path.unlink(missing_ok=True)
+                return None
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def contains(self, key: str) -> bool:
+        return self._read(self._entry_path(key)) is not None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry, refreshing its LRU timestamp, or None"""
+        path = self._entry_path(key)
+        entry = self._read(path)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mtime is the last-used time for LRU eviction (age comes from created_at)
+        except FileNotFoundError:
+            pass  # Evicted by another process since we read it
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, topic: str, content: str, usage: Optional[Dict[str, Any]] = None,
+            model: str = ''):
+        """Store a raw response body for `key`"""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'key': key,
+            'topic': topic,
+            'model': model,
+            'content': content,
+            'usage': usage or {},
+            'created_at': round(time.time(), 3),
+        }
+        _atomic_write_json(path, entry)
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used until under max_bytes.
+        Entries another process evicts at the same time are skipped."""
+        if not self.entries_dir.exists():
+            return 0
+        now = time.time()
+        removed = 0
+        live = []
+        for path in self.entries_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            # Created no later than last used, so an entry idle for max_age has expired unread
+            created = stat.st_mtime
+            if now - created <= self.max_age:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        created = _created(json.load(f), path)
+                except FileNotFoundError:
+                    continue
+                except (OSError, ValueError):
+                    pass  # Unreadable entry: aged by its last use
+            if now - created > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                live.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in live)
+        for _, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    # Which request keys produced each saved quiz - lets a dry run spot stale outputs
+
+    def _load_outputs(self) -> Dict[str, List[str]]:
+        if self._outputs is None:
+            try:
+                with open(self.outputs_file, 'r', encoding='utf-8') as f:
+                    self._outputs = json.load(f)
+            except (OSError, ValueError):
+                self._outputs = {}
+        return self._outputs
+
+    def output_keys(self, topic: str) -> Optional[List[str]]:
+        return self._load_outputs().get(topic)
+
+    def record_output(self, topic: str, keys: List[str]):
+        outputs = self._load_outputs()
+        outputs[topic] = list(keys)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_json(self.outputs_file, outputs)
+
+
+def _atomic_write_json(path: Path, data: Any):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,163 @@
+"""
+Retry Policy - Jittered exponential backoff for OpenAI requests
+Honours Retry-After / x-ratelimit-reset-* headers, keeps a separate retry budget per
+failure class and trips a shared circuit breaker after repeated 429s.
+"""
+
+import re
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+RATE_LIMIT = 'rate_limit'
+SERVER_ERROR = 'server_error'
+CLIENT_ERROR = 'client_error'
+TIMEOUT = 'timeout'
+NETWORK = 'network'
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+class RetryPolicy:
+    """Decides whether and how long to wait before retrying a failed request.
+
+    Subclass and override `classify` / `next_delay` to plug in a different strategy.
+    """
+
+    # Retries allowed per failure class - a 429 no longer burns a timeout's budget
+    DEFAULT_RULES = {
+        RATE_LIMIT: 8,
+        SERVER_ERROR: 4,
+        TIMEOUT: 2,
+        NETWORK: 3,
+        CLIENT_ERROR: 0,
+    }
+
+    def __init__(self, base_delay: float = 2.0, max_delay: float = 120.0,
+                 rules: Optional[Dict[str, int]] = None, rng: Optional[random.Random] = None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rules = {**self.DEFAULT_RULES, **(rules or {})}
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def classify(status: Optional[int] = None, error: Optional[BaseException] = None) -> str:
+        """Map an HTTP status or exception to a failure class"""
+        if error is not None:
+            return TIMEOUT if isinstance(error, asyncio.TimeoutError) else NETWORK
+        if status == 429:
+            return RATE_LIMIT
+        if status == 408:
+            return TIMEOUT
+        if status == 409 or status >= 500:
+            return SERVER_ERROR
+        return CLIENT_ERROR
+
+    def backoff(self, attempt: int) -> float:
+        """Equal-jitter exponential backoff: half fixed, half random"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+
+    def server_delay(self, headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """Seconds the server asked us to wait, if it said so"""
+        if not headers:
+            return None
+        if headers.get('retry-after-ms'):
+            try:
+                return float(headers['retry-after-ms']) / 1000
+            except ValueError:
+                pass
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            delay = _parse_retry_after(retry_after)
+            if delay is not None:
+                return delay
+        # Fall back to the reset time of whichever bucket is exhausted
+        resets = []
+        for kind in ('requests', 'tokens'):
+            reset = headers.get(f'x-ratelimit-reset-{kind}')
+            if reset and headers.get(f'x-ratelimit-remaining-{kind}') in ('0', None):
+                resets.append(parse_duration(reset))
+        resets = [r for r in resets if r is not None]
+        return max(resets) if resets else None
+
+    def next_delay(self, outcome: str, attempts: Dict[str, int],
+                   headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up. Updates `attempts` in place."""
+        used = attempts.get(outcome, 0)
+        if used >= self.rules.get(outcome, 0):
+            return None
+        attempts[outcome] = used + 1
+
+        hinted = self.server_delay(headers)
+        if hinted is not None:
+            # Up to 20% jitter so workers released by the same header don't stampede together
+            return min(self.max_delay, hinted) * self.rng.uniform(1.0, 1.2)
+        return self.backoff(used)
+
+
+class CircuitBreaker:
+    """Pauses every worker after `threshold` consecutive 429s"""
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.consecutive_rate_limits = 0
+        self.open_until = 0.0
+        self.trips = 0
+
+    def record_rate_limit(self, delay: float = 0.0) -> bool:
+        """Count a 429; returns True when this one opened the breaker"""
+        self.consecutive_rate_limits += 1
+        if self.consecutive_rate_limits < self.threshold:
+            return False
+        self.consecutive_rate_limits = 0
+        self.open_until = max(self.open_until, time.monotonic() + max(self.cooldown, delay))
+        self.trips += 1
+        return True
+
+    def record_success(self):
+        self.consecutive_rate_limits = 0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    async def wait(self) -> float:
+        """Block while the breaker is open. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            waited += remaining
+            await asyncio.sleep(remaining)
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI reset durations such as '1s', '6m0s' or '250ms'"""
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
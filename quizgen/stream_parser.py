@@ -0,0 +1,98 @@
+"""
+Stream Parser - Incremental parsing of streamed quiz completions
+Consumes server-sent event chunks from the chat-completions API and yields each
+question object of {"quiz": {"low": [...], ...}} as soon as its closing brace arrives.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DIFFICULTIES = ('low', 'medium', 'hard')
+
+
+class StreamTruncated(Exception):
+    """The stream ended (or was cut) before the quiz JSON was complete"""
+
+
+class IncrementalQuizParser:
+    """Character-level JSON scanner that finds completed question objects.
+
+    Only tracks nesting, strings and object keys - the question objects themselves are
+    handed to json.loads once they close, so no partial values are ever interpreted.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.stack: List[Dict[str, Any]] = []  # {'type': '{' or '[', 'key': parent key, 'last_key', 'expect_key'}
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.question_start: Optional[int] = None
+
+    def _in_difficulty_array(self) -> Optional[str]:
+        # root { -> quiz { -> difficulty [
+        if len(self.stack) == 3 and self.stack[2]['type'] == '[' and self.stack[1]['key'] == 'quiz':
+            key = self.stack[2]['key']
+            return key if key in DIFFICULTIES else None
+        return None
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Feed a text delta; yields (difficulty, question) for every question that closed"""
+        base = len(self.text)
+        self.text += chunk
+        text = self.text
+
+        for offset, ch in enumerate(chunk):
+            pos = base + offset
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    frame = self.stack[-1] if self.stack else None
+                    if frame and frame['type'] == '{' and frame['expect_key']:
+                        frame['last_key'] = json.loads(text[self.string_start:pos + 1])
+                        frame['expect_key'] = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = pos
+            elif ch in '{[':
+                parent = self.stack[-1] if self.stack else None
+                key = parent['last_key'] if parent and parent['type'] == '{' else None
+                if ch == '{' and self._in_difficulty_array():
+                    self.question_start = pos
+                self.stack.append({'type': ch, 'key': key, 'last_key': None, 'expect_key': ch == '{'})
+            elif ch in '}]':
+                if not self.stack:
+                    continue
+                self.stack.pop()
+                difficulty = self._in_difficulty_array()
+                if ch == '}' and difficulty and self.question_start is not None:
+                    try:
+                        question = json.loads(text[self.question_start:pos + 1])
+                    except json.JSONDecodeError:
+                        question = None
+                    self.question_start = None
+                    if isinstance(question, dict):
+                        yield difficulty, question
+            elif ch == ',' and self.stack and self.stack[-1]['type'] == '{':
+                self.stack[-1]['expect_key'] = True
+
+    def result(self) -> Dict[str, Any]:
+        """Parse the complete document; raises StreamTruncated if it never closed"""
+        try:
+            return json.loads(self.text)
+        except json.JSONDecodeError as e:
+            raise StreamTruncated(f"Incomplete JSON after {len(self.text)} characters: {e}")
+
+
+def sse_data(line: bytes) -> Optional[str]:
+    """Return the payload of an SSE `data:` line (None for comments / other fields)"""
+    decoded = line.decode('utf-8').strip()
+    if not decoded.startswith('data:'):
+        return None
+    return decoded[5:].strip()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Synthetic Topics - Reproducible topic lists for benchmarks
+Builds N unique topics shaped like the ones in topics.json from templates and subjects, so
+runs over 10, 100 or 10,000 topics are the same on every machine for a given seed.
+
+    python synthetic_topics.py --count 10000 -o topics_10k.json
+"""
+
+import json
+import random
+import argparse
+from pathlib import Path
+from typing import List
+
+CORPUS_SIZES = (10, 100, 10000)
+
+TEMPLATES = [
+    "Guess the {} from the Clues",
+    "{} Trivia Challenge",
+    "True or False: {} Edition",
+    "Name the {} in 10 Seconds",
+    "Only Experts Know These {} Facts",
+    "{} Myths Debunked",
+    "Match the {} to the Decade",
+    "Hard Mode: {} Quiz",
+]
+SUBJECTS = [
+    "Movie", "Country Capital", "Fast Food Slogan", "Famous Quote", "Chemical Element", "Board Game",
+    "Olympic Sport", "Dog Breed", "Cartoon Character", "Painting", "Constellation", "Dinosaur",
+    "Musical Instrument", "World Currency", "Cheese", "Volcano", "Car Logo", "Space Mission",
+    "Programming Language", "Greek God", "Football Club", "Mountain Range", "Pop Song", "Invention",
+]
+QUALIFIERS = ["", "Retro", "European", "Asian", "90s", "Modern", "Lesser-Known", "Iconic", "Tropical", "Ancient"]
+
+
+def synthetic_topics(count: int, seed: int = 0) -> List[str]:
+    """`count` distinct topics; a numbered volume is added once the combinations run out"""
+    rng = random.Random(seed)
+    combos = [(template, f"{qualifier} {subject}".strip())
+              for template in TEMPLATES for subject in SUBJECTS for qualifier in QUALIFIERS]
+    rng.shuffle(combos)
+    topics = []
+    for i in range(count):
+        template, subject = combos[i % len(combos)]
+        topic = template.format(subject)
+        volume = i // len(combos)
+        topics.append(f"{topic} Vol. {volume + 1}" if volume else topic)
+    return topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic topics.json for benchmarks')
+    parser.add_argument('--count', type=int, default=100, help=f"Number of topics (benchmarks use {CORPUS_SIZES})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', type=Path, default=None, help='Output file (default: topics_<count>.json)')
+    args = parser.parse_args()
+
+    output = args.output or Path(f"topics_{args.count}.json")
+    topics = synthetic_topics(args.count, args.seed)
+    output.write_text(json.dumps({'quizTopics': topics}, indent=2), encoding='utf-8')
+    print(f"📝 {len(topics)} topics written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Shared fixtures: a QuizGenerator wired to a temporary directory and the local mock API.
+The quizgen modules import each other by name, so the package directory goes on sys.path.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz_generator import QuizGenerator  # noqa: E402
+
+
+@pytest.fixture
+def make_generator(tmp_path):
+    """Build a quiet, non-streaming QuizGenerator for `url` with its files under tmp_path"""
+    def make(url, topics=('Rivers of Europe',), **kwargs):
+        options = dict(output_dir=tmp_path / 'quizzes', api_url=url, use_cache=False, stream=False,
+                       journal_file=tmp_path / 'quiz_jobs.jsonl', adaptive_limits=False, hedge=False)
+        options.update(kwargs)
+        generator = QuizGenerator(topics=list(topics), **options)
+        generator.api_key = 'mock-key'
+        generator._log = lambda message: None
+        generator._save_log = lambda: None
+        return generator
+    return make
@@ -0,0 +1,83 @@
+"""
+BatchBackend against the mock /v1/files and /v1/batches endpoints, including resuming a
+batch that was submitted by a process which then died.
+"""
+
+import json
+import asyncio
+
+import aiohttp
+
+from batch_backend import BatchBackend
+from mock_openai_server import MockOpenAIServer
+
+TOPICS = ('Rivers of Europe', 'Famous Inventors', 'Deserts of the World')
+
+
+def test_run_submits_one_batch_and_saves_every_quiz(make_generator, tmp_path):
+    server = MockOpenAIServer(batch_latency=0.05)
+    state_file = tmp_path / 'batch_state.json'
+
+    async def scenario():
+        url = await server.start()
+        try:
+            generator = make_generator(url, topics=TOPICS)
+            await BatchBackend(generator, state_file, poll_interval=0.01).run()
+            return generator
+        finally:
+            await server.stop()
+
+    generator = asyncio.run(scenario())
+
+    assert len(server.batches) == 1
+    assert generator.generated_count == len(TOPICS)
+    assert not generator.failed_topics
+    for topic in TOPICS:
+        assert (generator.output_dir / generator._sanitize_filename(topic)).exists()
+    assert not state_file.exists()  # Finished - the next run builds a fresh batch
+
+
+def test_run_resumes_a_submitted_batch_from_state_file(make_generator, tmp_path):
+    server = MockOpenAIServer(batch_latency=0.05)
+    state_file = tmp_path / 'batch_state.json'
+
+    async def scenario():
+        url = await server.start()
+        try:
+            # A first process submits the batch and dies before polling it
+            first = make_generator(url, topics=TOPICS)
+            async with aiohttp.ClientSession() as session:
+                await BatchBackend(first, state_file)._submit(session, list(TOPICS))
+            state = json.loads(state_file.read_text(encoding='utf-8'))
+
+            second = make_generator(url, topics=TOPICS)
+            await BatchBackend(second, state_file, poll_interval=0.01).run()
+            return state, second
+        finally:
+            await server.stop()
+
+    state, generator = asyncio.run(scenario())
+
+    assert list(server.batches) == [state['batch_id']]  # Polled, not submitted (and paid for) again
+    assert sorted(state['topics'].values()) == sorted(TOPICS)
+    assert generator.generated_count == len(TOPICS)
+    assert not state_file.exists()
+
+
+def test_failed_batch_lines_are_recorded_as_failures(make_generator, tmp_path):
+    server = MockOpenAIServer(batch_latency=0.0, fault_script=[200, 500, 200])
+
+    async def scenario():
+        url = await server.start()
+        try:
+            generator = make_generator(url, topics=TOPICS)
+            await BatchBackend(generator, tmp_path / 'batch_state.json', poll_interval=0.01).run()
+            return generator
+        finally:
+            await server.stop()
+
+    generator = asyncio.run(scenario())
+
+    assert generator.generated_count == 2
+    assert [f['topic'] for f in generator.failed_topics] == [TOPICS[1]]
+    assert 'Batch request failed' in generator.failed_topics[0]['error']
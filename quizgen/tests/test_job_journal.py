@@ -0,0 +1,35 @@
+"""
+Journal replay and the topic selection --resume / --retry-failed build on it.
+"""
+
+from job_journal import JobJournal
+
+
+def test_replay_skips_a_torn_final_line(tmp_path):
+    journal = JobJournal(tmp_path / 'quiz_jobs.jsonl')
+    journal.record('Rivers', 'started')
+    journal.record('Rivers', 'attempt', outcome='ok')
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"ts": 1, "topic": "Riv')
+    assert journal.replay()['Rivers']['state'] == 'in_progress'
+
+
+def test_resume_runs_interrupted_topics_first_and_leaves_out_finished_ones(make_generator):
+    topics = ['Done', 'Broken', 'Untouched', 'Interrupted', 'Mid-attempt']
+    generator = make_generator('http://127.0.0.1:1', topics=topics)
+    journal = generator.journal
+    journal.record('Done', 'started')
+    journal.record('Done', 'succeeded')
+    journal.record('Broken', 'started')
+    journal.record('Broken', 'failed', error='API error 400')
+    journal.record('Interrupted', 'started')
+    journal.record('Mid-attempt', 'started')
+    journal.record('Mid-attempt', 'attempt', outcome='timeout')
+
+    generator.select_topics('resume')
+    assert generator.topics == ['Interrupted', 'Mid-attempt', 'Untouched']
+
+    generator.topics = list(topics)
+    generator.select_topics('retry-failed')
+    assert generator.topics == ['Broken']
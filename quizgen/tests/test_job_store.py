@@ -0,0 +1,44 @@
+"""
+The job store through `job_store.py --call`, the way videogen/scripts/jobStore.ts drives it.
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import job_store
+
+SCRIPT = Path(job_store.__file__)
+
+
+def call(path, owner, method, **args):
+    result = subprocess.run([sys.executable, str(SCRIPT), '--call', '--path', str(path), '--owner', owner],
+                            input=json.dumps({'method': method, 'args': args}), capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout)
+
+
+def test_leases_and_details_across_owners(tmp_path):
+    db = tmp_path / 'jobs.sqlite'
+    assert call(db, 'a', 'enqueue_many', kind='render', names=['q1', 'q2']) == 2
+    assert call(db, 'a', 'enqueue_many', kind='render', names=['q1']) == 0
+
+    job = call(db, 'a', 'claim', kind='render', name='q1', lease=600, include_failed=False)
+    assert job['owner'] == 'a' and job['status'] == 'running'
+    assert call(db, 'b', 'claim', kind='render', name='q1', lease=600, include_failed=False) is None
+    assert not call(db, 'b', 'update_details', kind='render', name='q1', details={'x': 1})
+    assert call(db, 'a', 'update_details', kind='render', name='q1', details={'x': 1})
+    assert call(db, 'a', 'complete', kind='render', name='q1', details={'y': 2})
+
+    assert call(db, 'a', 'get', kind='render', name='q1')['details'] == {'x': 1, 'y': 2}
+    assert call(db, 'a', 'summary', kind='render') == {'pending': 1, 'running': 0, 'completed': 1,
+                                                         'failed': 0, 'stale': 0, 'total': 2}
+
+
+def test_unknown_methods_are_refused(tmp_path):
+    with pytest.raises(RuntimeError, match="Unknown job store method 'close'"):
+        call(tmp_path / 'jobs.sqlite', 'a', 'close')
@@ -0,0 +1,19 @@
+"""
+Token buckets re-synchronised from x-ratelimit-* response headers.
+"""
+
+from rate_limiter import RateLimiter
+
+
+def test_headers_can_lower_and_raise_the_buckets():
+    limiter = RateLimiter(100, 10000)
+    limiter.tokens.tokens = 2000  # Our estimate after a burst
+
+    limiter.update_from_headers({'x-ratelimit-remaining-requests': '40',
+                                 'x-ratelimit-remaining-tokens': '9000'})
+    assert limiter.requests.tokens == 40
+    assert limiter.tokens.tokens == 9000
+
+    limiter.update_from_headers({'x-ratelimit-remaining-tokens': '50000', 'x-ratelimit-limit-tokens': '20000'})
+    assert limiter.tokens.capacity == 20000
+    assert limiter.tokens.tokens == 20000
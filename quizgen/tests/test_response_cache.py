@@ -0,0 +1,45 @@
+"""
+Response cache expiry (by creation time) and LRU eviction (by last use).
+"""
+
+import os
+import json
+import time
+
+from response_cache import ResponseCache
+
+
+def backdate(cache, key, days):
+    """Pretend the entry was stored `days` ago"""
+    path = cache._entry_path(key)
+    with open(path, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['created_at'] -= days * 86400
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+
+
+def test_entries_expire_by_age_even_when_hit(tmp_path):
+    cache = ResponseCache(tmp_path, max_age_days=30)
+    cache.put('aa1', 'Rivers', '{}')
+    backdate(cache, 'aa1', 31)
+    os.utime(cache._entry_path('aa1'))  # Recently used
+
+    assert not cache.contains('aa1')
+    assert cache.get('aa1') is None
+    assert not cache._entry_path('aa1').exists()
+
+
+def test_evict_drops_old_entries_then_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10 ** 6, max_age_days=30)
+    for key in ('aa1', 'bb2', 'cc3'):
+        cache.put(key, key, 'x' * 100)
+    backdate(cache, 'aa1', 31)
+    now = time.time()
+    os.utime(cache._entry_path('aa1'), (now, now))
+    os.utime(cache._entry_path('bb2'), (now - 60, now - 60))
+    os.utime(cache._entry_path('cc3'), (now, now))
+    cache.max_bytes = cache._entry_path('cc3').stat().st_size
+
+    assert cache.evict() == 2
+    assert [path.stem for path in cache.entries_dir.glob('*/*.json')] == ['cc3']
@@ -0,0 +1,107 @@
+"""
+Retry policy, circuit breaker and non-retryable errors, end to end against the
+fault-injecting mock API (MockOpenAIServer.fault_script).
+"""
+
+import time
+import asyncio
+
+from mock_openai_server import MockOpenAIServer
+from retry_policy import RetryPolicy, CircuitBreaker, SERVER_ERROR, RATE_LIMIT
+
+FAST_RETRIES = dict(base_delay=0.01, max_delay=0.05)
+
+
+def run(server, generator_for):
+    """Start `server`, run the generator built by generator_for(url), stop the server"""
+    async def scenario():
+        url = await server.start()
+        try:
+            generator = generator_for(url)
+            await generator.generate_all_quizzes()
+            return generator
+        finally:
+            await server.stop()
+    return asyncio.run(scenario())
+
+
+def attempts(generator):
+    return [e['outcome'] for e in generator.journal.events() if e['event'] == 'attempt']
+
+
+def test_server_errors_are_retried_until_success(make_generator):
+    server = MockOpenAIServer(latency=0.01, fault_script=[500, 503, 500])
+    generator = run(server, lambda url: make_generator(url, retry_policy=RetryPolicy(**FAST_RETRIES)))
+
+    assert generator.generated_count == 1
+    assert not generator.failed_topics
+    assert server.request_count == 4
+    assert server.fault_counts == {500: 2, 503: 1}
+    assert attempts(generator) == [SERVER_ERROR, SERVER_ERROR, SERVER_ERROR, 'ok']
+
+
+def test_retry_budget_is_per_failure_class(make_generator):
+    # Two 5xx retries allowed; the 429 in between draws on its own budget
+    server = MockOpenAIServer(latency=0.01, fault_script=[500, 429, 500, 500, 500])
+    policy = RetryPolicy(rules={SERVER_ERROR: 2}, **FAST_RETRIES)
+    generator = run(server, lambda url: make_generator(url, retry_policy=policy))
+
+    assert generator.generated_count == 0
+    assert server.request_count == 4  # 500, 429, 500 (retried) and 500 (budget spent)
+    assert attempts(generator) == [SERVER_ERROR, RATE_LIMIT, SERVER_ERROR, SERVER_ERROR]
+    assert 'API error 500' in generator.failed_topics[0]['error']
+
+
+def test_retry_after_header_sets_the_delay():
+    policy = RetryPolicy(base_delay=100.0, max_delay=120.0)
+    delay = policy.next_delay(RATE_LIMIT, {}, {'retry-after': '0.5'})
+    assert 0.5 <= delay <= 0.6  # The server's hint plus up to 20% jitter, not the 100s backoff
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0)
+    for attempt, ceiling in enumerate([1, 2, 4, 8, 8]):
+        delay = policy.backoff(attempt)
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_repeated_429s_open_then_close_the_circuit_breaker(make_generator):
+    cooldown = 0.3
+    server = MockOpenAIServer(latency=0.01, fault_script=[429, 429, 429], retry_after=0.01)
+
+    def build(url):
+        generator = make_generator(url, retry_policy=RetryPolicy(**FAST_RETRIES))
+        generator.circuit_breaker = CircuitBreaker(threshold=3, cooldown=cooldown)
+        return generator
+
+    start = time.monotonic()
+    generator = run(server, build)
+    breaker = generator.circuit_breaker
+
+    assert breaker.trips == 1
+    assert time.monotonic() - start >= cooldown  # The fourth request waited out the open breaker
+    assert not breaker.is_open
+    assert breaker.consecutive_rate_limits == 0  # Reset by the success that followed
+    assert generator.generated_count == 1
+    assert attempts(generator) == [RATE_LIMIT, RATE_LIMIT, RATE_LIMIT, 'ok']
+
+
+def test_circuit_breaker_needs_consecutive_429s():
+    breaker = CircuitBreaker(threshold=2, cooldown=60.0)
+    assert not breaker.record_rate_limit()
+    breaker.record_success()
+    assert not breaker.record_rate_limit()
+    assert not breaker.is_open
+    assert breaker.record_rate_limit()
+    assert breaker.is_open
+
+
+def test_non_retryable_client_error_fails_immediately(make_generator):
+    server = MockOpenAIServer(latency=0.01, fault_script=[400])
+    generator = run(server, lambda url: make_generator(url, retry_policy=RetryPolicy(**FAST_RETRIES)))
+
+    assert server.request_count == 1
+    assert generator.generated_count == 0
+    assert len(generator.failed_topics) == 1
+    assert generator.failed_topics[0]['error'].startswith('API error 400')
+    assert generator.journal.topics_in_state('failed') == ['Rivers of Europe']
@@ -0,0 +1,141 @@
+"""
+Token Budget - Usage/latency history and adaptive limits for quiz requests
+Every billed attempt is journaled with its prompt version, question count, token usage,
+latency and finish_reason. UsageHistory folds those events into per-prompt-version and
+per-topic samples, normalised per question so full quizzes, shards and continuations share
+one history, and sizes the next request from it: max_completion_tokens and the timeout are
+the p99 per-question cost times the questions asked for, plus a margin. Until enough
+samples exist the static limits are used unchanged.
+
+TokenEstimator predicts a request's prompt tokens before it is sent - exactly with tiktoken
+when it is installed, otherwise from a characters-per-token ratio calibrated on the usage
+the API reported for earlier prompts.
+"""
+
+import hashlib
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+HISTORY_WINDOW = 500  # Most recent samples kept per prompt version
+TOPIC_WINDOW = 10  # ...and per topic
+MIN_SAMPLES = 20  # Below this the static cap / timeout are used
+QUANTILE = 0.99
+TOKEN_MARGIN = 1.25  # Multiplier on the p99 completion tokens
+LATENCY_MARGIN = 1.5  # Multiplier on the p99 latency
+MIN_COMPLETION_TOKENS = 2000  # Reasoning overhead dominates small continuation requests
+MIN_TIMEOUT = 60.0
+CHARS_PER_TOKEN = 4.0  # Estimator fallback before any usage has been seen
+MESSAGE_OVERHEAD_TOKENS = 3  # Per chat message, plus the same again to prime the reply
+
+
+def prompt_version(*parts: str) -> str:
+    """Short hash of everything that shapes a completion's length (prompts, model, effort)"""
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def quantile(values: Iterable[float], q: float = QUANTILE) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TokenEstimator:
+    """Pre-flight prompt token count for a chat-completions payload"""
+
+    def __init__(self, encoding: str = 'o200k_base'):
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding)
+        except Exception:  # Not installed, or the encoding can't be downloaded offline
+            self._encoding = None
+        self.chars_per_token = CHARS_PER_TOKEN
+        self._ratios: Deque[float] = deque(maxlen=HISTORY_WINDOW)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return int(len(text) / self.chars_per_token) + 1
+
+    def prompt_tokens(self, payload: Dict[str, Any]) -> int:
+        messages = payload['messages']
+        return (sum(self.count(m['content']) for m in messages)
+                + MESSAGE_OVERHEAD_TOKENS * (len(messages) + 1))
+
+    def calibrate(self, prompt_chars: int, prompt_tokens: int):
+        """Fold in the API's prompt_tokens for a prompt of `prompt_chars` characters"""
+        if prompt_chars <= 0 or not prompt_tokens:
+            return
+        self._ratios.append(prompt_chars / prompt_tokens)
+        self.chars_per_token = quantile(self._ratios, 0.5)  # Median - robust to odd prompts
+
+
+class UsageHistory:
+    """Per-question completion tokens and latency of past attempts, by prompt version and topic"""
+
+    def __init__(self, estimator: Optional[TokenEstimator] = None):
+        self.estimator = estimator or TokenEstimator()
+        self.tokens: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=HISTORY_WINDOW))
+        self.latency: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=HISTORY_WINDOW))
+        self.topic_tokens: Dict[tuple, Deque[float]] = defaultdict(lambda: deque(maxlen=TOPIC_WINDOW))
+        self.truncations: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict[str, Any]], estimator: Optional[TokenEstimator] = None):
+        """Rebuild the history from journal 'attempt' events"""
+        history = cls(estimator)
+        for event in events:
+            if event.get('event') == 'attempt' and event.get('version') and event.get('completion_tokens'):
+                history.record(event['topic'], event['version'], event.get('questions') or 0,
+                               event.get('delivered'), event.get('prompt_chars') or 0,
+                               event.get('prompt_tokens') or 0, event['completion_tokens'],
+                               event.get('latency') or 0.0, event.get('finish_reason'))
+        return history
+
+    def record(self, topic: str, version: str, questions: int, delivered: Optional[int], prompt_chars: int,
+               prompt_tokens: int, completion_tokens: int, latency: float, finish_reason: Optional[str]):
+        """Add one billed attempt. A truncated one is normalised by the questions it did deliver,
+        which is what those questions really cost."""
+        self.estimator.calibrate(prompt_chars, prompt_tokens)
+        if finish_reason == 'length':
+            self.truncations[version] += 1
+        per = delivered if finish_reason == 'length' else questions
+        if not per:
+            return
+        self.tokens[version].append(completion_tokens / per)
+        self.topic_tokens[version, topic].append(completion_tokens / per)
+        if finish_reason != 'length':  # A cut-off response says nothing about full latency
+            self.latency[version].append(latency / per)
+
+    def samples(self, version: str) -> int:
+        return len(self.tokens.get(version, ()))
+
+    def completion_cap(self, version: str, questions: int, ceiling: int, topic: Optional[str] = None) -> int:
+        """max_completion_tokens for a request of `questions` questions (the ceiling until MIN_SAMPLES)"""
+        if self.samples(version) < MIN_SAMPLES:
+            return ceiling
+        per_question = quantile(self.tokens[version])
+        if topic is not None and (version, topic) in self.topic_tokens:
+            per_question = max(per_question, max(self.topic_tokens[version, topic]))  # A topic known to run long
+        return max(MIN_COMPLETION_TOKENS, min(ceiling, int(per_question * questions * TOKEN_MARGIN)))
+
+    def timeout(self, version: str, questions: int, ceiling: float) -> float:
+        """Request timeout in seconds for `questions` questions (the ceiling until MIN_SAMPLES)"""
+        if len(self.latency.get(version, ())) < MIN_SAMPLES:
+            return ceiling
+        return max(MIN_TIMEOUT, min(ceiling, quantile(self.latency[version]) * questions * LATENCY_MARGIN))
+
+    def describe(self, version: str, questions: int, cap_ceiling: int, timeout_ceiling: float) -> str:
+        n = self.samples(version)
+        if n < MIN_SAMPLES:
+            return (f"static limits ({n}/{MIN_SAMPLES} samples for prompt version {version}): "
+                    f"{cap_ceiling} completion tokens, {timeout_ceiling:.0f}s timeout")
+        return (f"adaptive limits from {n} samples (prompt version {version}): "
+                f"p99 {quantile(self.tokens[version]):.0f} completion tokens/question -> "
+                f"{self.completion_cap(version, questions, cap_ceiling)} for {questions} questions, "
+                f"{self.timeout(version, questions, timeout_ceiling):.0f}s timeout, "
+                f"{self.truncations[version]} truncated responses")
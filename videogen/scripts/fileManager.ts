@@ -1,5 +1,8 @@
 import * as fs from 'fs';
+import * as os from 'os';
 import * as path from 'path';
+import { AUDIO_STAGING_DIR } from '../src/config/audio';
+import { JobStore, Job, DEFAULT_LEASE_SECONDS } from './jobStore';
 
 // Get project root dynamically - works on any machine
 const VIDEOGEN_DIR = path.resolve(__dirname, '..');
@@ -7,8 +10,9 @@ const PROJECT_ROOT = path.resolve(VIDEOGEN_DIR, '..');
 const QUIZ_JSONS_DIR = path.join(VIDEOGEN_DIR, 'quiz jsons');
 const AUDIO_DIR = path.join(PROJECT_ROOT, 'audiogen/output audios');
 const OUTPUT_DIR = path.join(VIDEOGEN_DIR, 'output/videos');
-const PROGRESS_FILE = path.join(VIDEOGEN_DIR, 'output/progress.json');
-const PUBLIC_AUDIO_DIR = path.join(VIDEOGEN_DIR, 'public/question_audios');
+const PROGRESS_FILE = path.join(VIDEOGEN_DIR, 'output/progress.json');  // Legacy, imported into the job store once
+const STAGING_ROOT = path.join(VIDEOGEN_DIR, 'public', AUDIO_STAGING_DIR);
+const STAGING_OWNER_FILE = '.owner';
 
 export interface QuizFileInfo {
   fileName: string;
@@ -64,81 +68,182 @@ export const getRandomQuizFile = (): QuizFileInfo => {
   return allQuizzes[randomIndex];
 };
 
-// Check if audio folder exists for a quiz
-export const audioFolderExists = (audioFolder: string): boolean => {
-  const audioPath = path.join(AUDIO_DIR, audioFolder);
-  return fs.existsSync(audioPath);
+// Per-clip metadata audiogen writes to manifest.json while generating a quiz's audio
+export interface AudioClipInfo {
+  question_id: number;
+  duration?: number; // seconds, sample-accurate
+  samples?: number;
+  sample_rate?: number;
+  peak_dbfs?: number;
+  rms_dbfs?: number;
+  bytes: number;
+  sha256: string;
+}
+
+export interface AudioManifest {
+  version: number;
+  voice: string;
+  speed: number;
+  model_version: string;
+  updated_at: string;
+  complete: boolean;
+  expected: string[];
+  total_duration: number; // seconds, over the clips with a measured duration
+  unmeasured?: string[]; // clips written without a measurable duration (no decoder available)
+  clips: Record<string, AudioClipInfo>;
+}
+
+export interface AudioFolderCheck {
+  ok: boolean;
+  reason?: string;
+  manifest: AudioManifest | null; // null for folders generated before manifests existed
+}
+
+// Read a quiz audio folder's manifest.json (null if missing or unreadable)
+export const readAudioManifest = (audioFolder: string): AudioManifest | null => {
+  const manifestPath = path.join(AUDIO_DIR, audioFolder, 'manifest.json');
+  try {
+    return JSON.parse(fs.readFileSync(manifestPath, 'utf-8'));
+  } catch {
+    return null;
+  }
 };
 
-// Check if video is already rendered
-export const isVideoRendered = (quizName: string): boolean => {
-  const progress = getProgress();
-  return progress[quizName]?.status === 'completed';
+// Check a quiz's audio folder holds a valid clip for every question, without decoding audio.
+// Uses the manifest when present (clip listed and byte size unchanged), otherwise falls back
+// to checking each question_<id>.mp3 exists and is non-empty.
+export const checkAudioFolder = (audioFolder: string, questionIds: number[]): AudioFolderCheck => {
+  const audioPath = path.join(AUDIO_DIR, audioFolder);
+  if (!fs.existsSync(audioPath)) {
+    return { ok: false, reason: 'Audio folder not found', manifest: null };
+  }
+
+  const manifest = readAudioManifest(audioFolder);
+  for (const id of questionIds) {
+    const file = `question_${id}.mp3`;
+    let size: number;
+    try {
+      size = fs.statSync(path.join(audioPath, file)).size;
+    } catch {
+      return { ok: false, reason: `Missing audio clip ${file}`, manifest };
+    }
+    if (manifest) {
+      const clip = manifest.clips[file];
+      if (!clip) {
+        return { ok: false, reason: `Audio clip ${file} not in manifest`, manifest };
+      }
+      if (clip.bytes !== size) {
+        return { ok: false, reason: `Audio clip ${file} changed since generation`, manifest };
+      }
+    } else if (size === 0) {
+      return { ok: false, reason: `Empty audio clip ${file}`, manifest };
+    }
+  }
+  return { ok: true, manifest };
 };
 
-// Load progress from file
-export const getProgress = (): Progress => {
-  if (!fs.existsSync(PROGRESS_FILE)) {
-    return {};
+// Shared job store (jobs.sqlite at the project root), opened on first use
+let jobStore: JobStore | null = null;
+
+export const getJobStore = (): JobStore => {
+  if (!jobStore) {
+    jobStore = new JobStore();
+    migrateProgressFile(jobStore);
   }
+  return jobStore;
+};
 
+// One-time import of the old progress.json into an empty store
+const migrateProgressFile = (store: JobStore): void => {
+  if (store.summary('render').total > 0 || !fs.existsSync(PROGRESS_FILE)) {
+    return;
+  }
+  let progress: Progress;
   try {
     const content = fs.readFileSync(PROGRESS_FILE, 'utf-8').trim();
-    if (!content) {
-      return {};
-    }
-    return JSON.parse(content);
+    progress = content ? JSON.parse(content) : {};
   } catch (error) {
-    console.error('Error reading progress file, resetting:', error.message);
-    // Reset corrupted file
-    saveProgress({});
-    return {};
+    console.error('Error reading progress file, not importing it:', error.message);
+    return;
   }
+  Object.entries(progress).forEach(([quizName, entry]) => {
+    const { status, lastError, attempts, ...details } = entry;
+    store.enqueue('render', quizName, details);
+    // in_progress entries were never finished, so they stay pending
+    if ((status === 'completed' || status === 'failed') && store.claim('render', quizName)) {
+      if (status === 'completed') {
+        store.complete('render', quizName);
+      } else {
+        store.fail('render', quizName, lastError || 'Imported from progress.json');
+      }
+    }
+  });
+  console.log(`📦 Imported ${Object.keys(progress).length} entries from progress.json into the job store`);
 };
 
-// Save progress to file
-export const saveProgress = (progress: Progress): void => {
-  const outputDir = path.dirname(PROGRESS_FILE);
-  if (!fs.existsSync(outputDir)) {
-    fs.mkdirSync(outputDir, { recursive: true });
-  }
+// Make sure every quiz JSON has a render job (existing jobs are untouched)
+export const syncRenderJobs = (quizzes: QuizFileInfo[] = getQuizList()): number => {
+  return getJobStore().enqueueMany('render', quizzes.map((q) => q.baseName));
+};
+
+// Take the render lease on a quiz; null if another renderer holds a live lease on it.
+// A finished or failed job is reset first, so an explicit render always runs again.
+export const claimRender = (quizName: string, leaseSeconds = DEFAULT_LEASE_SECONDS): Job | null => {
+  const store = getJobStore();
+  store.enqueue('render', quizName, {}, true);
+  return store.claim('render', quizName, leaseSeconds);
+};
 
-  fs.writeFileSync(PROGRESS_FILE, JSON.stringify(progress, null, 2), 'utf-8');
+// Take the oldest pending render job (or one whose renderer's lease expired)
+export const claimNextRender = (leaseSeconds = DEFAULT_LEASE_SECONDS): Job | null => {
+  return getJobStore().claim('render', undefined, leaseSeconds);
+};
+
+// Extend our render lease; false if it was lost to another renderer
+export const renewRender = (quizName: string, leaseSeconds = DEFAULT_LEASE_SECONDS): boolean => {
+  return getJobStore().heartbeat('render', quizName, leaseSeconds);
+};
+
+// Put failed render jobs back to pending so the next batch retries them
+export const retryFailedRenders = (): number => {
+  const store = getJobStore();
+  const failed = store.jobs('render', 'failed');
+  failed.forEach((job) => store.enqueue('render', job.name, {}, true));
+  return failed.length;
+};
+
+// Put render jobs whose renderer stopped heartbeating back to pending
+export const releaseExpiredRenders = (): string[] => {
+  return getJobStore().releaseExpired('render');
+};
+
+// Check if video is already rendered
+export const isVideoRendered = (quizName: string): boolean => {
+  return getJobStore().get('render', quizName)?.status === 'completed';
 };
 
-// Update progress for a specific quiz
+// Record the outcome of a render we hold the lease on (status 'in_progress' only updates details)
 export const updateProgress = (
   quizName: string,
   entry: Partial<ProgressEntry>
-): void => {
-  const progress = getProgress();
-  
-  if (!progress[quizName]) {
-    progress[quizName] = {
-      status: 'in_progress',
-      templateId: '',
-      outputFile: '',
-      attempts: 0,
-    };
+): boolean => {
+  const store = getJobStore();
+  const { status, lastError, attempts, ...details } = entry;
+  if (status === 'completed') {
+    return store.complete('render', quizName, details);
   }
-
-  progress[quizName] = {
-    ...progress[quizName],
-    ...entry,
-  };
-
-  saveProgress(progress);
+  if (status === 'failed') {
+    return store.fail('render', quizName, lastError || 'Unknown error', details);
+  }
+  return store.updateDetails('render', quizName, details);
 };
 
 // Get quizzes that need to be rendered
 export const getUnrenderedQuizzes = (): QuizFileInfo[] => {
   const allQuizzes = getQuizList();
-  const progress = getProgress();
-
-  return allQuizzes.filter((quiz) => {
-    const entry = progress[quiz.baseName];
-    return !entry || entry.status !== 'completed';
-  });
+  syncRenderJobs(allQuizzes);
+  const completed = new Set(getJobStore().jobs('render', 'completed').map((job) => job.name));
+  return allQuizzes.filter((quiz) => !completed.has(quiz.baseName));
 };
 
 // Ensure output directory exists
@@ -154,75 +259,130 @@ export const readQuizData = (quizPath: string): any => {
   return JSON.parse(content);
 };
 
-// Get progress summary
+// Get progress summary (from the job store's per-status counts)
 export const getProgressSummary = (): {
   total: number;
   completed: number;
   failed: number;
   pending: number;
   inProgress: number;
+  stale: number;
 } => {
-  const allQuizzes = getQuizList();
-  const progress = getProgress();
-
-  const completed = allQuizzes.filter(
-    (q) => progress[q.baseName]?.status === 'completed'
-  ).length;
-  const failed = allQuizzes.filter(
-    (q) => progress[q.baseName]?.status === 'failed'
-  ).length;
-  const inProgress = allQuizzes.filter(
-    (q) => progress[q.baseName]?.status === 'in_progress'
-  ).length;
-  const pending = allQuizzes.length - completed - failed - inProgress;
+  syncRenderJobs();
+  const counts = getJobStore().summary('render');
 
   return {
-    total: allQuizzes.length,
-    completed,
-    failed,
-    pending,
-    inProgress,
+    total: counts.total,
+    completed: counts.completed,
+    failed: counts.failed,
+    pending: counts.pending,
+    inProgress: counts.running,
+    stale: counts.stale,
   };
 };
 
-// Copy audio files from quiz audio folder to public folder for rendering
-export const copyAudioFilesToPublic = (audioFolder: string): boolean => {
+// Public-safe staging namespace for a quiz's render
+export const stagingJobId = (quizName: string): string => quizName.replace(/[^A-Za-z0-9._-]+/g, '_');
+
+// Renders in this process using each staging namespace; the last one out removes it.
+// Render leases keep two processes from staging the same quiz at once.
+const stagingRefs = new Map<string, number>();
+
+// Hardlink a clip into staging; across filesystems, clone (reflink) where supported or copy
+const linkOrCopy = (source: string, dest: string): boolean => {
+  try {
+    fs.linkSync(source, dest);
+    return true;
+  } catch (error) {
+    fs.copyFileSync(source, dest, fs.constants.COPYFILE_FICLONE);
+    return false;
+  }
+};
+
+// Stage a quiz's audio in public/jobs/<jobId>/ and return the public path to pass as the
+// audioFolder prop, or null on failure. Links cost no copying, and audiogen replaces clips
+// with new files rather than rewriting them, so a staged render never sees a half-written clip.
+export const stageAudioFiles = (audioFolder: string, jobId: string): string | null => {
+  const publicPath = `${AUDIO_STAGING_DIR}/${jobId}`;
+  const refs = stagingRefs.get(jobId) || 0;
+  if (refs > 0) {
+    stagingRefs.set(jobId, refs + 1);
+    return publicPath;
+  }
+
   const sourceDir = path.join(AUDIO_DIR, audioFolder);
-  
   if (!fs.existsSync(sourceDir)) {
     console.error(`Source audio folder not found: ${sourceDir}`);
-    return false;
+    return null;
+  }
+
+  const stageDir = path.join(STAGING_ROOT, jobId);
+  try {
+    // Leftovers from a render that crashed
+    fs.rmSync(stageDir, { recursive: true, force: true });
+    fs.mkdirSync(stageDir, { recursive: true });
+    fs.writeFileSync(path.join(stageDir, STAGING_OWNER_FILE), `${os.hostname()}:${process.pid}`);
+
+    const mp3Files = fs.readdirSync(sourceDir).filter((f) => f.endsWith('.mp3'));
+    const linked = mp3Files.filter((file) => linkOrCopy(path.join(sourceDir, file), path.join(stageDir, file))).length;
+
+    stagingRefs.set(jobId, 1);
+    console.log(`✅ Staged ${mp3Files.length} audio files in public/${publicPath} (${linked} linked, ${mp3Files.length - linked} copied)`);
+    return publicPath;
+  } catch (error) {
+    console.error('Error staging audio files:', error);
+    fs.rmSync(stageDir, { recursive: true, force: true });
+    return null;
   }
+};
 
-  // Ensure public audio directory exists
-  if (!fs.existsSync(PUBLIC_AUDIO_DIR)) {
-    fs.mkdirSync(PUBLIC_AUDIO_DIR, { recursive: true });
+// Drop one reference to a staging namespace, removing it with the last one
+export const releaseStagedAudio = (jobId: string): void => {
+  const refs = stagingRefs.get(jobId);
+  if (!refs) {
+    return;
   }
+  if (refs > 1) {
+    stagingRefs.set(jobId, refs - 1);
+    return;
+  }
+  stagingRefs.delete(jobId);
+  fs.rmSync(path.join(STAGING_ROOT, jobId), { recursive: true, force: true });
+};
 
+const isProcessAlive = (pid: number): boolean => {
   try {
-    // Clear existing audio files in public folder
-    const existingFiles = fs.readdirSync(PUBLIC_AUDIO_DIR);
-    existingFiles.forEach((file) => {
-      if (file.startsWith('question_') && file.endsWith('.mp3')) {
-        fs.unlinkSync(path.join(PUBLIC_AUDIO_DIR, file));
-      }
-    });
-
-    // Copy new audio files
-    const audioFiles = fs.readdirSync(sourceDir);
-    const mp3Files = audioFiles.filter((f) => f.endsWith('.mp3'));
-    
-    mp3Files.forEach((file) => {
-      const sourcePath = path.join(sourceDir, file);
-      const destPath = path.join(PUBLIC_AUDIO_DIR, file);
-      fs.copyFileSync(sourcePath, destPath);
-    });
-
-    console.log(`✅ Copied ${mp3Files.length} audio files to public folder`);
+    process.kill(pid, 0);
     return true;
   } catch (error) {
-    console.error('Error copying audio files:', error);
-    return false;
+    return error.code === 'EPERM';
+  }
+};
+
+// Remove staging namespaces left behind by renders on this host whose process has exited
+export const sweepStagedAudio = (): number => {
+  if (!fs.existsSync(STAGING_ROOT)) {
+    return 0;
   }
+  let removed = 0;
+  fs.readdirSync(STAGING_ROOT).forEach((jobId) => {
+    const stageDir = path.join(STAGING_ROOT, jobId);
+    let owner = '';
+    try {
+      owner = fs.readFileSync(path.join(stageDir, STAGING_OWNER_FILE), 'utf-8').trim();
+    } catch (error) {
+      // No owner yet: only stale if it isn't being created right now
+      if (Date.now() - fs.statSync(stageDir).mtimeMs < 60000) {
+        return;
+      }
+    }
+    const [host, pid] = owner.split(':');
+    if (owner && (host !== os.hostname() || isProcessAlive(Number(pid)))) {
+      return;
+    }
+    fs.rmSync(stageDir, { recursive: true, force: true });
+    removed++;
+  });
+  return removed;
 };
 
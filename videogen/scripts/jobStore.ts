@@ -0,0 +1,117 @@
+import * as os from 'os';
+import * as path from 'path';
+import { spawnSync } from 'child_process';
+
+// Shared SQLite (WAL) job store - the same file as quizgen/job_store.py, and the same code: every
+// call runs one JobStore method through `job_store.py --call`, so the renderer needs no native
+// SQLite module. Jobs are claimed with a lease and kept with heartbeats; a crashed renderer's job
+// becomes claimable again once its lease expires. Per-status counts are kept by triggers.
+
+const VIDEOGEN_DIR = path.resolve(__dirname, '..');
+const PROJECT_ROOT = path.resolve(VIDEOGEN_DIR, '..');
+export const JOB_STORE_PATH = process.env.JOB_STORE_PATH || path.join(PROJECT_ROOT, 'jobs.sqlite');
+const JOB_STORE_SCRIPT = path.join(PROJECT_ROOT, 'quizgen', 'job_store.py');
+const PYTHON = process.env.PYTHON || 'python3';
+export const DEFAULT_LEASE_SECONDS = 600;
+const CALL_TIMEOUT_MS = 60000; // Well above SQLite's 10s busy timeout
+
+export type JobKind = 'generate' | 'audio' | 'render';
+export type JobStatus = 'pending' | 'running' | 'completed' | 'failed';
+
+export interface Job {
+  kind: JobKind;
+  name: string;
+  status: JobStatus;
+  owner: string | null;
+  lease_expires: number | null;
+  attempts: number;
+  last_error: string | null;
+  details: Record<string, any>;
+  created_at: number;
+  updated_at: number;
+}
+
+export type JobSummary = Record<JobStatus | 'stale' | 'total', number>;
+
+export class JobStore {
+  readonly dbPath: string;
+  readonly owner: string;
+
+  constructor(dbPath: string = JOB_STORE_PATH, owner: string = `${os.hostname()}:${process.pid}`) {
+    this.dbPath = dbPath;
+    this.owner = owner;
+  }
+
+  // Run one JobStore method (Python argument names) and return its JSON result
+  private call<T>(method: string, args: Record<string, any>): T {
+    const result = spawnSync(PYTHON, [JOB_STORE_SCRIPT, '--call', '--path', this.dbPath, '--owner', this.owner], {
+      input: JSON.stringify({ method, args }),
+      encoding: 'utf-8',
+      timeout: CALL_TIMEOUT_MS,
+      maxBuffer: 64 * 1024 * 1024,
+    });
+    if (result.error) {
+      throw new Error(`Job store ${method} failed: ${result.error.message}`);
+    }
+    if (result.status !== 0) {
+      throw new Error(`Job store ${method} failed: ${(result.stderr || '').trim() || `exit ${result.status}`}`);
+    }
+    return JSON.parse(result.stdout) as T;
+  }
+
+  // Add a pending job; an existing one is left alone unless reset (then it's pending again)
+  enqueue(kind: JobKind, name: string, details: Record<string, any> = {}, reset = false): boolean {
+    return this.call<boolean>('enqueue', { kind, name, details, reset });
+  }
+
+  // Enqueue many jobs in one transaction (existing ones are untouched)
+  enqueueMany(kind: JobKind, names: string[]): number {
+    return this.call<number>('enqueue_many', { kind, names });
+  }
+
+  // Atomically take the oldest claimable job (or the named one): pending, optionally failed,
+  // or running with an expired lease
+  claim(kind: JobKind, name?: string, leaseSeconds = DEFAULT_LEASE_SECONDS, includeFailed = false): Job | null {
+    return this.call<Job | null>('claim', { kind, name: name ?? null, lease: leaseSeconds, include_failed: includeFailed });
+  }
+
+  // Extend our lease; false if the job was taken over
+  heartbeat(kind: JobKind, name: string, leaseSeconds = DEFAULT_LEASE_SECONDS): boolean {
+    return this.call<boolean>('heartbeat', { kind, name, lease: leaseSeconds });
+  }
+
+  // Merge fields into a running job's details (only while we hold it)
+  updateDetails(kind: JobKind, name: string, details: Record<string, any>): boolean {
+    return this.call<boolean>('update_details', { kind, name, details });
+  }
+
+  complete(kind: JobKind, name: string, details: Record<string, any> = {}): boolean {
+    return this.call<boolean>('complete', { kind, name, details });
+  }
+
+  fail(kind: JobKind, name: string, error: string, details: Record<string, any> = {}): boolean {
+    return this.call<boolean>('fail', { kind, name, error, details });
+  }
+
+  // Put running jobs whose lease expired back to pending; returns their names
+  releaseExpired(kind: JobKind): string[] {
+    return this.call<string[]>('release_expired', { kind });
+  }
+
+  get(kind: JobKind, name: string): Job | null {
+    return this.call<Job | null>('get', { kind, name });
+  }
+
+  jobs(kind: JobKind, status?: JobStatus): Job[] {
+    return this.call<Job[]>('jobs', { kind, status: status ?? null });
+  }
+
+  // Jobs per status from the trigger-maintained counts, plus running jobs whose lease expired
+  summary(kind: JobKind): JobSummary {
+    return this.call<JobSummary>('summary', { kind });
+  }
+
+  close(): void {
+    // Each call opens and closes its own connection
+  }
+}
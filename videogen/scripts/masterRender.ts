@@ -9,12 +9,21 @@ import {
   ensureOutputDir,
   readQuizData,
   getProgressSummary,
-  audioFolderExists,
-  copyAudioFilesToPublic,
+  checkAudioFolder,
+  stageAudioFiles,
+  releaseStagedAudio,
+  stagingJobId,
+  sweepStagedAudio,
+  claimRender,
+  claimNextRender,
+  renewRender,
+  retryFailedRenders,
+  releaseExpiredRenders,
   QuizFileInfo,
 } from './fileManager';
+import { DEFAULT_LEASE_SECONDS } from './jobStore';
 import { getSeededRandomTemplate, getRandomTemplate } from '../src/templates/templateRegistry';
-import { calculateTotalDuration, FRAMES } from '../src/config/timing';
+import { calculateTotalDuration, FRAMES, TIMING } from '../src/config/timing';
 
 // Get project root dynamically - works on any machine
 const VIDEOGEN_DIR = path.resolve(__dirname, '..');
@@ -42,7 +51,7 @@ const displayMenu = (): void => {
   console.log('  1 - Render ONE randomly selected quiz');
   console.log('  2 - Process EVERYTHING available in quiz jsons (PARALLEL)');
   console.log('  3 - Show progress summary');
-  console.log('  4 - Reset stuck "in_progress" videos');
+  console.log('  4 - Reset stuck renders (expired leases)');
   console.log('  5 - Exit');
   console.log('\n' + '='.repeat(60));
 };
@@ -58,87 +67,123 @@ const showProgressSummary = (): void => {
   console.log(`⏳ Pending:         ${summary.pending}`);
   console.log(`❌ Failed:          ${summary.failed}`);
   console.log(`⚠️  In Progress:    ${summary.inProgress || 0}`);
+  if (summary.stale > 0) {
+    console.log(`💤 Stale leases:   ${summary.stale}`);
+  }
   console.log('='.repeat(60) + '\n');
 };
 
-// Reset stuck "in_progress" videos back to pending
+// Reset renders whose renderer stopped heartbeating back to pending.
+// Live leases are left alone - those quizzes are still being rendered somewhere.
 const resetStuckVideos = (): void => {
-  const fs = require('fs');
-  const path = require('path');
-  const progressPath = path.join(PROJECT_ROOT, 'videogen/output/progress.json');
+  const released = releaseExpiredRenders();
+  released.forEach((name) => console.log(`🔄 Reset: ${name}`));
 
-  if (!fs.existsSync(progressPath)) {
-    console.log('\n❌ Progress file not found');
-    return;
+  if (released.length > 0) {
+    console.log(`\n✅ Reset ${released.length} stuck video(s) to pending status`);
+  } else {
+    console.log('\n✅ No stuck videos found!');
   }
+};
 
-  const progress = JSON.parse(fs.readFileSync(progressPath, 'utf-8'));
-  let resetCount = 0;
+// Remove audio staging left behind by renders that crashed
+const cleanStaleStaging = (): void => {
+  const removed = sweepStagedAudio();
+  if (removed > 0) {
+    console.log(`🧹 Removed ${removed} stale audio staging folder(s)`);
+  }
+};
 
-  Object.keys(progress).forEach((key) => {
-    if (progress[key].status === 'in_progress') {
-      progress[key].status = 'pending';
-      delete progress[key].templateId;
-      delete progress[key].outputFile;
-      resetCount++;
-      console.log(`🔄 Reset: ${key}`);
+// Render a single quiz under its job lease (claimed here unless the caller already holds it)
+const renderQuiz = async (quizInfo: QuizFileInfo, claimed = false): Promise<boolean> => {
+  if (!claimed && !claimRender(quizInfo.baseName)) {
+    console.log(`\n⏭️  ${quizInfo.baseName} is being rendered by another process, skipping`);
+    return false;
+  }
+
+  // Keep the lease alive; if this process dies, the job is claimable again once it expires
+  const heartbeat = setInterval(() => {
+    if (!renewRender(quizInfo.baseName)) {
+      console.warn(`⚠️  Lost the render lease on ${quizInfo.baseName}`);
     }
-  });
+  }, (DEFAULT_LEASE_SECONDS * 1000) / 3);
 
-  if (resetCount > 0) {
-    fs.writeFileSync(progressPath, JSON.stringify(progress, null, 2));
-    console.log(`\n✅ Reset ${resetCount} stuck video(s) to pending status`);
-  } else {
-    console.log('\n✅ No stuck videos found!');
+  try {
+    return await renderLeasedQuiz(quizInfo);
+  } finally {
+    clearInterval(heartbeat);
+    releaseStagedAudio(stagingJobId(quizInfo.baseName));
   }
 };
 
-// Render a single quiz
-const renderQuiz = async (quizInfo: QuizFileInfo): Promise<boolean> => {
+const renderLeasedQuiz = async (quizInfo: QuizFileInfo): Promise<boolean> => {
   try {
     console.log('\n' + '-'.repeat(60));
     console.log(`🎬 Rendering: ${quizInfo.baseName}`);
     console.log('-'.repeat(60));
 
-    // Check if audio folder exists
-    if (!audioFolderExists(quizInfo.audioFolder)) {
-      console.error(`❌ Audio folder not found: ${quizInfo.audioFolder}`);
+    // Read quiz data to get question count
+    const quizData = readQuizData(quizInfo.quizPath);
+    const questionCount = quizData.quiz.length;
+
+    // Check the audio folder has a valid clip for every question (manifest index, no decoding)
+    const questionIds: number[] = quizData.quiz.map((q: any, i: number) => q.question_id ?? i + 1);
+    const audioCheck = checkAudioFolder(quizInfo.audioFolder, questionIds);
+    if (!audioCheck.ok) {
+      console.error(`❌ ${audioCheck.reason}: ${quizInfo.audioFolder}`);
       updateProgress(quizInfo.baseName, {
         status: 'failed',
-        lastError: 'Audio folder not found',
-        attempts: (updateProgress as any).attempts || 1,
+        lastError: audioCheck.reason,
       });
       return false;
     }
 
-    // Copy audio files to public folder for rendering
-    console.log(`📋 Copying audio files...`);
-    const audioCopied = copyAudioFilesToPublic(quizInfo.audioFolder);
-    if (!audioCopied) {
-      console.error(`❌ Failed to copy audio files`);
+    // Clips longer than the question display get cut off by the next scene
+    if (audioCheck.manifest) {
+      const longClips = Object.entries(audioCheck.manifest.clips)
+        .filter(([, clip]) => (clip.duration ?? 0) > TIMING.QUESTION_DISPLAY)
+        .map(([file, clip]) => `${file} (${clip.duration!.toFixed(1)}s)`);
+      if (longClips.length > 0) {
+        console.warn(`⚠️  Longer than the ${TIMING.QUESTION_DISPLAY}s question display: ${longClips.join(', ')}`);
+      }
+      const unmeasured = Object.entries(audioCheck.manifest.clips)
+        .filter(([, clip]) => clip.duration == null)
+        .map(([file]) => file);
+      if (unmeasured.length > 0) {
+        console.log(`ℹ️  Clip length check skipped for ${unmeasured.length} clip(s) without a measured duration`);
+      }
+    }
+
+    // Stage audio files in this render's own public/jobs/<job-id> namespace
+    console.log(`📋 Staging audio files...`);
+    const jobId = stagingJobId(quizInfo.baseName);
+    const stagedAudioFolder = stageAudioFiles(quizInfo.audioFolder, jobId);
+    if (!stagedAudioFolder) {
+      console.error(`❌ Failed to stage audio files`);
       updateProgress(quizInfo.baseName, {
         status: 'failed',
-        lastError: 'Failed to copy audio files',
+        lastError: 'Failed to stage audio files',
       });
       return false;
     }
 
-    // Read quiz data to get question count
-    const quizData = readQuizData(quizInfo.quizPath);
-    const questionCount = quizData.quiz.length;
-
     // Select template using seeded random (consistent for same quiz)
     const template = getSeededRandomTemplate(quizInfo.baseName);
     console.log(`📋 Template: ${template.name} (${template.id})`);
     console.log(`📝 Questions: ${questionCount}`);
     console.log(`🎵 Audio folder: ${quizInfo.audioFolder}`);
+    if (audioCheck.manifest) {
+      const unmeasured = audioCheck.manifest.unmeasured?.length ?? 0;
+      console.log(`🔊 Question audio: ${audioCheck.manifest.total_duration.toFixed(1)}s total` +
+        (unmeasured > 0 ? ` (${unmeasured} clip(s) unmeasured)` : ''));
+    }
 
     // Calculate duration
     const totalDuration = calculateTotalDuration(questionCount);
     const durationSeconds = totalDuration / FRAMES.FPS;
     console.log(`⏱️  Duration: ${durationSeconds.toFixed(1)}s (${totalDuration} frames)`);
 
-    // Mark as in progress
+    // Record what we're rendering on the job
     updateProgress(quizInfo.baseName, {
       status: 'in_progress',
       templateId: template.id,
@@ -151,12 +196,12 @@ const renderQuiz = async (quizInfo: QuizFileInfo): Promise<boolean> => {
     // Prepare props for Remotion
     const props = {
       quizData,
-      audioFolder: quizInfo.audioFolder,
+      audioFolder: stagedAudioFolder,
       templateId: template.id,
     };
 
-    // Write props to a temporary file to avoid shell escaping issues
-    const propsFile = path.join(VIDEOGEN_DIR, '.render-props.json');
+    // Write props to a temporary file to avoid shell escaping issues (one per job, renders may overlap)
+    const propsFile = path.join(VIDEOGEN_DIR, `.render-props.${jobId}.json`);
     const fs = require('fs');
     fs.writeFileSync(propsFile, JSON.stringify(props, null, 2));
 
@@ -319,47 +364,50 @@ const renderAll = async (): Promise<void> => {
     return;
   }
 
-  // Parallel rendering configuration - Max CPU usage
-  const PARALLEL_RENDERS = 1;  // Number of videos to render simultaneously
-  const CONCURRENCY_PER_RENDER = '20';  // Use most CPU cores (24 total, leave 4 for system)
+  // Failed renders get another try in this batch
+  const retried = retryFailedRenders();
+  if (retried > 0) {
+    console.log(`🔁 Retrying ${retried} failed render(s)`);
+  }
+
+  // Parallel rendering configuration - Max CPU usage. Each render stages its own audio,
+  // so several can share the node; the thread budget is split between them.
+  const PARALLEL_RENDERS = Math.max(1, parseInt(process.env.PARALLEL_RENDERS || '1', 10) || 1);  // Videos rendered simultaneously
+  const TOTAL_RENDER_THREADS = 20;  // Use most CPU cores (24 total, leave 4 for system)
+  const CONCURRENCY_PER_RENDER = String(Math.max(1, Math.floor(TOTAL_RENDER_THREADS / PARALLEL_RENDERS)));
 
   // Set environment variable for concurrency
   process.env.RENDER_CONCURRENCY = CONCURRENCY_PER_RENDER;
 
-  console.log(`\n⚡ Sequential rendering: ${PARALLEL_RENDERS} video at a time`);
+  console.log(`\n⚡ Rendering ${PARALLEL_RENDERS} video(s) at a time (PARALLEL_RENDERS)`);
   console.log(`🔧 CPU allocation: ${CONCURRENCY_PER_RENDER} threads per video\n`);
 
+  const quizzesByName = new Map(getQuizList().map((quiz) => [quiz.baseName, quiz]));
   let successCount = 0;
   let failCount = 0;
-  let currentIndex = 0;
-
-  // Process in batches
-  while (currentIndex < unrendered.length) {
-    const batch = unrendered.slice(currentIndex, currentIndex + PARALLEL_RENDERS);
-    const batchPromises = batch.map((quiz, batchIndex) => {
-      const globalIndex = currentIndex + batchIndex;
-      console.log(`\n[${globalIndex + 1}/${unrendered.length}] Starting: ${quiz.baseName}`);
-      return renderQuiz(quiz);
-    });
-
-    // Wait for all videos in this batch to complete
-    const results = await Promise.all(batchPromises);
-
-    // Count successes and failures
-    results.forEach((success) => {
-      if (success) {
+  let started = 0;
+
+  // Each worker claims the next pending job from the store until none are left, so other
+  // renderers working from the same store never pick the same quiz
+  const worker = async (): Promise<void> => {
+    for (let job = claimNextRender(); job; job = claimNextRender()) {
+      const quiz = quizzesByName.get(job.name);
+      if (!quiz) {
+        updateProgress(job.name, { status: 'failed', lastError: 'Quiz JSON not found' });
+        continue;
+      }
+      started++;
+      console.log(`\n[${started}/${unrendered.length}] Starting: ${quiz.baseName}`);
+      if (await renderQuiz(quiz, true)) {
         successCount++;
       } else {
         failCount++;
       }
-    });
-
-    currentIndex += PARALLEL_RENDERS;
+      console.log(`\n📊 Progress: ${successCount + failCount}/${unrendered.length} processed (${successCount} successful, ${failCount} failed)`);
+    }
+  };
 
-    // Show progress after each batch
-    const processed = Math.min(currentIndex, unrendered.length);
-    console.log(`\n📊 Progress: ${processed}/${unrendered.length} processed (${successCount} successful, ${failCount} failed)`);
-  }
+  await Promise.all(Array.from({ length: PARALLEL_RENDERS }, () => worker()));
 
   console.log('\n' + '='.repeat(60));
   console.log('📊 BATCH RENDER COMPLETE 📊');
@@ -380,6 +428,7 @@ const main = async (): Promise<void> => {
     const command = args[0].toLowerCase();
     
     console.log('\n🚀 Initializing Master Render Program...\n');
+    cleanStaleStaging();
     
     switch (command) {
       case '--one':
@@ -399,6 +448,21 @@ const main = async (): Promise<void> => {
         showProgressSummary();
         break;
 
+      case '--quiz':
+      case '-q': {
+        // Render one named quiz (used by the pipeline driver as quizzes become ready)
+        const name = (args[1] || '').replace(/\.json$/, '');
+        const quiz = getQuizList().find((q) => q.baseName === name);
+        if (!quiz) {
+          console.log(`\n❌ Quiz not found in quiz jsons: ${name}`);
+          process.exitCode = 1;
+          break;
+        }
+        const ok = await renderQuiz(quiz);
+        process.exitCode = ok ? 0 : 1;
+        break;
+      }
+
       case '--reset':
       case '-r':
         showProgressSummary();
@@ -412,7 +476,8 @@ const main = async (): Promise<void> => {
         console.log('  --one, -1       Render one randomly selected quiz');
         console.log('  --all, -a       Render all unrendered quizzes (parallel)');
         console.log('  --summary, -s   Show progress summary');
-        console.log('  --reset, -r     Reset stuck "in_progress" videos');
+        console.log('  --quiz, -q NAME Render the named quiz (exit code 1 on failure)');
+        console.log('  --reset, -r     Reset stuck renders (expired leases)');
         console.log('  --help, -h      Show this help message');
         console.log('\nIf no option is provided, runs in interactive mode.\n');
         break;
@@ -429,6 +494,7 @@ const main = async (): Promise<void> => {
   
   // Interactive mode (no command-line arguments)
   console.log('\n🚀 Initializing Master Render Program...\n');
+  cleanStaleStaging();
 
   // Show initial summary
   showProgressSummary();
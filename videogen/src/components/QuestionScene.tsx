@@ -1,5 +1,6 @@
 import React from 'react';
 import { AbsoluteFill, interpolate, spring, useCurrentFrame, useVideoConfig, Audio, staticFile, Sequence } from 'remotion';
+import { questionAudioFile } from '../config/audio';
 import { BombTimer } from './BombTimer';
 import { ProgressBar } from './ProgressBar';
 
@@ -99,7 +100,7 @@ export const QuestionScene: React.FC<QuestionSceneProps> = ({
     <AbsoluteFill>
       {/* Question-specific audio - plays exactly when question appears */}
       <Audio
-        src={staticFile(`question_audios/question_${questionId}.mp3`)}
+        src={staticFile(questionAudioFile(audioFolder, questionId))}
         volume={1.0}
       />
 
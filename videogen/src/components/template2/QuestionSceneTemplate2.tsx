@@ -1,5 +1,6 @@
 import React from 'react';
 import { AbsoluteFill, interpolate, spring, useCurrentFrame, useVideoConfig, Audio, staticFile, Sequence } from 'remotion';
+import { questionAudioFile } from '../../config/audio';
 import { VerticalTimerBar } from './VerticalTimerBar';
 import { GameProgressBar } from './GameProgressBar';
 
@@ -92,7 +93,7 @@ export const QuestionSceneTemplate2: React.FC<QuestionSceneProps> = ({
     <AbsoluteFill>
       {/* Question-specific audio */}
       <Audio
-        src={staticFile(`question_audios/question_${questionId}.mp3`)}
+        src={staticFile(questionAudioFile(audioFolder, questionId))}
         volume={1.0}
       />
 
@@ -1,5 +1,6 @@
 import React from 'react';
 import { AbsoluteFill, interpolate, spring, useCurrentFrame, useVideoConfig, Audio, staticFile, Sequence } from 'remotion';
+import { questionAudioFile } from '../../config/audio';
 import { CuteHourglassTimer } from './CuteHourglassTimer';
 import { StarProgressBar } from './StarProgressBar';
 import { DifficultyBadges } from './DifficultyBadges';
@@ -127,7 +128,7 @@ export const QuestionSceneTemplate3: React.FC<QuestionSceneProps> = ({
     <AbsoluteFill>
       {/* Audio sequences - same as before */}
       <Audio
-        src={staticFile(`question_audios/question_${questionId}.mp3`)}
+        src={staticFile(questionAudioFile(audioFolder, questionId))}
         volume={1.0}
       />
 
@@ -0,0 +1,14 @@
+// Where question audio lives under public/ - shared by the templates and the render scripts
+
+// Per-render staging namespaces: public/jobs/<job-id>/question_<id>.mp3
+export const AUDIO_STAGING_DIR = 'jobs';
+
+// Legacy single folder, still used by Remotion Studio previews
+export const LEGACY_AUDIO_DIR = 'question_audios';
+
+// Public path of a question's audio. Renders pass their staging namespace as audioFolder;
+// anything else (e.g. the Studio default props) falls back to the legacy folder.
+export const questionAudioFile = (audioFolder: string, questionId: number): string => {
+  const dir = audioFolder.startsWith(`${AUDIO_STAGING_DIR}/`) ? audioFolder : LEGACY_AUDIO_DIR;
+  return `${dir}/question_${questionId}.mp3`;
+};